@@ -0,0 +1,259 @@
+import argparse
+import gc
+import heapq
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from models import Supplier
+from scoring import calculate_fit_score
+from synthetic import generate_criteria, generate_records
+
+try:
+    from vector_scoring import ScoringEngine
+except ImportError:  # numpy not installed; engine stages are skipped
+    ScoringEngine = None
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+# Opt-in with --large: several GB of records, models and engine columns
+LARGE_SIZE = 1_000_000
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+
+class StageResult(BaseModel):
+    stage: str
+    size: int
+    ops: int
+    seconds: float
+    ops_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    peak_memory_mb: Optional[float] = None
+
+
+def percentile(sorted_values: List[int], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[i] / 1e6
+
+
+# A stage is (name, setup, run). setup(ctx) builds fresh input outside the
+# measurement; run(state, latencies) does the work and appends one latency in
+# nanoseconds per operation when given a list.
+Stage = Tuple[str, Callable[[Dict[str, Any]], Any], Callable[[Any, Optional[List[int]]], int]]
+
+
+def _timed(items, func, latencies: Optional[List[int]]) -> int:
+    clock = time.perf_counter_ns
+    count = 0
+    if latencies is None:
+        for item in items:
+            func(item)
+            count += 1
+        return count
+    for item in items:
+        start = clock()
+        func(item)
+        latencies.append(clock() - start)
+        count += 1
+    return count
+
+
+def _construct(records, latencies):
+    # Keep the models alive so the memory pass sees the whole catalog
+    suppliers = []
+    return _timed(records, lambda r: suppliers.append(Supplier.model_validate(r)), latencies)
+
+
+def _fresh_suppliers(ctx):
+    # Unvalidated copies with empty derived-metric caches
+    return [Supplier.model_construct(**dict(s)) for s in ctx["suppliers"]]
+
+
+def _assess_risk(suppliers, latencies):
+    return _timed(suppliers, Supplier.assess_risk, latencies)
+
+
+def _score(state, latencies):
+    suppliers, criteria_list = state
+    ops = 0
+    for criteria in criteria_list:
+        ops += _timed(suppliers, lambda s: calculate_fit_score(s, criteria), latencies)
+    return ops
+
+
+def _scored_lists(ctx):
+    return [[(calculate_fit_score(s, c).total_score, i) for i, s in enumerate(ctx["suppliers"])] for c in ctx["criteria"]]
+
+
+def _sort(scored_lists, latencies):
+    return _timed(scored_lists, lambda scored: sorted(scored, key=lambda x: x[0], reverse=True), latencies)
+
+
+def _top_k(scored_lists, latencies):
+    return _timed(scored_lists, lambda scored: heapq.nlargest(50, scored, key=lambda x: x[0]), latencies)
+
+
+def _serialize(suppliers, latencies):
+    return _timed(suppliers, lambda s: json.dumps(s.model_dump(mode="json")), latencies)
+
+
+def _build_engine(suppliers, latencies):
+    engine = ScoringEngine()
+    return _timed(suppliers, engine.upsert, latencies)
+
+
+def _engine_state(ctx):
+    engine = ScoringEngine()
+    for s in ctx["suppliers"]:
+        engine.upsert(s)
+    return engine, ctx["criteria"]
+
+
+def _engine_score(state, latencies):
+    engine, criteria_list = state
+    return _timed(criteria_list, lambda c: engine.score(c).order(50), latencies)
+
+
+STAGES: List[Stage] = [
+    ("construction", lambda ctx: ctx["records"], _construct),
+    ("risk_assessment", _fresh_suppliers, _assess_risk),
+    ("scoring", lambda ctx: (ctx["suppliers"], ctx["criteria"][:ctx["scoring_queries"]]), _score),
+    ("sorting", _scored_lists, _sort),
+    ("top_k", _scored_lists, _top_k),
+    ("serialization", lambda ctx: ctx["suppliers"], _serialize),
+]
+if ScoringEngine is not None:
+    STAGES += [
+        ("engine_build", lambda ctx: ctx["suppliers"], _build_engine),
+        ("engine_rank", _engine_state, _engine_score),
+    ]
+
+
+def run_stage(stage: Stage, ctx: Dict[str, Any], size: int, measure_memory: bool) -> StageResult:
+    name, setup, run = stage
+
+    latencies: List[int] = []
+    state = setup(ctx)
+    start = time.perf_counter()
+    ops = run(state, latencies)
+    seconds = time.perf_counter() - start
+    latencies.sort()
+
+    peak = None
+    if measure_memory:
+        # Second, untimed pass under tracemalloc, which slows allocation down
+        state = setup(ctx)
+        tracemalloc.start()
+        run(state, None)
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    del state
+
+    return StageResult(
+        stage=name, size=size, ops=ops, seconds=round(seconds, 4),
+        ops_per_second=round(ops / seconds, 1) if seconds else 0.0,
+        p50_ms=round(percentile(latencies, 0.50), 4),
+        p95_ms=round(percentile(latencies, 0.95), 4),
+        p99_ms=round(percentile(latencies, 0.99), 4),
+        peak_memory_mb=None if peak is None else round(peak, 2),
+    )
+
+
+def run_benchmarks(size: int, seed: int = 0, queries: int = 20, scoring_queries: int = 3,
+                   measure_memory: bool = True, stages: Optional[List[str]] = None) -> List[StageResult]:
+    ctx: Dict[str, Any] = {
+        "records": list(generate_records(size, seed)),
+        "criteria": generate_criteria(queries, seed),
+        "scoring_queries": scoring_queries,
+    }
+    ctx["suppliers"] = [Supplier.model_validate(r) for r in ctx["records"]]
+
+    results = []
+    try:
+        for stage in STAGES:
+            if stages is None or stage[0] in stages:
+                results.append(run_stage(stage, ctx, size, measure_memory))
+    finally:
+        # Release this size's catalog before the caller builds the next one
+        ctx.clear()
+        gc.collect()
+    return results
+
+
+def find_regressions(results: List[StageResult], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    # A stage regresses if its throughput dropped, or its p95 latency grew,
+    # by more than `threshold` (a fraction) relative to the stored baseline
+    regressions = []
+    for result in results:
+        base = baseline.get(f"{result.stage}@{result.size}")
+        if base is None:
+            continue
+        if result.ops_per_second < base["ops_per_second"] * (1 - threshold):
+            regressions.append(f"{result.stage}@{result.size}: throughput {result.ops_per_second:.1f}/s vs baseline {base['ops_per_second']:.1f}/s")
+        if base["p95_ms"] and result.p95_ms > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{result.stage}@{result.size}: p95 {result.p95_ms:.4f}ms vs baseline {base['p95_ms']:.4f}ms")
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: List[StageResult]):
+    baseline = load_baseline(path)
+    for result in results:
+        baseline[f"{result.stage}@{result.size}"] = result.model_dump()
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark supplier construction, scoring, risk, sorting and serialization")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Catalog sizes to benchmark")
+    parser.add_argument("--large", action="store_true", help=f"Also benchmark {LARGE_SIZE:,} suppliers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=20, help="Queries for sorting and engine stages")
+    parser.add_argument("--scoring-queries", type=int, default=3, help="Queries for per-supplier scoring")
+    parser.add_argument("--stages", nargs="+", help="Only run these stages")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory pass")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging, as a fraction")
+    args = parser.parse_args(argv)
+
+    sizes = list(args.sizes)
+    if args.large and LARGE_SIZE not in sizes:
+        sizes.append(LARGE_SIZE)
+
+    results = []
+    for size in sizes:
+        for result in run_benchmarks(size, args.seed, args.queries, args.scoring_queries, not args.no_memory, args.stages):
+            results.append(result)
+            print(f"{result.stage:>16} n={result.size:<8} {result.ops_per_second:>12.1f} ops/s  "
+                  f"p50={result.p50_ms:.4f}ms p95={result.p95_ms:.4f}ms p99={result.p99_ms:.4f}ms  "
+                  f"peak={result.peak_memory_mb if result.peak_memory_mb is not None else '-'}MB")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = find_regressions(results, load_baseline(args.baseline), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
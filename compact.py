@@ -0,0 +1,289 @@
+import argparse
+import gc
+import sys
+import types
+from bisect import bisect_right
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from models import (Supplier, Capability, Region, CostModel, PriceTier, PerformanceRating, ContactInfo, RatingHistory,
+                    get_performance_policy, performance_policy_version, period_average, risk_level_for)
+
+# Slotted, immutable-by-convention mirror of the Supplier model tree for the
+# ranking path. Records keep the Pydantic attribute names, so scoring and the
+# indexes accept either; lists become tuples and repeated strings (services,
+# countries, currencies, ...) are interned so the whole catalog shares one copy.
+
+_intern = sys.intern
+# Rating periods repeat across suppliers; one date object per distinct day
+_dates: Dict[date, date] = {}
+
+
+def _shared_date(d: date) -> date:
+    return _dates.setdefault(d, d)
+
+
+def _intern_optional(value: Optional[str]) -> Optional[str]:
+    return None if value is None else _intern(value)
+
+
+class CompactContact:
+    __slots__ = ("email", "phone", "address")
+
+    def __init__(self, email: str, phone: Optional[str], address: Optional[str]):
+        self.email = email
+        self.phone = phone
+        self.address = address
+
+
+class CompactCapability:
+    __slots__ = ("category", "services", "certifications")
+
+    def __init__(self, category: str, services: Tuple[str, ...], certifications: Tuple[str, ...]):
+        self.category = category
+        self.services = services
+        self.certifications = certifications
+
+
+class CompactRegion:
+    __slots__ = ("country", "state_province", "service_radius_km", "latitude", "longitude")
+
+    def __init__(self, country: str, state_province: Optional[str], service_radius_km: Optional[float],
+                 latitude: Optional[float], longitude: Optional[float]):
+        self.country = country
+        self.state_province = state_province
+        self.service_radius_km = service_radius_km
+        self.latitude = latitude
+        self.longitude = longitude
+
+    # Same rule as Region.service_area
+    service_area = Region.service_area
+
+
+class CompactPriceTier:
+    __slots__ = ("min_quantity", "unit_cost")
+
+    def __init__(self, min_quantity: int, unit_cost: float):
+        self.min_quantity = min_quantity
+        self.unit_cost = unit_cost
+
+
+class CompactCostModel:
+    __slots__ = ("item_name", "unit_cost", "currency", "bulk_discount_available", "tiers", "_quantities")
+
+    def __init__(self, item_name: str, unit_cost: float, currency: str, bulk_discount_available: bool,
+                 tiers: Tuple[CompactPriceTier, ...]):
+        self.item_name = item_name
+        self.unit_cost = unit_cost
+        self.currency = currency
+        self.bulk_discount_available = bulk_discount_available
+        self.tiers = tiers
+        self._quantities = tuple(t.min_quantity for t in tiers) if tiers else ()
+
+    # Same rule as CostModel.unit_cost_at; tiers arrive sorted from the model
+    def unit_cost_at(self, volume: Optional[int]) -> float:
+        if volume is None or not self.tiers:
+            return self.unit_cost
+        i = bisect_right(self._quantities, volume)
+        return self.tiers[i - 1].unit_cost if i else self.unit_cost
+
+
+class CompactRating:
+    __slots__ = ("period_start", "period_end", "quality_score", "timeliness_score", "communication_score", "reviewer_comments")
+
+    def __init__(self, period_start: date, period_end: date, quality_score: float, timeliness_score: float,
+                 communication_score: float, reviewer_comments: Optional[str]):
+        self.period_start = period_start
+        self.period_end = period_end
+        self.quality_score = quality_score
+        self.timeliness_score = timeliness_score
+        self.communication_score = communication_score
+        self.reviewer_comments = reviewer_comments
+
+
+class CompactSupplier:
+    """Read-only supplier record used by the scoring engine.
+
+    Built with ``to_compact`` from a validated Supplier and turned back into one
+    with ``from_compact``. A changed supplier gets a new record rather than an
+    in-place edit, so the country count is fixed at build time and overall_score,
+    once derived from the ratings, stays current.
+    """
+
+    __slots__ = ("id", "name", "contact_info", "capabilities", "regions", "pricing", "ratings",
+                 "overall_score", "risk_level", "_country_count", "_history", "_policy_version",
+                 "_details_json", "_details_version")
+
+    def __init__(self, id: UUID, name: str, contact_info: CompactContact, capabilities: Tuple[CompactCapability, ...],
+                 regions: Tuple[CompactRegion, ...], pricing: Tuple[CompactCostModel, ...], ratings: Tuple[CompactRating, ...],
+                 overall_score: Optional[float], risk_level: Optional[str]):
+        self.id = id
+        self.name = name
+        self.contact_info = contact_info
+        self.capabilities = capabilities
+        self.regions = regions
+        self.pricing = pricing
+        self.ratings = ratings
+        self.overall_score = overall_score
+        self.risk_level = risk_level
+        self._country_count = len({region.country for region in regions})
+        self._history = None
+        self._policy_version = None
+        self._details_json = None
+        self._details_version = None
+
+    def country_count(self) -> int:
+        return self._country_count
+
+    def calculate_overall_score(self) -> Optional[float]:
+        # Same rules as Supplier.calculate_overall_score
+        if not self.ratings:
+            return None
+        policy = get_performance_policy()
+        self._policy_version = performance_policy_version()
+        if policy.is_uniform():
+            self.overall_score = round(sum(period_average(r) for r in self.ratings) / len(self.ratings), 2)
+        else:
+            if self._history is None:
+                self._history = RatingHistory(self.ratings)
+            self.overall_score = self._history.score(policy)
+        return self.overall_score
+
+    def refresh_overall_score(self) -> Optional[float]:
+        if self.overall_score is None or (self._policy_version is not None and self._policy_version != performance_policy_version()):
+            self.overall_score = None
+            self.calculate_overall_score()
+        return self.overall_score
+
+    def assess_risk(self) -> str:
+        self.refresh_overall_score()
+        self.risk_level = risk_level_for(self.overall_score, self._country_count)
+        return self.risk_level
+
+    def model_dump(self) -> Dict[str, Any]:
+        # Same shape as Supplier.model_dump(); only paid for rows actually returned
+        return from_compact(self).model_dump()
+
+    def details_json(self) -> bytes:
+        # model_dump() as JSON once risk is assessed. Serialized once per record
+        # (a changed supplier gets a new record) and again only after a policy change.
+        version = performance_policy_version()
+        if self._details_json is None or self._details_version != version:
+            self.assess_risk()
+            self._details_json = from_compact(self).model_dump_json().encode()
+            self._details_version = version
+        return self._details_json
+
+
+def to_compact(supplier: Supplier) -> CompactSupplier:
+    contact = supplier.contact_info
+    return CompactSupplier(
+        id=supplier.id,
+        name=supplier.name,
+        contact_info=CompactContact(contact.email, contact.phone, contact.address),
+        capabilities=tuple(
+            CompactCapability(_intern(c.category), tuple(_intern(s) for s in c.services),
+                              tuple(_intern(s) for s in c.certifications))
+            for c in supplier.capabilities
+        ),
+        regions=tuple(
+            CompactRegion(_intern(r.country), _intern_optional(r.state_province), r.service_radius_km, r.latitude, r.longitude)
+            for r in supplier.regions
+        ),
+        pricing=tuple(
+            CompactCostModel(_intern(p.item_name), p.unit_cost, _intern(p.currency), p.bulk_discount_available,
+                             tuple(CompactPriceTier(t.min_quantity, t.unit_cost) for t in p.tiers))
+            for p in supplier.pricing
+        ),
+        ratings=tuple(
+            CompactRating(_shared_date(r.period_start), _shared_date(r.period_end), r.quality_score,
+                          r.timeliness_score, r.communication_score, r.reviewer_comments)
+            for r in supplier.ratings
+        ),
+        overall_score=supplier.overall_score,
+        risk_level=supplier.risk_level,
+    )
+
+
+def from_compact(record: CompactSupplier) -> Supplier:
+    # The record was built from a validated Supplier, so construct without re-validating
+    contact = record.contact_info
+    return Supplier.model_construct(
+        id=record.id,
+        name=record.name,
+        contact_info=ContactInfo.model_construct(email=contact.email, phone=contact.phone, address=contact.address),
+        capabilities=[
+            Capability.model_construct(category=c.category, services=list(c.services), certifications=list(c.certifications))
+            for c in record.capabilities
+        ],
+        regions=[
+            Region.model_construct(country=r.country, state_province=r.state_province, service_radius_km=r.service_radius_km,
+                                   latitude=r.latitude, longitude=r.longitude)
+            for r in record.regions
+        ],
+        pricing=[
+            CostModel.model_construct(item_name=p.item_name, unit_cost=p.unit_cost, currency=p.currency,
+                                      bulk_discount_available=p.bulk_discount_available,
+                                      tiers=[PriceTier.model_construct(min_quantity=t.min_quantity, unit_cost=t.unit_cost) for t in p.tiers])
+            for p in record.pricing
+        ],
+        ratings=[
+            PerformanceRating.model_construct(
+                period_start=r.period_start, period_end=r.period_end, quality_score=r.quality_score,
+                timeliness_score=r.timeliness_score, communication_score=r.communication_score,
+                reviewer_comments=r.reviewer_comments
+            )
+            for r in record.ratings
+        ],
+        overall_score=record.overall_score,
+        risk_level=record.risk_level,
+    )
+
+
+def deep_sizeof(roots: Iterable[Any]) -> int:
+    # Bytes reachable from roots, counting each object once, so interned strings
+    # and shared dates count once for the whole catalog. Classes and modules are skipped.
+    seen = set()
+    stack = list(roots)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, types.ModuleType, types.FunctionType)):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+def memory_report(suppliers: List[Supplier]) -> Dict[str, float]:
+    # Bytes per supplier held by the Pydantic models versus their compact records
+    n = max(len(suppliers), 1)
+    records = [to_compact(s) for s in suppliers]
+    model_bytes = deep_sizeof(suppliers)
+    compact_bytes = deep_sizeof(records)
+    return {
+        "suppliers": len(suppliers),
+        "model_bytes_per_supplier": round(model_bytes / n, 1),
+        "compact_bytes_per_supplier": round(compact_bytes / n, 1),
+        "reduction": round(1 - compact_bytes / model_bytes, 3) if model_bytes else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from synthetic import generate_suppliers
+
+    parser = argparse.ArgumentParser(description="Compare memory per supplier of Pydantic models and compact records")
+    parser.add_argument("count", type=int, nargs="?", default=10_000, help="Synthetic suppliers to measure")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = memory_report(list(generate_suppliers(args.count, args.seed)))
+    for key, value in report.items():
+        print(f"{key:>28}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
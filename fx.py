@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+# Called with the set of currency codes whose rate was added, changed or removed
+RateListener = Callable[[Set[str]], None]
+
+
+class FxRates:
+    """Exchange-rate table: units of the base currency per one unit of each currency.
+
+    Loaded from a local JSON file of the form
+    ``{"base": "USD", "rates": {"EUR": 1.08, "CNY": 0.14}}``. Listeners are told
+    which currencies changed so price indexes can refresh only those entries.
+    """
+
+    def __init__(self, rates: Dict[str, float], base: str = "USD", path: Optional[str] = None):
+        self.base = base
+        self.path = path
+        self.version = 0
+        self._rates: Dict[str, float] = {base: 1.0}
+        self._listeners: List[RateListener] = []
+        self._apply(rates)
+
+    @classmethod
+    def load(cls, path: str) -> "FxRates":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get("rates", {}), base=data.get("base", "USD"), path=path)
+
+    def _apply(self, rates: Dict[str, Optional[float]]) -> Set[str]:
+        # Validate everything first so a bad entry leaves the table untouched
+        for currency, rate in rates.items():
+            if len(currency) != 3:
+                raise ValueError(f"Invalid currency code {currency!r}")
+            if currency == self.base and rate != 1.0:
+                raise ValueError(f"Rate of the base currency {self.base} must be 1.0")
+            if rate is not None and rate <= 0:
+                raise ValueError(f"Rate for {currency} must be positive")
+
+        changed = set()
+        for currency, rate in rates.items():
+            if currency == self.base:
+                continue
+            if rate is None:
+                if self._rates.pop(currency, None) is not None:
+                    changed.add(currency)
+            elif self._rates.get(currency) != rate:
+                self._rates[currency] = float(rate)
+                changed.add(currency)
+        return changed
+
+    def add_listener(self, listener: RateListener):
+        self._listeners.append(listener)
+
+    def update(self, rates: Dict[str, Optional[float]]) -> Set[str]:
+        # A rate of None removes the currency
+        changed = self._apply(rates)
+        if changed:
+            self.version += 1
+            for listener in self._listeners:
+                listener(changed)
+            if self.path:
+                self.save()
+        return changed
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        # Write-then-rename so readers never see a half-written file
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, suffix=".tmp") as f:
+            json.dump(self.as_dict(), f, indent=2, sort_keys=True)
+        os.replace(f.name, path)
+
+    def as_dict(self) -> Dict:
+        return {"base": self.base, "rates": {c: r for c, r in sorted(self._rates.items()) if c != self.base}}
+
+    def currencies(self) -> Iterable[str]:
+        return self._rates.keys()
+
+    def has(self, currency: str) -> bool:
+        return currency in self._rates
+
+    def to_base(self, amount, currency: str):
+        return amount * self._rates[currency]
+
+    def from_base(self, amount, currency: str):
+        return amount / self._rates[currency]
+
+    def convert(self, amount, from_currency: str, to_currency: str):
+        return self.from_base(self.to_base(amount, from_currency), to_currency)
+
+    def __getstate__(self):
+        # Listeners belong to this process (e.g. its scoring engine); worker copies start without them
+        state = self.__dict__.copy()
+        state["_listeners"] = []
+        return state
@@ -0,0 +1,98 @@
+import math
+from typing import Dict, Hashable, List, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Grid levels, finest first. A circle is filed at the finest level where its
+# bounding box spans at most MAX_CELLS_PER_SIDE cells a side, so small radii
+# land in small cells and a 1000 km radius doesn't touch hundreds of them.
+LEVELS = (0.5, 2.0, 8.0, 32.0)
+MAX_CELLS_PER_SIDE = 4
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def covers(latitude: float, longitude: float, radius_km: float, point_lat: float, point_lon: float) -> bool:
+    return haversine_km(latitude, longitude, point_lat, point_lon) <= radius_km
+
+
+def _bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    # (min_lat, max_lat, min_lon, max_lon) of the spherical cap, padded slightly
+    # for rounding; longitudes may run past +-180 and are wrapped per cell
+    delta = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(delta) + 1e-9
+    min_lat, max_lat = latitude - dlat, latitude + dlat
+    cos_lat = math.cos(math.radians(latitude))
+    if min_lat <= -90.0 or max_lat >= 90.0 or math.sin(delta) >= cos_lat:
+        # Reaches a pole: every longitude
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    dlon = math.degrees(math.asin(math.sin(delta) / cos_lat)) + 1e-9
+    return min_lat, max_lat, longitude - dlon, longitude + dlon
+
+
+class GeoGrid:
+    """Multi-level grid of service circles (center, radius) keyed by an owner.
+
+    ``covering(lat, lon)`` looks up the one cell containing the point at each
+    level and checks only the circles filed there, so the cost depends on local
+    density rather than catalog size.
+    """
+
+    def __init__(self):
+        # (level, lat cell, lon cell) -> {key: [circle, ...]}
+        self._cells: Dict[Tuple[int, int, int], Dict[Hashable, List[Tuple[float, float, float]]]] = {}
+        self._filed: Dict[Hashable, List[Tuple[int, int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._filed)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._filed
+
+    def add(self, key: Hashable, latitude: float, longitude: float, radius_km: float):
+        circle = (latitude, longitude, radius_km)
+        min_lat, max_lat, min_lon, max_lon = _bounding_box(latitude, longitude, radius_km)
+        level = len(LEVELS) - 1
+        for i, size in enumerate(LEVELS):
+            if (max_lat - min_lat) / size <= MAX_CELLS_PER_SIDE and (max_lon - min_lon) / size <= MAX_CELLS_PER_SIDE:
+                level = i
+                break
+        size = LEVELS[level]
+        wrap = int(round(360.0 / size))
+        lon_cells = range(math.floor(min_lon / size), math.floor(max_lon / size) + 1)
+        # A full-width box already touches every column; don't wrap it twice
+        lon_cells = {c % wrap for c in lon_cells}
+        filed = self._filed.setdefault(key, [])
+        for lat_cell in range(math.floor(min_lat / size), math.floor(max_lat / size) + 1):
+            for lon_cell in lon_cells:
+                cell = (level, lat_cell, lon_cell)
+                circles = self._cells.setdefault(cell, {}).setdefault(key, [])
+                if not circles:
+                    filed.append(cell)
+                circles.append(circle)
+
+    def remove(self, key: Hashable):
+        for cell in self._filed.pop(key, ()):
+            owners = self._cells[cell]
+            del owners[key]
+            if not owners:
+                del self._cells[cell]
+
+    def covering(self, latitude: float, longitude: float) -> Set[Hashable]:
+        # Keys with at least one circle containing the point
+        matches = set()
+        for level, size in enumerate(LEVELS):
+            wrap = int(round(360.0 / size))
+            owners = self._cells.get((level, math.floor(latitude / size), math.floor(longitude / size) % wrap))
+            if not owners:
+                continue
+            for key, circles in owners.items():
+                if key not in matches and any(covers(lat, lon, radius, latitude, longitude) for lat, lon, radius in circles):
+                    matches.add(key)
+        return matches
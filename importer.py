@@ -0,0 +1,247 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel, Field, ValidationError
+
+from models import Supplier, Capability, Region, CostModel, PriceTier, PerformanceRating, ContactInfo
+from store import SupplierStore
+
+FORMATS = ("ndjson", "csv")
+
+# CSV layout: one supplier per row, list-valued columns hold JSON arrays
+CSV_COLUMNS = ["id", "name", "email", "phone", "address", "capabilities", "regions", "pricing", "ratings", "overall_score", "risk_level"]
+_CSV_JSON_COLUMNS = ("capabilities", "regions", "pricing", "ratings")
+
+# A parsed input row: (line number, supplier dict or a parse error message)
+Record = Tuple[int, Any]
+
+
+class RowError(BaseModel):
+    line: int = Field(..., description="1-based line number of the rejected row")
+    error: str = Field(..., description="Why the row was rejected")
+
+
+class ImportReport(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[RowError] = Field(default_factory=list, description="Per-row errors, capped at max_errors")
+
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[Record]:
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, f"Invalid JSON: {e}"
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[Record]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        try:
+            yield reader.line_num, _csv_row_to_record(row)
+        except ValueError as e:
+            yield reader.line_num, f"Invalid CSV row: {e}"
+
+
+def _csv_row_to_record(row: Dict[str, str]) -> Dict[str, Any]:
+    record: Dict[str, Any] = {
+        "name": row.get("name") or "",
+        "contact_info": {
+            "email": row.get("email") or "",
+            "phone": row.get("phone") or None,
+            "address": row.get("address") or None,
+        },
+    }
+    if row.get("id"):
+        record["id"] = row["id"]
+    for column in _CSV_JSON_COLUMNS:
+        if row.get(column):
+            record[column] = json.loads(row[column])
+    if row.get("overall_score"):
+        record["overall_score"] = float(row["overall_score"])
+    if row.get("risk_level"):
+        record["risk_level"] = row["risk_level"]
+    return record
+
+
+def read_records(lines: Iterable[str], fmt: str) -> Iterator[Record]:
+    if fmt == "ndjson":
+        return read_ndjson(lines)
+    if fmt == "csv":
+        return read_csv(lines)
+    raise ValueError(f"Unsupported format {fmt!r}, expected one of {FORMATS}")
+
+
+def _typed(value: Any, kind: type, field: str, optional: bool = False) -> Any:
+    # construct_trusted's only check: the JSON type of each field, so a
+    # mistyped value is a row error rather than a crash when it is scored
+    if value is None and optional:
+        return None
+    if kind is float:
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        ok = isinstance(value, kind) and (kind is bool or not isinstance(value, bool))
+    if not ok:
+        raise TypeError(f"{field} must be {'a number' if kind is float else kind.__name__}, not {type(value).__name__}")
+    return value
+
+
+def _strings(values: Any, field: str) -> List[str]:
+    return [_typed(v, str, field) for v in _typed(values, list, field)]
+
+
+def construct_trusted(data: Dict[str, Any]) -> Supplier:
+    # Builds a Supplier without validation for data we produced ourselves
+    # (e.g. snapshots): types are checked, constraints are not, and only the
+    # JSON-encoded ids and dates are converted
+    contact = _typed(data["contact_info"], dict, "contact_info")
+    fields = {
+        "name": _typed(data["name"], str, "name"),
+        "contact_info": ContactInfo.model_construct(
+            email=_typed(contact["email"], str, "contact_info.email"),
+            phone=_typed(contact.get("phone"), str, "contact_info.phone", optional=True),
+            address=_typed(contact.get("address"), str, "contact_info.address", optional=True)
+        ),
+        "capabilities": [
+            Capability.model_construct(category=_typed(c["category"], str, "capabilities.category"),
+                                       services=_strings(c.get("services", []), "capabilities.services"),
+                                       certifications=_strings(c.get("certifications", []), "capabilities.certifications"))
+            for c in _typed(data.get("capabilities", []), list, "capabilities")
+        ],
+        "regions": [
+            Region.model_construct(country=_typed(r["country"], str, "regions.country"),
+                                   state_province=_typed(r.get("state_province"), str, "regions.state_province", optional=True),
+                                   service_radius_km=_typed(r.get("service_radius_km"), float, "regions.service_radius_km", optional=True),
+                                   latitude=_typed(r.get("latitude"), float, "regions.latitude", optional=True),
+                                   longitude=_typed(r.get("longitude"), float, "regions.longitude", optional=True))
+            for r in _typed(data.get("regions", []), list, "regions")
+        ],
+        "pricing": [
+            CostModel.model_construct(item_name=_typed(p["item_name"], str, "pricing.item_name"),
+                                      unit_cost=_typed(p["unit_cost"], float, "pricing.unit_cost"),
+                                      currency=_typed(p["currency"], str, "pricing.currency"),
+                                      bulk_discount_available=_typed(p.get("bulk_discount_available", False), bool, "pricing.bulk_discount_available"),
+                                      tiers=[PriceTier.model_construct(min_quantity=_typed(t["min_quantity"], int, "pricing.tiers.min_quantity"),
+                                                                       unit_cost=_typed(t["unit_cost"], float, "pricing.tiers.unit_cost"))
+                                             for t in sorted(_typed(p.get("tiers", []), list, "pricing.tiers"), key=lambda t: t["min_quantity"])])
+            for p in _typed(data.get("pricing", []), list, "pricing")
+        ],
+        "ratings": [
+            PerformanceRating.model_construct(
+                period_start=date.fromisoformat(_typed(r["period_start"], str, "ratings.period_start")),
+                period_end=date.fromisoformat(_typed(r["period_end"], str, "ratings.period_end")),
+                quality_score=_typed(r["quality_score"], float, "ratings.quality_score"),
+                timeliness_score=_typed(r["timeliness_score"], float, "ratings.timeliness_score"),
+                communication_score=_typed(r["communication_score"], float, "ratings.communication_score"),
+                reviewer_comments=_typed(r.get("reviewer_comments"), str, "ratings.reviewer_comments", optional=True)
+            )
+            for r in _typed(data.get("ratings", []), list, "ratings")
+        ],
+        "overall_score": _typed(data.get("overall_score"), float, "overall_score", optional=True),
+        "risk_level": _typed(data.get("risk_level"), str, "risk_level", optional=True),
+    }
+    if data.get("id"):
+        fields["id"] = UUID(_typed(data["id"], str, "id"))
+    return Supplier.model_construct(**fields)
+
+
+def validate_chunk(records: List[Record], trusted: bool = False) -> Tuple[List[Supplier], List[RowError]]:
+    suppliers = []
+    errors = []
+    for line_no, data in records:
+        if isinstance(data, str):
+            errors.append(RowError(line=line_no, error=data))
+            continue
+        try:
+            if trusted:
+                suppliers.append(construct_trusted(data))
+            else:
+                suppliers.append(Supplier.model_validate(data))
+        except ValidationError as e:
+            errors.append(RowError(line=line_no, error=str(e)))
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append(RowError(line=line_no, error=f"{type(e).__name__}: {e}"))
+    return suppliers, errors
+
+
+def _chunks(records: Iterable[Record], chunk_size: int) -> Iterator[List[Record]]:
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_records(records: Iterable[Record], store: SupplierStore, trusted: bool = False, workers: int = 0,
+                   chunk_size: int = 1000, max_errors: int = 1000) -> ImportReport:
+    # Streams records into the store chunk by chunk. With workers > 1 chunks are
+    # validated in a process pool, with at most two chunks per worker in flight
+    # so memory stays bounded however large the input is.
+    report = ImportReport()
+
+    def apply(suppliers: List[Supplier], errors: List[RowError]):
+        if suppliers:
+            report.imported += store.upsert_many(suppliers)
+        report.failed += len(errors)
+        room = max_errors - len(report.errors)
+        if room > 0:
+            report.errors.extend(errors[:room])
+
+    if workers <= 1:
+        for chunk in _chunks(records, chunk_size):
+            apply(*validate_chunk(chunk, trusted))
+        return report
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        in_flight = deque()
+        for chunk in _chunks(records, chunk_size):
+            in_flight.append(pool.submit(validate_chunk, chunk, trusted))
+            if len(in_flight) >= 2 * workers:
+                apply(*in_flight.popleft().result())
+        while in_flight:
+            apply(*in_flight.popleft().result())
+    return report
+
+
+def import_file(path: str, fmt: str, store: SupplierStore, **kwargs) -> ImportReport:
+    with open(path, newline="", encoding="utf-8") as f:
+        return import_records(read_records(f, fmt), store, **kwargs)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import suppliers from NDJSON or CSV into the supplier store")
+    parser.add_argument("path", help="File to import")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (default: from file extension)")
+    parser.add_argument("--db", default="suppliers.db", help="SQLite database to import into")
+    parser.add_argument("--workers", type=int, default=0, help="Validation worker processes (0 validates inline)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows validated per chunk")
+    parser.add_argument("--trusted", action="store_true", help="Skip validation for data we exported ourselves")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    store = SupplierStore(args.db)
+    try:
+        report = import_file(args.path, fmt, store, trusted=args.trusted, workers=args.workers, chunk_size=args.chunk_size)
+    finally:
+        store.close()
+
+    print(report.model_dump_json(indent=2))
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
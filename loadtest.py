@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+from benchmark import percentile
+from importer import import_records
+from store import SupplierStore
+from synthetic import generate_records, query_payload
+
+# End-to-end load test of the HTTP API: request validation, middleware, scoring
+# and response encoding together, as clients see them. Drives main.app in
+# process through httpx's ASGI transport, a server already running at --url,
+# or uvicorns started for the run with --serve.
+
+DEFAULT_MIX = "rank=60,rank_page=15,suppliers=15,supplier=5,index=5"
+# Sent on every request so the CORS middleware does its per-request work
+ORIGIN = "http://loadtest.local"
+
+
+class ProfileResult(BaseModel):
+    profile: str
+    catalog_size: int
+    requests: int
+    errors: int
+    error_rate: float
+    requests_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+# A profile turns (rng, supplier ids) into (method, path, json body)
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+def _rank(rng: random.Random, ids: List[str]) -> Request:
+    # The top of a full ranking, details included
+    return "POST", "/rank?limit=20", query_payload(rng)
+
+
+def _rank_page(rng: random.Random, ids: List[str]) -> Request:
+    # A deeper page of a projected ranking, as a paging table asks for it
+    offset = rng.choice([0, 50, 100, 200])
+    return "POST", f"/rank?limit=50&offset={offset}&fields=supplier_id,supplier_name,fit_score,risk_level,cost_alignment", query_payload(rng)
+
+
+def _suppliers(rng: random.Random, ids: List[str]) -> Request:
+    return "GET", f"/suppliers?limit=50&offset={rng.randrange(max(1, len(ids)))}", None
+
+
+def _supplier(rng: random.Random, ids: List[str]) -> Request:
+    return "GET", f"/suppliers/{rng.choice(ids)}", None
+
+
+def _index(rng: random.Random, ids: List[str]) -> Request:
+    return "GET", "/", None
+
+
+PROFILES: Dict[str, Callable[[random.Random, List[str]], Request]] = {
+    "rank": _rank,
+    "rank_page": _rank_page,
+    "suppliers": _suppliers,
+    "supplier": _supplier,
+    "index": _index,
+}
+
+# Metrics an SLO can bound; requests_per_second is a floor, the rest ceilings
+SLO_METRICS = {"p50_ms", "p95_ms", "p99_ms", "error_rate", "requests_per_second"}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    # "rank=60,suppliers=40" -> relative weight per profile
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in PROFILES:
+            raise ValueError(f"Unknown profile: {name} (expected one of {', '.join(PROFILES)})")
+        mix[name] = float(weight) if weight else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("The mix needs at least one profile with a positive weight")
+    return mix
+
+
+def parse_slo(spec: str) -> Tuple[str, str, float]:
+    # "rank.p95_ms=50" -> ("rank", "p95_ms", 50.0); "all" is the whole mix
+    target, _, limit = spec.partition("=")
+    profile, _, metric = target.partition(".")
+    if profile != "all" and profile not in PROFILES:
+        raise ValueError(f"Unknown profile in SLO: {spec}")
+    if metric not in SLO_METRICS:
+        raise ValueError(f"Unknown metric in SLO: {spec} (expected one of {', '.join(sorted(SLO_METRICS))})")
+    return profile, metric, float(limit)
+
+
+def check_slos(results: List[ProfileResult], slos: List[Tuple[str, str, float]]) -> List[str]:
+    violations = []
+    for result in results:
+        for profile, metric, limit in slos:
+            if profile != result.profile:
+                continue
+            value = getattr(result, metric)
+            failed = value < limit if metric == "requests_per_second" else value > limit
+            if failed:
+                violations.append(f"{result.profile}@{result.catalog_size}: {metric} {value} vs SLO {limit}")
+    return violations
+
+
+def plan_requests(mix: Dict[str, float], ids: List[str], count: int, seed: int) -> List[Tuple[str, Request]]:
+    # Drawn up front so request generation isn't timed and runs are repeatable
+    rng = random.Random(seed)
+    # Nothing to fetch by id in an empty catalog
+    names = [name for name in mix if ids or name != "supplier"]
+    weights = [mix[name] for name in names]
+    plan = []
+    for name in rng.choices(names, weights, k=count):
+        plan.append((name, PROFILES[name](rng, ids)))
+    return plan
+
+
+async def _send(client: httpx.AsyncClient, request: Request) -> Tuple[int, bool]:
+    method, path, body = request
+    start = time.perf_counter_ns()
+    try:
+        response = await client.request(method, path, json=body, headers={"Origin": ORIGIN})
+        failed = response.status_code >= 400
+    except httpx.HTTPError:
+        failed = True
+    return time.perf_counter_ns() - start, failed
+
+
+async def run_plan(client: httpx.AsyncClient, plan: List[Tuple[str, Request]], concurrency: int) -> Tuple[float, List[Tuple[str, int, bool]]]:
+    # Closed loop: each of `concurrency` clients sends its next request as soon
+    # as the previous one completes
+    samples = []
+    pending = iter(plan)
+
+    async def client_loop():
+        for name, request in pending:
+            latency, failed = await _send(client, request)
+            samples.append((name, latency, failed))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return time.perf_counter() - start, samples
+
+
+def summarize(samples: List[Tuple[str, int, bool]], seconds: float, catalog_size: int) -> List[ProfileResult]:
+    groups: Dict[str, List[Tuple[int, bool]]] = {"all": []}
+    for name, latency, failed in samples:
+        groups.setdefault(name, []).append((latency, failed))
+        groups["all"].append((latency, failed))
+
+    results = []
+    for name, group in groups.items():
+        latencies = sorted(latency for latency, _ in group)
+        errors = sum(failed for _, failed in group)
+        results.append(ProfileResult(
+            profile=name, catalog_size=catalog_size, requests=len(group), errors=errors,
+            error_rate=round(errors / len(group), 4) if group else 0.0,
+            requests_per_second=round(len(group) / seconds, 1) if seconds else 0.0,
+            p50_ms=round(percentile(latencies, 0.50), 3),
+            p95_ms=round(percentile(latencies, 0.95), 3),
+            p99_ms=round(percentile(latencies, 0.99), 3),
+        ))
+    return results
+
+
+async def load_catalog(client: httpx.AsyncClient, records: List[Dict[str, Any]]):
+    # Through the bulk import endpoint, so the same path works in process and over the network
+    if not records:
+        return
+    body = "".join(json.dumps(record) + "\n" for record in records)
+    response = await client.post("/suppliers/import", content=body, headers={"Content-Type": "application/x-ndjson"}, timeout=None)
+    response.raise_for_status()
+    report = response.json()
+    if report["failed"]:
+        raise RuntimeError(f"Catalog import failed for {report['failed']} records")
+
+
+async def supplier_ids(client: httpx.AsyncClient, limit: int = 1000) -> List[str]:
+    response = await client.get(f"/suppliers?limit={limit}&fields=supplier_id")
+    response.raise_for_status()
+    return [row["supplier_id"] for row in response.json()]
+
+
+async def run_size(client: httpx.AsyncClient, catalog_size: int, mix: Dict[str, float], requests: int = 1000,
+                   concurrency: int = 16, warmup: int = 50, seed: int = 0) -> List[ProfileResult]:
+    # One measured run against the catalog the server holds now
+    ids = await supplier_ids(client)
+    await run_plan(client, plan_requests(mix, ids, warmup, seed + 1), concurrency)
+    seconds, samples = await run_plan(client, plan_requests(mix, ids, requests, seed + 2), concurrency)
+    return summarize(samples, seconds, catalog_size)
+
+
+async def run_load(client: httpx.AsyncClient, sizes: List[int], mix: Dict[str, float], requests: int = 1000,
+                   concurrency: int = 16, warmup: int = 50, seed: int = 0) -> List[ProfileResult]:
+    # Sizes run smallest first; each step imports only the suppliers the previous
+    # one lacked, since the seeded catalog of n suppliers is a prefix of larger ones.
+    # The import reaches one process, so the server must run a single worker.
+    sizes = sorted(sizes)
+    records = list(generate_records(sizes[-1], seed)) if sizes else []
+    loaded = 0
+    results = []
+    for size in sizes:
+        await load_catalog(client, records[loaded:size])
+        loaded = size
+        results.extend(await run_size(client, size, mix, requests, concurrency, warmup, seed))
+    return results
+
+
+def write_catalog_db(records: List[Dict[str, Any]], path: str):
+    # A SQLite catalog every server worker loads at startup, validated as the import endpoint does
+    store = SupplierStore(path)
+    try:
+        report = import_records(enumerate(records, start=1), store)
+    finally:
+        store.close()
+    if report.failed:
+        raise RuntimeError(f"Catalog import failed for {report.failed} records")
+
+
+def in_process_client() -> httpx.AsyncClient:
+    from main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=None)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, db_path: Optional[str] = None, timeout: float = 30.0) -> Tuple[subprocess.Popen, str]:
+    # A uvicorn serving main:app on a free local port, with the environment of this
+    # process and, if given, every worker opening the catalog at db_path
+    port = _free_port()
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    env = dict(os.environ, SUPPLIER_DB_PATH=db_path) if db_path else None
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            httpx.get(url + "/metrics", timeout=1.0)
+            return server, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"uvicorn did not start within {timeout}s")
+
+
+def _client(args, url: Optional[str]) -> httpx.AsyncClient:
+    if url is None:
+        return in_process_client()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    return httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout)
+
+
+async def _run(args, url: Optional[str]) -> List[ProfileResult]:
+    async with _client(args, url) as client:
+        return await run_load(client, args.sizes, parse_mix(args.mix), args.requests, args.concurrency, args.warmup, args.seed)
+
+
+async def _run_size(args, url: str, size: int) -> List[ProfileResult]:
+    async with _client(args, url) as client:
+        return await run_size(client, size, parse_mix(args.mix), args.requests, args.concurrency, args.warmup, args.seed)
+
+
+def serve_load(args) -> List[ProfileResult]:
+    # Each size gets its own uvicorn over a catalog written before it starts, so
+    # every worker loads the same suppliers
+    sizes = sorted(args.sizes)
+    records = list(generate_records(sizes[-1], args.seed)) if sizes else []
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            db_path = os.path.join(tmp, f"catalog-{size}.db")
+            write_catalog_db(records[:size], db_path)
+            server, url = start_server(args.server_workers, db_path)
+            try:
+                results.extend(asyncio.run(_run_size(args, url, size)))
+            finally:
+                server.terminate()
+                server.wait()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the supplier API end to end and check latency SLOs")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of a running single-worker server (imports the synthetic catalog "
+                                      "through one request, which only one worker would see)")
+    target.add_argument("--serve", action="store_true",
+                        help="Start a local uvicorn per catalog size, every worker loading the catalog from a SQLite "
+                             "SUPPLIER_DB_PATH written beforehand")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn workers with --serve")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000], help="Synthetic catalog sizes, run smallest first")
+    parser.add_argument("--requests", type=int, default=1000, help="Measured requests per catalog size")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests before each run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted request profiles ({', '.join(PROFILES)})")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds over the network")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--slo", action="append", default=[], metavar="PROFILE.METRIC=LIMIT",
+                        help="e.g. rank.p95_ms=50, all.error_rate=0.001, all.requests_per_second=200 (repeatable)")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        slos = [parse_slo(spec) for spec in args.slo]
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.serve:
+        results = serve_load(args)
+    else:
+        results = asyncio.run(_run(args, args.url))
+
+    for r in results:
+        print(f"{r.profile:>10} n={r.catalog_size:<8} {r.requests:>7} req {r.requests_per_second:>9.1f} req/s  "
+              f"p50={r.p50_ms:.3f}ms p95={r.p95_ms:.3f}ms p99={r.p99_ms:.3f}ms  errors={r.error_rate:.2%}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([r.model_dump() for r in results], f, indent=2)
+
+    violations = check_slos(results, slos)
+    for violation in violations:
+        print(f"SLO VIOLATION {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
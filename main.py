@@ -1,13 +1,36 @@
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from contextlib import contextmanager
 from datetime import date
+from uuid import UUID
+import asyncio
+import atexit
+import json
 import os
+import tempfile
 
-from models import Supplier, Capability, Region, CostModel, PerformanceRating, ContactInfo
-from scoring import EvaluationCriteria
-from ranking import rank_suppliers
+from models import Supplier, Capability, Region, CostModel, PriceTier, PerformanceRating, ContactInfo, GeoPoint, PerformancePolicy, set_performance_policy, performance_policy_version
+from scoring import EvaluationCriteria, ScoringWeights, DEFAULT_WEIGHTS
+from ranking import rank_suppliers, rank_catalog, rank_batch, rank_sensitivity, rank_pareto, build_result_row, encode_rows, RESULT_FIELDS
+from store import SupplierStore
+from supplier_index import SupplierIndex
+from cache import QueryCache
+from fx import FxRates
+import metrics
+from importer import FORMATS, ImportReport, import_file
+from subscriptions import SavedQueries
+
+try:
+    from vector_scoring import ScoringEngine
+    from sharding import ShardedRanker
+    from snapshot import SnapshotCatalog, StaleSnapshotError
+except ImportError:  # numpy not installed; fall back to per-supplier scoring
+    ScoringEngine = ShardedRanker = SnapshotCatalog = None
+    StaleSnapshotError = ValueError
 
 app = FastAPI(title="Supplier Evaluation API")
 
@@ -25,13 +48,34 @@ app.add_middleware(
 async def read_index():
     return FileResponse(os.path.join(os.path.dirname(__file__), "index.html"))
 
+# Default similarity (0-1) for matching component_type to service and item names, e.g. 0.6;
+# see terms.py. Unset, names must match exactly unless a query sends match_threshold.
+SERVICE_MATCH_THRESHOLD = float(os.environ["SERVICE_MATCH_THRESHOLD"]) if os.environ.get("SERVICE_MATCH_THRESHOLD") else None
+
 class SupplierQuery(BaseModel):
     component_type: str = Field(..., description="Type of component required, e.g., 'Widget'")
-    volume: int = Field(..., gt=0, description="Required volume (for potential bulk discount logic)")
+    volume: int = Field(..., gt=0, description="Required volume, used to pick the supplier's price tier")
     region_country: str = Field(..., description="Target country")
     region_state: Optional[str] = Field(None, description="Target state/province")
     target_cost: float = Field(..., gt=0, description="Target unit cost")
     currency: str = Field("USD", min_length=3, max_length=3, description="Currency code")
+    delivery_latitude: Optional[float] = Field(None, ge=-90, le=90, description="Delivery point latitude, matched against service radii")
+    delivery_longitude: Optional[float] = Field(None, ge=-180, le=180, description="Delivery point longitude")
+    weights: ScoringWeights = Field(DEFAULT_WEIGHTS, description="Fit score weights; 40/30/20/10 when omitted")
+    cost_tolerance: float = Field(0.10, ge=0, description="Fraction above target_cost still counted as a Medium cost match")
+    match_threshold: Optional[float] = Field(SERVICE_MATCH_THRESHOLD, gt=0, le=1,
+                                             description="Minimum similarity of service/item names to component_type, e.g. 0.6; 1 for normalized equality, null (the default) for exact strings")
+
+    @model_validator(mode="after")
+    def delivery_point_complete(self):
+        if (self.delivery_latitude is None) != (self.delivery_longitude is None):
+            raise ValueError("delivery_latitude and delivery_longitude must be given together")
+        return self
+
+    def delivery_location(self) -> Optional[GeoPoint]:
+        if self.delivery_latitude is None:
+            return None
+        return GeoPoint(latitude=self.delivery_latitude, longitude=self.delivery_longitude)
 
 def get_mock_suppliers() -> List[Supplier]:
     # Generate some mock data
@@ -40,7 +84,8 @@ def get_mock_suppliers() -> List[Supplier]:
         contact_info=ContactInfo(email="sales@globalmfg.com"),
         capabilities=[Capability(category="Manufacturing", services=["Widget", "Gadget"])],
         regions=[Region(country="China"), Region(country="Vietnam"), Region(country="India")],
-        pricing=[CostModel(item_name="Widget", unit_cost=5.0, currency="USD", bulk_discount_available=True)],
+        pricing=[CostModel(item_name="Widget", unit_cost=5.0, currency="USD", bulk_discount_available=True,
+                           tiers=[PriceTier(min_quantity=1000, unit_cost=4.5), PriceTier(min_quantity=5000, unit_cost=4.0)])],
         ratings=[PerformanceRating(period_start=date(2023,1,1), period_end=date(2023,12,31), quality_score=8.5, timeliness_score=8.0, communication_score=7.5)],
         overall_score=8.0
     )
@@ -49,7 +94,7 @@ def get_mock_suppliers() -> List[Supplier]:
         name="Local Precision Inc",
         contact_info=ContactInfo(email="info@localprecision.com"),
         capabilities=[Capability(category="Manufacturing", services=["Widget"])],
-        regions=[Region(country="USA", state_province="CA")],
+        regions=[Region(country="USA", state_province="CA", latitude=34.05, longitude=-118.24, service_radius_km=250.0)],
         pricing=[CostModel(item_name="Widget", unit_cost=8.0, currency="USD", bulk_discount_available=False)],
         ratings=[PerformanceRating(period_start=date(2023,1,1), period_end=date(2023,12,31), quality_score=9.5, timeliness_score=9.5, communication_score=9.0)],
         overall_score=9.33
@@ -67,10 +112,145 @@ def get_mock_suppliers() -> List[Supplier]:
     
     return [s1, s2, s3]
 
-@app.post("/rank")
-def rank_suppliers_endpoint(query: SupplierQuery):
-    suppliers = get_mock_suppliers()
-    
+# Optional recency weighting of performance ratings, e.g. PERFORMANCE_WINDOW_MONTHS=24
+# and PERFORMANCE_HALF_LIFE_MONTHS=12; unset, every rating counts equally
+set_performance_policy(PerformancePolicy(
+    window_months=int(os.environ["PERFORMANCE_WINDOW_MONTHS"]) if os.environ.get("PERFORMANCE_WINDOW_MONTHS") else None,
+    half_life_months=float(os.environ["PERFORMANCE_HALF_LIFE_MONTHS"]) if os.environ.get("PERFORMANCE_HALF_LIFE_MONTHS") else None,
+))
+
+# Exchange rates for pricing quotes in other currencies; edit the file or PUT /fx/rates
+_fx_path = os.environ.get("FX_RATES_PATH", os.path.join(os.path.dirname(__file__), "fx_rates.json"))
+fx_rates = FxRates.load(_fx_path) if os.path.exists(_fx_path) else FxRates({}, path=_fx_path)
+
+# CATALOG_SNAPSHOT_PATH serves the catalog from a snapshot written by `python snapshot.py`,
+# mapped read-only and shared by every worker; re-exporting swaps it in without a restart.
+# Rankings and supplier reads then follow the snapshot, and the worker doesn't load
+# the database: writes and saved queries go to a process running without a snapshot.
+_snapshot_path = os.environ.get("CATALOG_SNAPSHOT_PATH")
+snapshot = None
+if _snapshot_path and SnapshotCatalog is not None:
+    snapshot = SnapshotCatalog(_snapshot_path, fx_rates, check_interval=float(os.environ.get("CATALOG_SNAPSHOT_CHECK_SECONDS", 1.0)))
+
+# Loaded once at startup and kept warm; set SUPPLIER_DB_PATH to persist to a file.
+# Left empty under a snapshot.
+store = SupplierStore(os.environ.get("SUPPLIER_DB_PATH", ":memory:") if snapshot is None else ":memory:")
+if len(store) == 0 and snapshot is None:
+    store.add_many(get_mock_suppliers())
+
+# Kept current by the store on every write
+index = SupplierIndex()
+store.add_listener(index)
+
+engine = ScoringEngine(fx_rates) if ScoringEngine is not None and snapshot is None else None
+if engine is not None:
+    store.add_listener(engine)
+
+# RANK_SHARDS > 1 scores /rank across that many persistent worker processes (0 disables)
+RANK_SHARDS = int(os.environ.get("RANK_SHARDS", 0))
+ranker = None
+if RANK_SHARDS > 1 and ShardedRanker is not None and snapshot is None:
+    ranker = ShardedRanker(RANK_SHARDS, fx_rates)
+    store.add_listener(ranker)
+    atexit.register(ranker.close)
+
+def scoring_engine():
+    # The engine /rank scores with, if any: the mapped snapshot or the in-process columns
+    return snapshot_engine() if snapshot is not None else engine
+
+def snapshot_engine():
+    try:
+        return snapshot.engine()
+    except StaleSnapshotError as e:
+        raise HTTPException(status_code=503, detail=f"Catalog snapshot is out of date: {e}")
+
+def live_store() -> SupplierStore:
+    # The store, for writes and saved queries; snapshot workers don't load it
+    if snapshot is not None:
+        raise HTTPException(status_code=503, detail="This worker serves a read-only catalog snapshot")
+    return store
+
+def catalog_version():
+    # Cached rankings go stale when suppliers, exchange rates, the snapshot or the
+    # performance policy (including a rolling window's month) change
+    return (store.version, fx_rates.version, snapshot.version if snapshot is not None else None, performance_policy_version())
+
+# Encoded /rank responses, invalidated whenever the catalog version moves
+rank_cache = QueryCache(
+    max_bytes=int(os.environ.get("RANK_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    ttl_seconds=float(os.environ.get("RANK_CACHE_TTL_SECONDS", 300)),
+)
+
+for _name in ("hits", "misses", "evictions", "expirations", "invalidations"):
+    metrics.REGISTRY.callback(f"rank_cache_{_name}_total", f"/rank result cache {_name}", "counter",
+                              lambda _name=_name: getattr(rank_cache, _name))
+metrics.REGISTRY.callback("rank_cache_bytes", "Bytes held by the /rank result cache", "gauge", lambda: rank_cache.current_bytes)
+metrics.REGISTRY.callback("catalog_suppliers", "Suppliers in the catalog", "gauge",
+                          lambda: len(snapshot) if snapshot is not None else len(store))
+if snapshot is not None:
+    metrics.REGISTRY.callback("catalog_snapshot_swaps_total", "Catalog snapshots swapped in since startup", "counter", lambda: snapshot.swaps)
+
+# Requests slower than SLOW_REQUEST_THRESHOLD_MS get their stacks sampled (unset disables)
+_slow_ms = os.environ.get("SLOW_REQUEST_THRESHOLD_MS")
+profiler = metrics.SlowRequestProfiler(threshold=float(_slow_ms) / 1000) if _slow_ms else None
+
+@contextmanager
+def profiled(endpoint: str):
+    # Must wrap the thread doing the work; the profiler samples that thread's stack
+    if profiler is None:
+        yield
+    else:
+        with profiler.track(endpoint):
+            yield
+
+@contextmanager
+def instrument(endpoint: str):
+    with metrics.REQUEST_SECONDS.time((endpoint,)):
+        with profiled(endpoint):
+            yield
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    # Comma-separated projection of result keys; None means every key
+    if fields is None:
+        return None
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in RESULT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+def rank_cache_key(query: SupplierQuery, limit: Optional[int], offset: int, fields: Optional[List[str]], reverse: bool = False):
+    # Only the inputs that affect the response; a missing and an empty state are equivalent
+    return (
+        query.component_type,
+        query.region_country,
+        query.region_state or None,
+        float(query.target_cost),
+        query.currency,
+        query.volume,
+        query.delivery_latitude,
+        query.delivery_longitude,
+        query.weights.as_tuple(),
+        float(query.cost_tolerance),
+        query.match_threshold,
+        limit,
+        offset,
+        None if fields is None else tuple(f for f in RESULT_FIELDS if f in fields),
+        reverse,
+    )
+
+def ranked_count() -> int:
+    # Suppliers a ranking covers: the snapshot's when ranking from one, else the store's
+    current = scoring_engine()
+    return len(current) if current is not None else len(store)
+
+def mirrored_page(total: int, limit: Optional[int], offset: int):
+    # (limit, offset) of the best-first slice that, reversed, is this page of the worst-first ranking
+    stop = max(0, total - offset)
+    start = 0 if limit is None else max(0, stop - limit)
+    return stop - start, start
+
+def query_to_criteria(query: SupplierQuery) -> EvaluationCriteria:
     # Map API query to internal criteria
     # Note: We assume 'component_type' implies the required service capability for now
     criteria = EvaluationCriteria(
@@ -78,30 +258,390 @@ def rank_suppliers_endpoint(query: SupplierQuery):
         target_region=Region(country=query.region_country, state_province=query.region_state),
         target_price=query.target_cost,
         target_currency=query.currency,
-        required_item=query.component_type # Assuming item name matches component type for simplicity
+        required_item=query.component_type, # Assuming item name matches component type for simplicity
+        volume=query.volume,
+        delivery_location=query.delivery_location(),
+        weights=query.weights,
+        cost_tolerance=query.cost_tolerance
     )
-    
-    ranked_results = rank_suppliers(suppliers, criteria)
-    
-    return ranked_results
+    # Resolve component_type to the catalog's matching service and item names
+    if query.match_threshold is not None:
+        terms = snapshot_engine() if snapshot is not None else index
+        criteria = terms.resolve_terms(criteria, query.match_threshold)
+    return criteria
+
+def encode_results(results) -> bytes:
+    return JSONResponse(content=jsonable_encoder(results)).body
+
+def encode_ranked(rows) -> bytes:
+    # Rows ranked with raw_details=True: each supplier's details JSON is cached and spliced in
+    return encode_rows(rows)
+
+def rank_payload(query: SupplierQuery, limit: Optional[int], offset: int, selected_fields: Optional[List[str]],
+                 reverse: bool = False) -> bytes:
+    # Ranks and encodes in the calling thread: the in-process engine, or the index-pruned object path
+    with profiled("/rank"):
+        criteria = query_to_criteria(query)
+        current = scoring_engine()
+        if current is not None:
+            ranked_results = rank_catalog(current, criteria, limit=limit, offset=offset, fields=selected_fields, raw_details=True)
+        else:
+            with metrics.stage("load"):
+                suppliers = store.records()
+            ranked_results = rank_suppliers(suppliers, criteria, index=index, limit=limit, offset=offset, fields=selected_fields,
+                                            fx_rates=fx_rates, raw_details=True)
+
+        with metrics.stage("encoding"):
+            return encode_ranked(ranked_results[::-1] if reverse else ranked_results)
+
+def encode_timed(results) -> bytes:
+    with metrics.stage("encoding"):
+        return encode_ranked(results)
+
+@app.post("/rank")
+async def rank_suppliers_endpoint(
+    request: Request,
+    query: SupplierQuery,
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of results to return"),
+    offset: int = Query(0, ge=0, description="Number of top results to skip"),
+    fields: Optional[str] = Query(None, description="Comma-separated result fields to include"),
+    sort: str = Query("-fit_score", pattern="^-?fit_score$", description="-fit_score for best first, fit_score for worst first"),
+):
+    # Async so scoring never runs on the event loop: it goes to the shard pool
+    # when RANK_SHARDS is set, otherwise to the thread pool
+    with metrics.REQUEST_SECONDS.time(("/rank",)):
+        selected_fields = parse_fields(fields)
+        total = ranked_count()
+        headers = {"X-Total-Count": str(total)}
+
+        # Worst-first pages are the matching best-first slices, reversed
+        reverse = sort == "fit_score"
+        if reverse:
+            limit, offset = mirrored_page(total, limit, offset)
+
+        # Read the version before scoring so a concurrent write can't be cached as current
+        version = catalog_version()
+        key = rank_cache_key(query, limit, offset, selected_fields, reverse)
+        with metrics.stage("cache_lookup"):
+            payload = rank_cache.get(key, version)
+
+        if payload is None:
+            if limit == 0:
+                # Paged past the end of a worst-first ranking
+                payload = b"[]"
+            elif ranker is not None:
+                ranked_results = await ranker.rank(query_to_criteria(query), limit=limit, offset=offset,
+                                                   fields=selected_fields, is_disconnected=request.is_disconnected,
+                                                   raw_details=True)
+                if ranked_results is None:
+                    # Client went away; nobody is left to read a response
+                    metrics.RANK_CANCELLED.inc()
+                    return Response(status_code=499)
+                payload = await run_in_threadpool(encode_timed, ranked_results[::-1] if reverse else ranked_results)
+            else:
+                payload = await run_in_threadpool(rank_payload, query, limit, offset, selected_fields, reverse)
+            rank_cache.put(key, version, payload)
+
+        metrics.RESPONSE_BYTES.observe(len(payload), ("/rank",))
+        return Response(content=payload, media_type="application/json", headers=headers)
+
+class BatchRankRequest(BaseModel):
+    queries: List[SupplierQuery] = Field(..., min_length=1, description="Queries to rank, e.g. one per bill-of-materials line")
+
+@app.post("/rank/batch")
+def rank_batch_endpoint(
+    batch: BatchRankRequest,
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of results to return per query"),
+    offset: int = Query(0, ge=0, description="Number of top results to skip per query"),
+    fields: Optional[str] = Query(None, description="Comma-separated result fields to include"),
+):
+    with instrument("/rank/batch"):
+        selected_fields = parse_fields(fields)
+        version = catalog_version()
+
+        # Answer what we can from the /rank cache and score the rest together
+        keys = [rank_cache_key(q, limit, offset, selected_fields) for q in batch.queries]
+        with metrics.stage("cache_lookup"):
+            payloads = [rank_cache.get(key, version) for key in keys]
+        pending = [i for i, payload in enumerate(payloads) if payload is None]
+        criteria_list = [query_to_criteria(batch.queries[i]) for i in pending]
+
+        current = scoring_engine()
+        if current is not None:
+            ranked = rank_batch(current, criteria_list, limit=limit, offset=offset, fields=selected_fields, raw_details=True)
+        else:
+            with metrics.stage("load"):
+                suppliers = store.records()
+            ranked = [rank_suppliers(suppliers, c, index=index, limit=limit, offset=offset, fields=selected_fields,
+                                     fx_rates=fx_rates, raw_details=True) for c in criteria_list]
+
+        with metrics.stage("encoding"):
+            for i, ranked_results in zip(pending, ranked):
+                payloads[i] = encode_ranked(ranked_results)
+                rank_cache.put(keys[i], version, payloads[i])
+
+            # One JSON array per query, in request order
+            body = b"[" + b",".join(payloads) + b"]"
+
+        metrics.RESPONSE_BYTES.observe(len(body), ("/rank/batch",))
+        return Response(content=body, media_type="application/json", headers={"X-Total-Count": str(ranked_count())})
+
+class SensitivityRequest(BaseModel):
+    query: SupplierQuery
+    weights: List[ScoringWeights] = Field(..., min_length=1, max_length=1000, description="Alternative weight vectors to compare against query.weights")
+
+@app.post("/rank/sensitivity")
+def rank_sensitivity_endpoint(
+    request: SensitivityRequest,
+    limit: int = Query(10, ge=1, description="Suppliers to return per ranking"),
+):
+    with instrument("/rank/sensitivity"):
+        current = scoring_engine()
+        if current is None:
+            raise HTTPException(status_code=501, detail="Sensitivity analysis needs the vectorized scoring engine (numpy)")
+        result = rank_sensitivity(current, query_to_criteria(request.query), request.weights, limit=limit)
+        with metrics.stage("encoding"):
+            body = encode_results(result)
+        metrics.RESPONSE_BYTES.observe(len(body), ("/rank/sensitivity",))
+        return Response(content=body, media_type="application/json", headers={"X-Total-Count": str(ranked_count())})
+
+@app.post("/rank/pareto")
+def rank_pareto_endpoint(
+    query: SupplierQuery,
+    layers: int = Query(1, ge=1, le=100, description="Skyline layers to return; 1 is the Pareto frontier"),
+    fields: Optional[str] = Query(None, description="Comma-separated result fields to include"),
+):
+    # Trade-offs a single fit score hides: suppliers no other beats on unit cost,
+    # overall score and risk at once, among those pricing the component
+    with instrument("/rank/pareto"):
+        selected_fields = parse_fields(fields)
+        current = scoring_engine()
+        if current is None:
+            raise HTTPException(status_code=501, detail="Pareto ranking needs the vectorized scoring engine (numpy)")
+        ranked_results = rank_pareto(current, query_to_criteria(query), layers=layers, fields=selected_fields, raw_details=True)
+        with metrics.stage("encoding"):
+            body = encode_ranked(ranked_results)
+        metrics.RESPONSE_BYTES.observe(len(body), ("/rank/pareto",))
+        return Response(content=body, media_type="application/json", headers={"X-Total-Count": str(ranked_count())})
+
+# Standing queries whose top rows are kept current by every catalog write and
+# pushed to subscribers, instead of being polled from /rank. They follow this
+# process's store (not a catalog snapshot) and last until deleted or restarted.
+saved_queries = SavedQueries(store.record, query_to_criteria, engine=engine, fx_rates=fx_rates,
+                             vocabulary=lambda: index.vocabulary_version)
+# Registered after the index and engine, so it sees their updated state
+store.add_listener(saved_queries)
+metrics.REGISTRY.callback("saved_queries", "Saved queries with materialized rankings", "gauge", lambda: len(saved_queries))
+
+# Events buffered per subscriber; one that falls further behind is sent a fresh snapshot
+SAVED_QUERY_BUFFER = int(os.environ.get("SAVED_QUERY_BUFFER", 256))
+SAVED_QUERY_HEARTBEAT_SECONDS = float(os.environ.get("SAVED_QUERY_HEARTBEAT_SECONDS", 15))
+
+class SavedQueryRequest(BaseModel):
+    query: SupplierQuery
+    limit: int = Field(20, ge=1, le=1000, description="Top rows to keep subscribers updated on")
+
+@app.post("/queries", status_code=201)
+def create_saved_query(request: SavedQueryRequest):
+    # Ranks the whole catalog once; later writes only move the changed supplier
+    live_store()
+    with instrument("/queries"):
+        return saved_queries.add(request.query, request.limit)
+
+@app.get("/queries")
+def list_saved_queries():
+    return saved_queries.ids()
+
+@app.get("/queries/{query_id}")
+def get_saved_query(query_id: str):
+    live_store()
+    try:
+        return saved_queries.snapshot(query_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Saved query not found")
+
+@app.delete("/queries/{query_id}", status_code=204)
+def delete_saved_query(query_id: str):
+    if not saved_queries.remove(query_id):
+        raise HTTPException(status_code=404, detail="Saved query not found")
+
+def sse_event(event: dict) -> bytes:
+    return f"event: {event['type']}\nid: {event['sequence']}\ndata: {json.dumps(event)}\n\n".encode()
+
+@app.get("/queries/{query_id}/events")
+async def saved_query_events(query_id: str, request: Request):
+    # Server-Sent Events: the current snapshot, then a delta whenever a write
+    # changes the query's top rows. Each delta lists the rows whose rank or
+    # content changed and the ids that left the window; `sequence` increases
+    # by one per event, and a new snapshot replaces everything before it.
+    live_store()
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SAVED_QUERY_BUFFER)
+
+    def offer(event):
+        if queue.full():
+            # Too far behind: drop the backlog and resend a snapshot instead
+            while not queue.empty():
+                queue.get_nowait()
+            event = None
+        queue.put_nowait(event)
+
+    def push(event):
+        # Called in the writing thread
+        loop.call_soon_threadsafe(offer, event)
+
+    if query_id not in saved_queries:
+        raise HTTPException(status_code=404, detail="Saved query not found")
+
+    async def events():
+        # Subscribed only once the response is streamed, so the finally below
+        # runs for every subscription, however the stream ends
+        try:
+            try:
+                first = saved_queries.subscribe(query_id, push)
+            except KeyError:
+                yield sse_event({"type": "deleted", "query_id": query_id, "sequence": 0})
+                return
+            yield sse_event(first)
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SAVED_QUERY_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield b": keep-alive\n\n"
+                    continue
+                if event is None:
+                    try:
+                        event = saved_queries.snapshot(query_id)
+                    except KeyError:
+                        event = {"type": "deleted", "query_id": query_id, "sequence": first["sequence"]}
+                yield sse_event(event)
+                if event["type"] == "deleted":
+                    return
+        finally:
+            saved_queries.unsubscribe(query_id, push)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/fx/rates")
+def get_fx_rates():
+    return fx_rates.as_dict()
+
+class FxRatesUpdate(BaseModel):
+    rates: Dict[str, Optional[float]] = Field(..., description="Units of the base currency per unit of each currency; null removes one")
+
+@app.put("/fx/rates")
+def update_fx_rates(update: FxRatesUpdate):
+    try:
+        changed = fx_rates.update(update.rates)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {**fx_rates.as_dict(), "changed": sorted(changed)}
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/slow")
+def slow_requests():
+    # Most recent sampled profiles of requests over SLOW_REQUEST_THRESHOLD_MS
+    return list(profiler.profiles) if profiler is not None else []
+
+@app.get("/rank/cache")
+def rank_cache_stats():
+    return rank_cache.stats()
 
 @app.get("/suppliers")
-def get_all_suppliers():
-    suppliers = get_mock_suppliers()
+def get_all_suppliers(
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of suppliers to return"),
+    offset: int = Query(0, ge=0, description="Number of suppliers to skip"),
+    fields: Optional[str] = Query(None, description="Comma-separated result fields to include"),
+    sort: Optional[str] = Query(None, pattern="^-?name$", description="name or -name; catalog order when omitted"),
+):
+    selected_fields = parse_fields(fields)
     results = []
+    catalog = snapshot_engine() if snapshot is not None else store
     
-    for s in suppliers:
+    for record in catalog.page(offset, limit, sort):
+        # The store's record, shared with the scoring engine, keeps its serialized details between requests
         # Calculate derived fields if needed
-        s.assess_risk()
-        if s.overall_score is None:
-            s.calculate_overall_score()
+        record.assess_risk()
             
-        results.append({
-            "supplier_name": s.name,
-            "fit_score": 0.0, # Placeholder
-            "risk_level": s.risk_level,
-            "cost_alignment": "N/A", # Placeholder
-            "details": s.model_dump()
-        })
+        # fit_score and cost_alignment are placeholders outside of a ranking query
+        results.append(build_result_row(record, 0.0, record.risk_level, "N/A", selected_fields, raw_details=True))
         
-    return results
+    return Response(content=encode_ranked(results), media_type="application/json", headers={"X-Total-Count": str(len(catalog))})
+
+
+@app.get("/suppliers/stream")
+def stream_suppliers(
+    after: Optional[UUID] = Query(None, description="Cursor: resume after this supplier id"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of suppliers to stream"),
+):
+    # NDJSON export in supplier id order, one stored record per line. The id of
+    # the last line received is the cursor for resuming an interrupted export.
+    catalog = snapshot_engine() if snapshot is not None else store
+
+    def lines():
+        for _, data in catalog.iter_json(after=after, limit=limit):
+            yield data + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+# Validation processes used by /suppliers/import (0 validates in the request thread)
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", 0))
+
+@app.post("/suppliers/import", response_model=ImportReport)
+async def import_suppliers(
+    request: Request,
+    format: str = Query("ndjson", description=f"Body format: {' or '.join(FORMATS)}"),
+):
+    # Always validated: trusted (unvalidated) imports are only offered by the importer CLI
+    live_store()
+    if format not in FORMATS:
+        raise HTTPException(status_code=422, detail=f"Unsupported format: {format}")
+
+    # Spool the body to disk as it arrives, then import it off the event loop
+    with tempfile.NamedTemporaryFile(suffix=f".{format}", delete=False) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+    try:
+        return await run_in_threadpool(import_file, spool.name, format, store, workers=IMPORT_WORKERS)
+    finally:
+        os.unlink(spool.name)
+
+@app.get("/suppliers/{supplier_id}")
+def get_supplier(supplier_id: UUID):
+    if snapshot is not None:
+        # The JSON stored in the snapshot, as exported
+        current = snapshot_engine()
+        row = current.row_of(supplier_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Supplier not found")
+        return Response(content=current.details(row), media_type="application/json")
+    supplier = store.get(supplier_id)
+    if supplier is None:
+        raise HTTPException(status_code=404, detail="Supplier not found")
+    return supplier
+
+@app.post("/suppliers", status_code=201)
+def create_supplier(supplier: Supplier):
+    try:
+        return live_store().add(supplier)
+    except KeyError:
+        raise HTTPException(status_code=409, detail="Supplier already exists")
+
+@app.put("/suppliers/{supplier_id}")
+def update_supplier(supplier_id: UUID, supplier: Supplier):
+    if supplier.id != supplier_id:
+        supplier = supplier.model_copy(update={"id": supplier_id})
+    try:
+        return live_store().update(supplier)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Supplier not found")
+
+@app.delete("/suppliers/{supplier_id}", status_code=204)
+def delete_supplier(supplier_id: UUID):
+    if not live_store().delete(supplier_id):
+        raise HTTPException(status_code=404, detail="Supplier not found")
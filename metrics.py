@@ -0,0 +1,218 @@
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as _Tally, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Minimal Prometheus-compatible metrics: counters, histograms and callback
+# gauges rendered in the text exposition format, with no extra dependency.
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, labels: Tuple[str, ...] = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        i = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            i += 1
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[i] += 1
+            self._sums[labels] += value
+
+    @contextmanager
+    def time(self, labels: Tuple[str, ...] = ()) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, labels)
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels in sorted(self._counts):
+                counts = self._counts[labels]
+                cumulative = 0
+                bounds = [str(b) for b in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, counts):
+                    cumulative += count
+                    label_text = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f"{self.name}_sum{label_text} {self._sums[labels]}")
+                lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    # Value read at scrape time, e.g. counters kept by another component
+    def __init__(self, name: str, help: str, kind: str, func: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.func = func
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", f"{self.name} {self.func()}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, kind: str, func: Callable[[], float]) -> CallbackMetric:
+        return self._register(CallbackMetric(name, help, kind, func))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "ranking_stage_seconds", "Time spent in each stage of the ranking pipeline", ["stage"])
+REQUEST_SECONDS = REGISTRY.histogram(
+    "ranking_request_seconds", "End-to-end handler time of ranking endpoints", ["endpoint"])
+RESPONSE_BYTES = REGISTRY.histogram(
+    "ranking_response_bytes", "Encoded response size of ranking endpoints", ["endpoint"], buckets=SIZE_BUCKETS)
+SUPPLIERS_SCANNED = REGISTRY.counter(
+    "ranking_suppliers_scanned_total", "Suppliers considered by ranking queries")
+SUPPLIERS_SCORED = REGISTRY.counter(
+    "ranking_suppliers_fully_scored_total", "Suppliers that went through full fit scoring")
+SUPPLIERS_RETURNED = REGISTRY.counter(
+    "ranking_suppliers_returned_total", "Ranked rows returned to clients")
+RANK_CANCELLED = REGISTRY.counter(
+    "ranking_requests_cancelled_total", "Sharded /rank requests abandoned because the client disconnected")
+
+
+def stage(name: str):
+    return STAGE_SECONDS.time((name,))
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of requests that run past a threshold.
+
+    A daemon thread wakes every ``interval`` seconds and, only for tracked
+    requests already older than ``threshold``, records the handler thread's
+    current stack. Fast requests are never sampled, so the cost of leaving the
+    profiler on is one dict insert and delete per request.
+    """
+
+    def __init__(self, threshold: float = 0.5, interval: float = 0.01, keep: int = 20, depth: int = 12):
+        self.threshold = threshold
+        self.interval = interval
+        self.depth = depth
+        self.profiles = deque(maxlen=keep)
+        self._active: Dict[int, Tuple[str, float, _Tally]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_running(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self._active:
+                continue
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, (_, start, samples) in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and now - start >= self.threshold:
+                        stack = traceback.extract_stack(frame, limit=self.depth)
+                        samples[" <- ".join(f"{f.name} ({f.filename.rsplit('/', 1)[-1]}:{f.lineno})" for f in reversed(stack))] += 1
+
+    @contextmanager
+    def track(self, name: str) -> Iterator[None]:
+        self._ensure_running()
+        thread_id = threading.get_ident()
+        start = time.perf_counter()
+        samples = _Tally()
+        with self._lock:
+            self._active[thread_id] = (name, start, samples)
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self._active.pop(thread_id, None)
+            if duration >= self.threshold:
+                self.profiles.append({
+                    "name": name,
+                    "duration_seconds": round(duration, 4),
+                    "samples": sum(samples.values()),
+                    "stacks": [{"stack": stack, "count": count} for stack, count in samples.most_common(10)],
+                })
@@ -1,8 +1,9 @@
+from bisect import bisect_left, bisect_right
 from datetime import date
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, PrivateAttr, field_validator
 
 
 class Capability(BaseModel):
@@ -11,10 +12,35 @@ class Capability(BaseModel):
     certifications: List[str] = Field(default_factory=list, description="List of certifications, e.g., ISO 9001")
 
 
+class GeoPoint(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90, description="Latitude in decimal degrees")
+    longitude: float = Field(..., ge=-180, le=180, description="Longitude in decimal degrees")
+
+
 class Region(BaseModel):
     country: str = Field(..., description="Country of operation")
     state_province: Optional[str] = Field(None, description="State or province, if applicable")
     service_radius_km: Optional[float] = Field(None, description="Service radius in kilometers")
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Latitude of the service center")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Longitude of the service center")
+
+    def service_area(self) -> Optional[Tuple[float, float, float]]:
+        # (latitude, longitude, radius_km) when the region serves a radius around a known point
+        if self.latitude is None or self.longitude is None or not self.service_radius_km:
+            return None
+        return self.latitude, self.longitude, self.service_radius_km
+
+
+class PriceTier(BaseModel):
+    min_quantity: int = Field(..., gt=0, description="Smallest order quantity this price applies to")
+    unit_cost: float = Field(..., gt=0, description="Cost per unit from min_quantity upwards")
+
+
+def _fields_equal(self, other: Any) -> Any:
+    # __eq__ for models whose private attributes are only caches
+    if not isinstance(other, BaseModel):
+        return NotImplemented
+    return self.__class__ is other.__class__ and self.__dict__ == other.__dict__
 
 
 class CostModel(BaseModel):
@@ -22,6 +48,32 @@ class CostModel(BaseModel):
     unit_cost: float = Field(..., gt=0, description="Cost per unit")
     currency: str = Field(..., min_length=3, max_length=3, description="Currency code, e.g., USD")
     bulk_discount_available: bool = Field(False, description="Whether bulk discounts are available")
+    tiers: List[PriceTier] = Field(default_factory=list, description="Quantity price breaks; unit_cost applies below the first one")
+
+    @field_validator('tiers')
+    def sort_tiers(cls, v):
+        # Kept sorted by min_quantity so unit_cost_at can binary search
+        v = sorted(v, key=lambda t: t.min_quantity)
+        for prev, tier in zip(v, v[1:]):
+            if tier.min_quantity == prev.min_quantity:
+                raise ValueError(f'duplicate price tier for quantity {tier.min_quantity}')
+        return v
+
+    # min_quantity of each tier, for bisect (its key= argument needs Python 3.10),
+    # and the tiers list they were read from
+    _quantities: Optional[Tuple[list, List[int]]] = PrivateAttr(None)
+    __eq__ = _fields_equal
+
+    def unit_cost_at(self, volume: Optional[int]) -> float:
+        # Price of the highest break at or below volume; no volume means list price
+        tiers = self.tiers
+        if volume is None or not tiers:
+            return self.unit_cost
+        cached = self._quantities
+        if cached is None or cached[0] is not tiers or len(cached[1]) != len(tiers):
+            cached = self._quantities = (tiers, [t.min_quantity for t in tiers])
+        i = bisect_right(cached[1], volume)
+        return tiers[i - 1].unit_cost if i else self.unit_cost
 
 
 class PerformanceRating(BaseModel):
@@ -39,6 +91,184 @@ class PerformanceRating(BaseModel):
         return v
 
 
+def period_average(rating: PerformanceRating) -> float:
+    # Simple average of the three scores for each rating
+    return (rating.quality_score + rating.timeliness_score + rating.communication_score) / 3
+
+
+def month_index(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+class PerformancePolicy(BaseModel):
+    window_months: Optional[int] = Field(None, gt=0, description="Only ratings whose period_end falls in the last N months count")
+    half_life_months: Optional[float] = Field(None, gt=0, description="A rating's weight halves every N months of age")
+    as_of: Optional[date] = Field(None, description="End of the window and reference for age; today when unset")
+
+    def is_uniform(self) -> bool:
+        # Every rating weighs the same: the plain running average applies
+        return self.window_months is None and self.half_life_months is None
+
+
+# Process-wide policy behind every derived overall_score. Scores remember the
+# version they were computed under and are recomputed after a change.
+_performance_policy = PerformancePolicy()
+_policy_version = 0
+# Month a rolling policy (windowed or decayed, as_of unset) was last applied in;
+# None when scores don't depend on today's date
+_policy_month: Optional[int] = None
+
+
+def today() -> date:
+    # The as-of date of rolling policies
+    return date.today()
+
+
+def _rolling(policy: PerformancePolicy) -> bool:
+    return policy.as_of is None and not policy.is_uniform()
+
+
+def get_performance_policy() -> PerformancePolicy:
+    return _performance_policy
+
+
+def set_performance_policy(policy: PerformancePolicy):
+    global _performance_policy, _policy_version, _policy_month
+    _performance_policy = policy
+    _policy_version += 1
+    _policy_month = month_index(today()) if _rolling(policy) else None
+
+
+def performance_policy_version() -> int:
+    # Also moves when the month changes under a rolling policy, since the window
+    # and the ratings' ages move with it
+    global _policy_version, _policy_month
+    if _policy_month is not None:
+        month = month_index(today())
+        if month != _policy_month:
+            _policy_month = month
+            _policy_version += 1
+    return _policy_version
+
+
+def policy_month() -> Optional[int]:
+    # Month (see month_index) a rolling policy currently scores as of; None
+    # when scores don't move with the calendar
+    performance_policy_version()
+    return _policy_month
+
+
+class RatingHistory:
+    """Ratings bucketed by the month of period_end, with decayed prefix sums.
+
+    With weight 2 ** (-age / half_life) the as-of month factors out of the
+    weighted average, so each bucket is stored with weight 2 ** (month / half_life)
+    relative to a reference month. A window is then the difference of two
+    prefix sums found by binary search. Adding or removing a rating only
+    invalidates the prefixes from its bucket onwards, which is O(1) for the
+    common case of appending the latest month.
+    """
+
+    __slots__ = ("months", "sums", "counts", "_prefixes")
+
+    # Largest exponent kept in a prefix before the reference month moves up
+    _MAX_EXPONENT = 900.0
+
+    def __init__(self, ratings=()):
+        self.months: List[int] = []
+        self.sums: List[float] = []
+        self.counts: List[int] = []
+        # half_life -> (reference month, prefix of weighted sums, prefix of weighted counts)
+        self._prefixes: Dict[Optional[float], Tuple[int, List[float], List[float]]] = {}
+        for rating in ratings:
+            self.add(rating)
+
+    def _bucket(self, rating: PerformanceRating) -> int:
+        month = month_index(rating.period_end)
+        i = bisect_left(self.months, month)
+        if i == len(self.months) or self.months[i] != month:
+            self.months.insert(i, month)
+            self.sums.insert(i, 0.0)
+            self.counts.insert(i, 0)
+        return i
+
+    def _invalidate(self, i: int):
+        for _, weighted_sums, weighted_counts in self._prefixes.values():
+            del weighted_sums[i + 1:]
+            del weighted_counts[i + 1:]
+
+    def add(self, rating: PerformanceRating):
+        i = self._bucket(rating)
+        self.sums[i] += period_average(rating)
+        self.counts[i] += 1
+        self._invalidate(i)
+
+    def remove(self, rating: PerformanceRating):
+        i = self._bucket(rating)
+        self.sums[i] -= period_average(rating)
+        self.counts[i] -= 1
+        if self.counts[i] <= 0:
+            del self.months[i], self.sums[i], self.counts[i]
+        self._invalidate(i)
+
+    def _prefix(self, half_life: Optional[float]):
+        cached = self._prefixes.get(half_life)
+        if cached is not None and half_life is not None and self.months:
+            if (self.months[-1] - cached[0]) / half_life > self._MAX_EXPONENT:
+                cached = None
+        if cached is None:
+            reference = self.months[0] if self.months else 0
+            if half_life is not None and self.months:
+                reference = max(reference, int(self.months[-1] - self._MAX_EXPONENT * half_life))
+            cached = self._prefixes[half_life] = (reference, [0.0], [0.0])
+
+        reference, weighted_sums, weighted_counts = cached
+        for i in range(len(weighted_sums) - 1, len(self.months)):
+            weight = 1.0 if half_life is None else 2.0 ** ((self.months[i] - reference) / half_life)
+            weighted_sums.append(weighted_sums[-1] + weight * self.sums[i])
+            weighted_counts.append(weighted_counts[-1] + weight * self.counts[i])
+        return weighted_sums, weighted_counts
+
+    def score(self, policy: PerformancePolicy) -> Optional[float]:
+        as_of = month_index(policy.as_of or today())
+        hi = bisect_right(self.months, as_of)
+        lo = 0 if policy.window_months is None else bisect_left(self.months, as_of - policy.window_months + 1)
+        if lo >= hi:
+            return None
+        weighted_sums, weighted_counts = self._prefix(policy.half_life_months)
+        weight = weighted_counts[hi] - weighted_counts[lo]
+        if weight <= 0:
+            return None
+        return round((weighted_sums[hi] - weighted_sums[lo]) / weight, 2)
+
+
+class TrackedList(list):
+    # A list that counts its in-place changes, so aggregates cached over it can
+    # tell they are stale in O(1)
+
+    version = 0
+
+
+def _tracking(name):
+    method = getattr(list, name)
+
+    def mutate(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    mutate.__name__ = name
+    return mutate
+
+
+for _name in ("__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "extend", "insert",
+              "pop", "remove", "clear", "sort", "reverse"):
+    setattr(TrackedList, _name, _tracking(_name))
+
+
+RISK_ORDER = {"Low": 1, "Medium": 2, "High": 3}
+RISK_BY_ORDER = {1: "Low", 2: "Medium", 3: "High"}
+
+
 class ContactInfo(BaseModel):
     email: EmailStr = Field(..., description="Contact email address")
     phone: Optional[str] = Field(None, description="Contact phone number")
@@ -56,47 +286,156 @@ class Supplier(BaseModel):
     overall_score: Optional[float] = Field(None, description="Calculated overall score")
     risk_level: Optional[str] = Field(None, description="Calculated risk level: Low, Medium, High")
 
+    # Running aggregates behind overall_score and assess_risk(). add_rating /
+    # remove_rating / add_region / remove_region update them in place; assigning
+    # a new list or editing one in place is caught by the list's version counter.
+    _rating_total: float = PrivateAttr(0.0)
+    _rating_count: int = PrivateAttr(0)
+    _ratings_ref: Optional[TrackedList] = PrivateAttr(None)
+    _ratings_version: int = PrivateAttr(0)
+    _history: Optional[RatingHistory] = PrivateAttr(None)
+    # Policy version overall_score was derived under; None when it was given, not derived
+    _policy_version: Optional[int] = PrivateAttr(None)
+    _country_counts: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _regions_ref: Optional[TrackedList] = PrivateAttr(None)
+    _regions_version: int = PrivateAttr(0)
+
+    # Fields only: the private attributes above are caches, and two equal
+    # suppliers may have warmed them differently
+    __eq__ = _fields_equal
+
+    def _tracked(self, field: str) -> TrackedList:
+        # The field's list, swapped for a TrackedList (without revalidating) on first use
+        value = self.__dict__[field]
+        if not isinstance(value, TrackedList):
+            value = self.__dict__[field] = TrackedList(value)
+        return value
+
+    def _sync_ratings(self):
+        ratings = self._tracked("ratings")
+        if self._ratings_ref is ratings and self._ratings_version == ratings.version:
+            return
+        total_score = 0
+        for rating in ratings:
+            total_score += period_average(rating)
+        self._rating_total = total_score
+        self._rating_count = len(ratings)
+        self._ratings_ref = ratings
+        self._ratings_version = ratings.version
+        self._history = None
+
+    def _sync_regions(self):
+        regions = self._tracked("regions")
+        if self._regions_ref is regions and self._regions_version == regions.version:
+            return
+        counts: Dict[str, int] = {}
+        for region in regions:
+            counts[region.country] = counts.get(region.country, 0) + 1
+        self._country_counts = counts
+        self._regions_ref = regions
+        self._regions_version = regions.version
+
+    def _refresh_derived(self):
+        self.overall_score = None
+        self.calculate_overall_score()
+        self.assess_risk()
+
+    def add_rating(self, rating: PerformanceRating):
+        self._sync_ratings()
+        self.ratings.append(rating)
+        self._ratings_version = self.ratings.version
+        self._rating_total += period_average(rating)
+        self._rating_count += 1
+        if self._history is not None:
+            self._history.add(rating)
+        self._refresh_derived()
+
+    def remove_rating(self, rating: PerformanceRating):
+        self._sync_ratings()
+        self.ratings.remove(rating)
+        self._ratings_version = self.ratings.version
+        self._rating_total -= period_average(rating)
+        self._rating_count -= 1
+        if self._history is not None:
+            self._history.remove(rating)
+        self._refresh_derived()
+
+    def add_region(self, region: Region):
+        self._sync_regions()
+        self.regions.append(region)
+        self._regions_version = self.regions.version
+        self._country_counts[region.country] = self._country_counts.get(region.country, 0) + 1
+        self.assess_risk()
+
+    def remove_region(self, region: Region):
+        self._sync_regions()
+        self.regions.remove(region)
+        self._regions_version = self.regions.version
+        remaining = self._country_counts[region.country] - 1
+        if remaining:
+            self._country_counts[region.country] = remaining
+        else:
+            del self._country_counts[region.country]
+        self.assess_risk()
+
+    def country_count(self) -> int:
+        self._sync_regions()
+        return len(self._country_counts)
+
     def calculate_overall_score(self):
-        if not self.ratings:
+        self._sync_ratings()
+        if not self._rating_count:
             return None
-        
-        total_score = 0
-        for rating in self.ratings:
-            # Simple average of the three scores for each rating
-            period_average = (rating.quality_score + rating.timeliness_score + rating.communication_score) / 3
-            total_score += period_average
-        
-        self.overall_score = round(total_score / len(self.ratings), 2)
+
+        policy = get_performance_policy()
+        self._policy_version = performance_policy_version()
+        if policy.is_uniform():
+            self.overall_score = round(self._rating_total / self._rating_count, 2)
+        else:
+            if self._history is None:
+                self._history = RatingHistory(self.ratings)
+            self.overall_score = self._history.score(policy)
         return self.overall_score
 
-    def assess_risk(self):
-        # 1. Performance Risk
-        if self.overall_score is None:
+    def refresh_overall_score(self) -> Optional[float]:
+        # overall_score, recomputed if missing or derived from since-changed ratings or policy
+        if self.overall_score is None or self._ratings_changed() or self._policy_changed():
+            self.overall_score = None
             self.calculate_overall_score()
-        
-        if self.overall_score is None or self.overall_score < 5.0:
-            perf_risk = "High"
-        elif self.overall_score < 8.0:
-            perf_risk = "Medium"
-        else:
-            perf_risk = "Low"
+        return self.overall_score
 
-        # 2. Region Concentration Risk
-        unique_countries = {r.country for r in self.regions}
-        num_countries = len(unique_countries)
+    def _policy_changed(self) -> bool:
+        return self._policy_version is not None and self._policy_version != performance_policy_version()
 
-        if num_countries <= 1:
-            region_risk = "High"
-        elif num_countries == 2:
-            region_risk = "Medium"
-        else:
-            region_risk = "Low"
-
-        # Overall Risk (Max of the two)
-        risk_map = {"Low": 1, "Medium": 2, "High": 3}
-        max_risk_val = max(risk_map[perf_risk], risk_map[region_risk])
-        
-        # Reverse map
-        inv_risk_map = {1: "Low", 2: "Medium", 3: "High"}
-        self.risk_level = inv_risk_map[max_risk_val]
+    def _ratings_changed(self) -> bool:
+        # True when overall_score was derived from ratings that have since been
+        # replaced or edited in place
+        return self._ratings_ref is not None and (
+            self._ratings_ref is not self.ratings or self._ratings_version != self._ratings_ref.version
+        )
+
+    def assess_risk(self):
+        # 1. Performance Risk
+        self.refresh_overall_score()
+
+        self.risk_level = risk_level_for(self.overall_score, self.country_count())
         return self.risk_level
+
+
+def risk_level_for(overall_score: Optional[float], num_countries: int) -> str:
+    # Worst of performance risk and region concentration risk
+    if overall_score is None or overall_score < 5.0:
+        perf_risk = "High"
+    elif overall_score < 8.0:
+        perf_risk = "Medium"
+    else:
+        perf_risk = "Low"
+
+    if num_countries <= 1:
+        region_risk = "High"
+    elif num_countries == 2:
+        region_risk = "Medium"
+    else:
+        region_risk = "Low"
+
+    return RISK_BY_ORDER[max(RISK_ORDER[perf_risk], RISK_ORDER[region_risk])]
@@ -1,26 +1,214 @@
-from typing import List, Dict, Any
+import heapq
+import json
+from typing import List, Dict, Any, Optional, Sequence
+from compact import CompactSupplier
 from models import Supplier
-from scoring import EvaluationCriteria, calculate_fit_score
+from fx import FxRates
+from scoring import EvaluationCriteria, ScoringWeights, calculate_fit_score, baseline_fit_score
+from supplier_index import SupplierIndex
+import metrics
 
-def rank_suppliers(suppliers: List[Supplier], criteria: EvaluationCriteria) -> List[Dict[str, Any]]:
-    ranked_list = []
-    
-    for supplier in suppliers:
+try:
+    import orjson
+except ImportError:  # same output, slower
+    orjson = None
+
+# Keys of a ranked row, in output order; `fields` selects a subset of these
+RESULT_FIELDS = ("supplier_id", "supplier_name", "fit_score", "risk_level", "cost_alignment", "details")
+
+class RawJSON(bytes):
+    # An encoded JSON value that encode_rows splices into the output as is
+    __slots__ = ()
+
+def detail_json(supplier) -> bytes:
+    # supplier.model_dump() as JSON; compact records serialize once and keep the bytes
+    if isinstance(supplier, CompactSupplier):
+        return supplier.details_json()
+    return supplier.model_dump_json().encode()
+
+def _dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+def encode_rows(rows: List[Dict[str, Any]]) -> bytes:
+    # JSON array of result rows built with raw_details=True. The small per-query
+    # fields are encoded per row and the cached details bytes are spliced after them.
+    parts = []
+    for row in rows:
+        details = row.get("details")
+        if not isinstance(details, RawJSON):
+            parts.append(_dumps(row))
+            continue
+        head = _dumps({key: value for key, value in row.items() if key != "details"})
+        parts.append(head[:-1] + (b',"details":' if len(head) > 2 else b'"details":') + details + b"}")
+    return b"[" + b",".join(parts) + b"]"
+
+def build_result_row(supplier: Supplier, fit_score: float, risk_level: Optional[str], cost_alignment: str,
+                     fields: Optional[Sequence[str]] = None, raw_details: bool = False) -> Dict[str, Any]:
+    if fields is None:
+        fields = RESULT_FIELDS
+
+    row = {}
+    for field in RESULT_FIELDS:
+        if field not in fields:
+            continue
+        if field == "supplier_id":
+            row[field] = str(supplier.id)
+        elif field == "supplier_name":
+            row[field] = supplier.name
+        elif field == "fit_score":
+            row[field] = fit_score
+        elif field == "risk_level":
+            row[field] = risk_level
+        elif field == "cost_alignment":
+            row[field] = cost_alignment
+        elif raw_details:
+            row[field] = RawJSON(detail_json(supplier))
+        else:
+            # Full nested dump, only paid for rows actually returned
+            row[field] = supplier.model_dump()
+    return row
+
+def rank_suppliers(suppliers: List[Supplier], criteria: EvaluationCriteria, index: Optional[SupplierIndex] = None,
+                   limit: Optional[int] = None, offset: int = 0, fields: Optional[Sequence[str]] = None,
+                   fx_rates: Optional[FxRates] = None, raw_details: bool = False) -> List[Dict[str, Any]]:
+    scored = []
+
+    with metrics.stage("scoring"):
+        # With an index, only suppliers matching at least one criterion are fully scored;
+        # the rest can only earn their performance term and get the cheap baseline score
+        candidates = index.candidates(criteria, fx_rates) if index is not None else None
+
+        for supplier in suppliers:
+            # Calculate scores
+            if candidates is None or supplier.id in candidates:
+                scoring_result = calculate_fit_score(supplier, criteria, fx_rates)
+            else:
+                scoring_result = baseline_fit_score(supplier, criteria)
+            scored.append((supplier, scoring_result))
+
+    metrics.SUPPLIERS_SCANNED.inc(len(scored))
+    metrics.SUPPLIERS_SCORED.inc(len(scored) if candidates is None else len(candidates))
+
+    # Sort by fit_score descending; nlargest keeps only offset + limit rows and is
+    # equivalent to a stable sort followed by a slice
+    with metrics.stage("selection"):
+        if limit is None:
+            scored.sort(key=lambda x: x[1].total_score, reverse=True)
+        else:
+            scored = heapq.nlargest(offset + limit, scored, key=lambda x: x[1].total_score)
+        scored = scored[offset:]
+
+    return _build_rows([(supplier, result.total_score, result.cost_alignment) for supplier, result in scored], fields, raw_details)
+
+def rank_catalog(engine, criteria: EvaluationCriteria, limit: Optional[int] = None, offset: int = 0,
+                 fields: Optional[Sequence[str]] = None, raw_details: bool = False) -> List[Dict[str, Any]]:
+    # Same output as rank_suppliers, scored column-wise by a vector_scoring.ScoringEngine
+    with metrics.stage("scoring"):
+        scores = engine.score(criteria)
+    metrics.SUPPLIERS_SCANNED.inc(len(scores.rows))
+    metrics.SUPPLIERS_SCORED.inc(len(scores.rows))
+
+    with metrics.stage("selection"):
+        top = scores.order(None if limit is None else offset + limit)[offset:]
+
+    selected = []
+    for row in top:
+        scoring_result = scores.result(row)
+        selected.append((scores.suppliers[row], scoring_result.total_score, scoring_result.cost_alignment))
+    return _build_rows(selected, fields, raw_details)
+
+def rank_sensitivity(engine, criteria: EvaluationCriteria, weight_sets: Sequence[ScoringWeights],
+                     limit: int = 10) -> Dict[str, Any]:
+    # Top `limit` suppliers under criteria.weights and under each alternative
+    # weight vector, with every supplier's move against the first ranking.
+    # The catalog is scored once; the vectors are applied a block at a time,
+    # keeping only each one's top rows.
+    with metrics.stage("scoring"):
+        scores = engine.score(criteria)
+    metrics.SUPPLIERS_SCANNED.inc(len(scores.rows))
+    metrics.SUPPLIERS_SCORED.inc(len(scores.rows))
+
+    with metrics.stage("selection"):
+        ranks = scores.ranks()
+        baseline = scores.order(limit)
+        orders, fit_scores = [], []
+        for _, block in scores.reweighted(weight_sets):
+            for totals in block:
+                order = scores.order(limit, totals)
+                orders.append(order)
+                # Each selected row's reweighted fit score; scores.rows is ascending
+                fit_scores.append(totals[scores.rows.searchsorted(order)])
+
+    with metrics.stage("serialization"):
+        names = {}
+
+        def entry(row, fit_score, rank, previous_rank):
+            if row not in names:
+                supplier = scores.suppliers[row]
+                names[row] = (str(supplier.id), supplier.name)
+            supplier_id, supplier_name = names[row]
+            return {"supplier_id": supplier_id, "supplier_name": supplier_name, "fit_score": fit_score,
+                    "rank": rank, "previous_rank": previous_rank, "rank_change": previous_rank - rank}
+
+        result = {
+            "ranking": [entry(int(row), float(scores.rounded[row]), rank, rank) for rank, row in enumerate(baseline, 1)],
+            "scenarios": [
+                {
+                    "weights": weights.model_dump(),
+                    "ranking": [entry(int(row), float(fit_score), rank, int(ranks[row]))
+                                for rank, (row, fit_score) in enumerate(zip(order, fits), 1)],
+                }
+                for weights, order, fits in zip(weight_sets, orders, fit_scores)
+            ],
+        }
+    metrics.SUPPLIERS_RETURNED.inc(len(baseline) + sum(len(order) for order in orders))
+    return result
+
+def rank_pareto(engine, criteria: EvaluationCriteria, layers: int = 1, fields: Optional[Sequence[str]] = None,
+                raw_details: bool = False) -> List[Dict[str, Any]]:
+    # Suppliers pricing the required item that no other supplier beats on unit
+    # cost, overall score and risk at once (layer 1), and with layers > 1 the next
+    # skylines once those are set aside. Rows carry their layer and the three
+    # measures besides the usual result fields, frontier first, cheapest first.
+    with metrics.stage("scoring"):
+        scores = engine.score(criteria)
+    metrics.SUPPLIERS_SCANNED.inc(len(scores.rows))
+    metrics.SUPPLIERS_SCORED.inc(len(scores.rows))
+
+    with metrics.stage("selection"):
+        rows, row_layers = scores.pareto(layers)
+
+    selected = []
+    for row in rows:
+        scoring_result = scores.result(row)
+        selected.append((scores.suppliers[row], scoring_result.total_score, scoring_result.cost_alignment))
+    ranked_list = _build_rows(selected, fields, raw_details)
+    for result_row, row, layer, (supplier, _, _) in zip(ranked_list, rows, row_layers, selected):
+        result_row["pareto_layer"] = int(layer)
+        result_row["unit_cost"] = round(float(scores.unit_costs[row]), 4)
+        result_row["overall_score"] = supplier.overall_score
+    return ranked_list
+
+def _build_rows(selected, fields: Optional[Sequence[str]], raw_details: bool = False) -> List[Dict[str, Any]]:
+    # selected: (supplier, fit_score, cost_alignment) for each returned row, in rank order
+    with metrics.stage("risk"):
         # Ensure latest risk assessment
-        risk_level = supplier.assess_risk()
-        
-        # Calculate scores
-        scoring_result = calculate_fit_score(supplier, criteria)
-        
-        ranked_list.append({
-            "supplier_name": supplier.name,
-            "fit_score": scoring_result.total_score,
-            "risk_level": risk_level,
-            "cost_alignment": scoring_result.cost_alignment,
-            "details": supplier.model_dump()
-        })
-    
-    # Sort by fit_score descending
-    ranked_list.sort(key=lambda x: x["fit_score"], reverse=True)
-    
+        risk_levels = [supplier.assess_risk() for supplier, _, _ in selected]
+
+    with metrics.stage("serialization"):
+        ranked_list = [
+            build_result_row(supplier, fit_score, risk_level, cost_alignment, fields, raw_details)
+            for (supplier, fit_score, cost_alignment), risk_level in zip(selected, risk_levels)
+        ]
+
+    metrics.SUPPLIERS_RETURNED.inc(len(ranked_list))
     return ranked_list
+
+def rank_batch(engine, criteria_list: List[EvaluationCriteria], limit: Optional[int] = None, offset: int = 0,
+               fields: Optional[Sequence[str]] = None, raw_details: bool = False) -> List[List[Dict[str, Any]]]:
+    # Ranks many criteria against one engine. The per-supplier columns are built
+    # once and shared by every query.
+    return [rank_catalog(engine, criteria, limit=limit, offset=offset, fields=fields, raw_details=raw_details)
+            for criteria in criteria_list]
@@ -1,6 +1,26 @@
-from typing import List, Optional
-from pydantic import BaseModel, Field
-from models import Supplier, Region
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, model_validator
+from models import Supplier, Region, GeoPoint
+from fx import FxRates
+from geo import covers
+
+class ScoringWeights(BaseModel):
+    # Share of the fit score each component contributes; together they make 100%
+    capability: float = Field(0.40, ge=0, le=1, description="Weight of the capability match")
+    cost: float = Field(0.30, ge=0, le=1, description="Weight of the cost alignment")
+    region: float = Field(0.20, ge=0, le=1, description="Weight of the region match")
+    performance: float = Field(0.10, ge=0, le=1, description="Weight of the performance rating")
+
+    @model_validator(mode="after")
+    def sums_to_one(self):
+        if abs(self.capability + self.cost + self.region + self.performance - 1.0) > 1e-6:
+            raise ValueError("weights must sum to 1")
+        return self
+
+    def as_tuple(self):
+        return (self.capability, self.cost, self.region, self.performance)
+
+DEFAULT_WEIGHTS = ScoringWeights()
 
 class EvaluationCriteria(BaseModel):
     required_capabilities: List[str] = Field(..., description="List of required service capabilities")
@@ -8,6 +28,25 @@ class EvaluationCriteria(BaseModel):
     target_price: float = Field(..., gt=0, description="Target price for the item")
     target_currency: str = Field(..., min_length=3, max_length=3, description="Currency of the target price")
     required_item: str = Field(..., description="Item or service to evaluate cost for")
+    volume: Optional[int] = Field(None, gt=0, description="Order quantity used to pick the price tier")
+    delivery_location: Optional[GeoPoint] = Field(None, description="Delivery point; regions whose service radius covers it match")
+    weights: ScoringWeights = Field(DEFAULT_WEIGHTS, description="Component weights of the fit score")
+    cost_tolerance: float = Field(0.10, ge=0, description="Fraction above target_price still counted as a Medium cost match")
+    service_matches: Optional[Dict[str, List[str]]] = Field(None, description="Service names each required capability resolves to; the capability itself when absent")
+    item_matches: Optional[List[str]] = Field(None, description="Item names to price, most preferred first; just required_item when absent")
+
+    def tolerance_price(self) -> float:
+        # Highest unit cost with Medium cost alignment
+        return self.target_price * (1.0 + self.cost_tolerance)
+
+    def services_for(self, capability: str) -> List[str]:
+        # Supplier services that satisfy a required capability (see SupplierIndex.resolve_terms)
+        if self.service_matches is None:
+            return [capability]
+        return self.service_matches.get(capability, [capability])
+
+    def item_names(self) -> List[str]:
+        return [self.required_item] if self.item_matches is None else self.item_matches
 
 class ScoringResult(BaseModel):
     total_score: float
@@ -17,8 +56,35 @@ class ScoringResult(BaseModel):
     region_score: float
     performance_score: float
 
-def calculate_fit_score(supplier: Supplier, criteria: EvaluationCriteria) -> ScoringResult:
-    # 1. Capability Match (40%)
+def weighted_total(capability_score: float, cost_score: float, region_score: float, performance_score: float,
+                   weights: ScoringWeights = DEFAULT_WEIGHTS) -> float:
+    # Weighted Average
+    return (
+        (capability_score * weights.capability) +
+        (cost_score * weights.cost) +
+        (region_score * weights.region) +
+        (performance_score * weights.performance)
+    )
+
+def find_unit_cost(supplier: Supplier, criteria: EvaluationCriteria, fx_rates: Optional[FxRates] = None) -> Optional[float]:
+    # Unit cost of the required item in the target currency at the requested volume. A quote
+    # in the target currency wins; otherwise the first quote in a currency with a known rate is converted.
+    # With several matching item names, the earlier name is preferred at each step.
+    item_names = criteria.item_names()
+    for item_name in item_names:
+        relevant_cost = next((c for c in supplier.pricing if c.item_name == item_name and c.currency == criteria.target_currency), None)
+        if relevant_cost:
+            return relevant_cost.unit_cost_at(criteria.volume)
+
+    if fx_rates is not None and fx_rates.has(criteria.target_currency):
+        for item_name in item_names:
+            for c in supplier.pricing:
+                if c.item_name == item_name and fx_rates.has(c.currency):
+                    return fx_rates.convert(c.unit_cost_at(criteria.volume), c.currency, criteria.target_currency)
+    return None
+
+def calculate_fit_score(supplier: Supplier, criteria: EvaluationCriteria, fx_rates: Optional[FxRates] = None) -> ScoringResult:
+    # 1. Capability Match (40% by default)
     supplier_services = set()
     for cap in supplier.capabilities:
         supplier_services.update(cap.services)
@@ -27,20 +93,20 @@ def calculate_fit_score(supplier: Supplier, criteria: EvaluationCriteria) -> Sco
     if not required_services:
         capability_score = 100.0
     else:
-        intersection = supplier_services.intersection(required_services)
-        capability_score = (len(intersection) / len(required_services)) * 100.0
+        matched = sum(1 for service in required_services if not supplier_services.isdisjoint(criteria.services_for(service)))
+        capability_score = (matched / len(required_services)) * 100.0
 
-    # 2. Cost Alignment (30%)
+    # 2. Cost Alignment (30% by default)
     cost_score = 0.0
     cost_alignment = "Low" # Default
-    relevant_cost = next((c for c in supplier.pricing if c.item_name == criteria.required_item and c.currency == criteria.target_currency), None)
+    unit_cost = find_unit_cost(supplier, criteria, fx_rates)
     
-    if relevant_cost:
-        if relevant_cost.unit_cost <= criteria.target_price:
+    if unit_cost is not None:
+        if unit_cost <= criteria.target_price:
             cost_score = 100.0
             cost_alignment = "High"
-        elif relevant_cost.unit_cost <= criteria.target_price * 1.10:
-            # Within 10% tolerance
+        elif unit_cost <= criteria.tolerance_price():
+            # Within the cost tolerance (10% by default)
             cost_score = 50.0
             cost_alignment = "Medium"
         else:
@@ -48,11 +114,11 @@ def calculate_fit_score(supplier: Supplier, criteria: EvaluationCriteria) -> Sco
             cost_score = 0.0
             cost_alignment = "Low"
     else:
-        # Penalize if item not found or currency mismatch (could implement currency conversion here)
+        # Penalize if item not found or not convertible to the target currency
         cost_score = 0.0
         cost_alignment = "None"
 
-    # 3. Region Match (20%)
+    # 3. Region Match (20% by default)
     region_score = 0.0
     for region in supplier.regions:
         if region.country == criteria.target_region.country:
@@ -64,22 +130,24 @@ def calculate_fit_score(supplier: Supplier, criteria: EvaluationCriteria) -> Sco
             else:
                 region_score = 100.0
                 break
+
+    # A service radius around the delivery point matches across borders too
+    point = criteria.delivery_location
+    if not region_score and point is not None:
+        for region in supplier.regions:
+            area = region.service_area()
+            if area is not None and covers(*area, point.latitude, point.longitude):
+                region_score = 100.0
+                break
     
-    # 4. Performance Rating (10%)
+    # 4. Performance Rating (10% by default)
     # supplier.overall_score is 0-10, scale to 0-100
     # Ensure overall_score is calculated
-    if supplier.overall_score is None:
-        supplier.calculate_overall_score()
+    supplier.refresh_overall_score()
     
     performance_score = (supplier.overall_score or 0.0) * 10.0
 
-    # Weighted Average
-    total_score = (
-        (capability_score * 0.40) +
-        (cost_score * 0.30) +
-        (region_score * 0.20) +
-        (performance_score * 0.10)
-    )
+    total_score = weighted_total(capability_score, cost_score, region_score, performance_score, criteria.weights)
 
     return ScoringResult(
         total_score=round(total_score, 2),
@@ -89,3 +157,23 @@ def calculate_fit_score(supplier: Supplier, criteria: EvaluationCriteria) -> Sco
         region_score=region_score,
         performance_score=performance_score
     )
+
+def baseline_fit_score(supplier: Supplier, criteria: EvaluationCriteria) -> ScoringResult:
+    # Score for a supplier known (e.g. from the inverted index) to match none of the
+    # required services, the priced item/currency or the target region. Equal to
+    # calculate_fit_score for such suppliers without walking their nested lists.
+    capability_score = 0.0 if criteria.required_capabilities else 100.0
+
+    supplier.refresh_overall_score()
+
+    performance_score = (supplier.overall_score or 0.0) * 10.0
+    total_score = weighted_total(capability_score, 0.0, 0.0, performance_score, criteria.weights)
+
+    return ScoringResult(
+        total_score=round(total_score, 2),
+        cost_alignment="None",
+        capability_score=capability_score,
+        cost_score=0.0,
+        region_score=0.0,
+        performance_score=performance_score
+    )
@@ -0,0 +1,245 @@
+import asyncio
+import heapq
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import metrics
+from compact import CompactSupplier, to_compact
+from fx import FxRates
+from models import PerformancePolicy, Supplier, get_performance_policy, set_performance_policy
+from ranking import _build_rows
+from scoring import EvaluationCriteria, ScoringResult
+from vector_scoring import ScoringEngine
+
+# A shard's answer for one query: (sequence number, supplier id, scores) in rank order
+Hit = Tuple[int, UUID, ScoringResult]
+
+
+def _shard_main(conn, base: str, rates: Dict[str, float], policy: PerformancePolicy):
+    # Worker process: owns one ScoringEngine over its slice of the catalog and
+    # answers messages in the order they arrive on the pipe
+    set_performance_policy(policy)
+    fx = FxRates(rates, base=base)
+    engine = ScoringEngine(fx)
+    seqs: Dict[UUID, int] = {}
+    while True:
+        message = conn.recv()
+        kind = message[0]
+        if kind == "apply":
+            for op in message[1]:
+                if op[0] == "upsert":
+                    _, seq, record = op
+                    seqs[record.id] = seq
+                    engine.upsert(record)
+                elif op[0] == "remove":
+                    seqs.pop(op[1], None)
+                    engine.remove(op[1])
+                else:
+                    fx.update(op[1])
+        elif kind == "rank":
+            _, criteria, k = message
+            scores = engine.score(criteria)
+            hits = []
+            for row in scores.order(k):
+                supplier_id = scores.suppliers[row].id
+                hits.append((seqs[supplier_id], supplier_id, scores.result(row)))
+            conn.send(hits)
+        else:
+            conn.close()
+            return
+
+
+class ShardedRanker:
+    """Scores the catalog across a persistent pool of worker processes.
+
+    Suppliers are dealt round-robin to ``shards`` processes, each holding its own
+    ScoringEngine. A query is sent to every shard at once, each returns its
+    partial top-K, and the partial lists are merged here. Register the ranker as
+    a store listener; writes are buffered and shipped to the shards in batches,
+    always ahead of the next query.
+
+    Queries run concurrently: the lock is held only to ship pending writes and
+    the query itself down each pipe, and one reader thread per shard hands the
+    replies back in order. The ranker keeps the record it was given for each
+    supplier (the store's, when registered with one) rather than a copy; a
+    supplier deleted while a query runs is left out of its results.
+
+    Ties are broken by the order suppliers were first added, exactly as a single
+    ScoringEngine does, so results match ``rank_catalog``.
+    """
+
+    def __init__(self, shards: int, fx_rates: Optional[FxRates] = None, flush_size: int = 1000,
+                 poll_interval: float = 0.05):
+        self.flush_size = flush_size
+        self.poll_interval = poll_interval
+        # id -> (sequence number, shard, record); sequence numbers only grow
+        self._placement: Dict[UUID, Tuple[int, int, CompactSupplier]] = {}
+        self._next_seq = 0
+        # Guards placement and pending writes, and keeps each pipe's messages in order
+        self._lock = threading.Lock()
+        self._pending: List[List[tuple]] = [[] for _ in range(shards)]
+        # Per shard, the futures of queries sent and not yet answered, oldest first
+        self._waiting: List[deque] = [deque() for _ in range(shards)]
+        self._threads = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sharded-rank")
+
+        fx_state = fx_rates.as_dict() if fx_rates is not None else {"base": "USD", "rates": {}}
+        context = multiprocessing.get_context("spawn")
+        self._conns = []
+        self._processes = []
+        for _ in range(shards):
+            parent, child = context.Pipe()
+            process = context.Process(target=_shard_main, args=(child, fx_state["base"], fx_state["rates"], get_performance_policy()),
+                                      daemon=True)
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+        self._readers = [threading.Thread(target=self._read_replies, args=(shard,), daemon=True, name=f"sharded-rank-reader-{shard}")
+                         for shard in range(shards)]
+        for reader in self._readers:
+            reader.start()
+
+        self._fx = fx_rates
+        if fx_rates is not None:
+            fx_rates.add_listener(self._on_rates_changed)
+
+    @property
+    def shards(self) -> int:
+        return len(self._conns)
+
+    def __len__(self) -> int:
+        return len(self._placement)
+
+    def __call__(self, supplier_id: UUID, supplier: Optional[Supplier]):
+        with self._lock:
+            if supplier is None:
+                placement = self._placement.pop(supplier_id, None)
+                if placement is not None:
+                    self._queue(placement[1], ("remove", supplier_id))
+                return
+
+            record = supplier if isinstance(supplier, CompactSupplier) else to_compact(supplier)
+            placement = self._placement.get(supplier_id)
+            if placement is None:
+                seq, shard = self._next_seq, self._next_seq % self.shards
+                self._next_seq += 1
+            else:
+                seq, shard = placement[0], placement[1]
+            self._placement[supplier_id] = (seq, shard, record)
+            self._queue(shard, ("upsert", seq, record))
+
+    def _on_rates_changed(self, currencies):
+        rates = self._fx.as_dict()["rates"]
+        update = {currency: rates.get(currency) for currency in currencies}
+        with self._lock:
+            for shard in range(self.shards):
+                self._queue(shard, ("fx", update))
+
+    def _queue(self, shard: int, op: tuple):
+        # Caller holds self._lock
+        self._pending[shard].append(op)
+        if len(self._pending[shard]) >= self.flush_size:
+            self._flush(shard)
+
+    def _flush(self, shard: int):
+        if self._pending[shard]:
+            self._conns[shard].send(("apply", self._pending[shard]))
+            self._pending[shard] = []
+
+    def _read_replies(self, shard: int):
+        # Reader thread: a shard answers queries in the order they were sent
+        conn, waiting = self._conns[shard], self._waiting[shard]
+        while True:
+            try:
+                hits = conn.recv()
+            except (EOFError, OSError):
+                while waiting:
+                    waiting.popleft().set_exception(EOFError(f"shard {shard} stopped"))
+                return
+            waiting.popleft().set_result(hits)
+
+    def _rank_blocking(self, criteria: EvaluationCriteria, limit: Optional[int], offset: int,
+                       fields: Optional[Sequence[str]], cancelled: threading.Event,
+                       raw_details: bool = False) -> Optional[List[Dict[str, Any]]]:
+        k = None if limit is None else offset + limit
+        if cancelled.is_set():
+            return None
+        with metrics.stage("scoring"):
+            replies = []
+            with self._lock:
+                # Every write made so far goes down each pipe ahead of the query
+                for shard, conn in enumerate(self._conns):
+                    self._flush(shard)
+                    reply = Future()
+                    self._waiting[shard].append(reply)
+                    conn.send(("rank", criteria, k))
+                    replies.append(reply)
+                scanned = len(self._placement)
+            # The shards score while other queries and writes go ahead
+            while wait(replies, timeout=self.poll_interval).not_done:
+                if cancelled.is_set():
+                    return None
+            partials: List[List[Hit]] = [reply.result() for reply in replies]
+
+        with metrics.stage("selection"):
+            placement = self._placement
+            merged = heapq.merge(*partials, key=lambda hit: (-hit[2].total_score, hit[0]))
+            selected = []
+            for _, supplier_id, result in merged:
+                entry = placement.get(supplier_id)
+                if entry is None:
+                    continue
+                selected.append((entry[2], result.total_score, result.cost_alignment))
+                if k is not None and len(selected) >= k:
+                    break
+            selected = selected[offset:]
+
+        metrics.SUPPLIERS_SCANNED.inc(scanned)
+        metrics.SUPPLIERS_SCORED.inc(scanned)
+        if cancelled.is_set():
+            return None
+        return _build_rows(selected, fields, raw_details)
+
+    async def rank(self, criteria: EvaluationCriteria, limit: Optional[int] = None, offset: int = 0,
+                   fields: Optional[Sequence[str]] = None,
+                   is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+                   raw_details: bool = False) -> Optional[List[Dict[str, Any]]]:
+        # Awaitable ranking that never blocks the event loop. Returns None when
+        # is_disconnected() reports the client gone before the result is ready.
+        if is_disconnected is not None and await is_disconnected():
+            return None
+        cancelled = threading.Event()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._threads, self._rank_blocking, criteria, limit, offset, fields, cancelled, raw_details)
+        try:
+            while True:
+                done, _ = await asyncio.wait({future}, timeout=self.poll_interval)
+                if done:
+                    return future.result()
+                if is_disconnected is not None and await is_disconnected():
+                    cancelled.set()
+                    return None
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    def rank_sync(self, criteria: EvaluationCriteria, limit: Optional[int] = None, offset: int = 0,
+                  fields: Optional[Sequence[str]] = None, raw_details: bool = False) -> List[Dict[str, Any]]:
+        return self._rank_blocking(criteria, limit, offset, fields, threading.Event(), raw_details)
+
+    def close(self):
+        with self._lock:
+            for conn in self._conns:
+                try:
+                    conn.send(("stop",))
+                except (BrokenPipeError, OSError):
+                    pass
+        for process in self._processes:
+            process.join(timeout=5)
+        for reader in self._readers:
+            reader.join(timeout=5)
+        self._threads.shutdown(wait=False)
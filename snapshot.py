@@ -0,0 +1,504 @@
+import argparse
+import json
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from compact import CompactSupplier, to_compact
+from fx import FxRates
+from geo import EARTH_RADIUS_KM, covers
+from models import (RISK_ORDER, PerformancePolicy, Supplier, get_performance_policy, performance_policy_version, policy_month,
+                    set_performance_policy)
+from scoring import EvaluationCriteria, weighted_total
+from supplier_index import resolve_terms
+from terms import TermIndex
+from vector_scoring import CatalogScores, _HIGH, _LOW, _MEDIUM, _MAX_QUANTITY, _NONE, _QUANTITY_BITS
+
+# Binary catalog snapshot: the scoring columns of a whole catalog in one file
+# that every worker maps read-only, so the pages are shared through the OS page
+# cache instead of being rebuilt per process.
+#
+# Layout: MAGIC, the header length as 8 little-endian bytes, a JSON header
+# (keys, array directory, policy), then the raw arrays, each 64-byte aligned.
+# Posting lists (services, countries, regions) and quotes are stored CSR-style:
+# an offsets array per key table indexing one flat array of rows.
+
+MAGIC = b"SUPSNAP3"
+_ALIGN = 64
+
+
+class StaleSnapshotError(ValueError):
+    """The snapshot's overall scores no longer hold: the performance policy
+    changed, or a rolling window moved to a new month, since it was exported."""
+
+
+def _check_policy(path: str, header: Dict[str, Any]):
+    if PerformancePolicy.model_validate(header["policy"]) != get_performance_policy():
+        raise StaleSnapshotError(f"{path} was exported under a different performance policy")
+    if header["policy_month"] != policy_month():
+        raise StaleSnapshotError(f"{path} was exported for an earlier month of the rolling performance window; re-export it")
+
+
+def _postings(keys: List[Any], rows_by_key: Dict[Any, List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    flat = []
+    for i, key in enumerate(keys):
+        flat.extend(rows_by_key[key])
+        offsets[i + 1] = len(flat)
+    return offsets, np.array(flat, dtype=np.int64)
+
+
+def build_arrays(suppliers: Iterable[Supplier]) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    # (header fields, arrays) for the catalog, rows in iteration order
+    services: Dict[str, List[int]] = {}
+    countries: Dict[str, List[int]] = {}
+    regions: Dict[Tuple[str, Optional[str]], List[int]] = {}
+    quotes: Dict[str, List[Tuple[int, str, float, List[Tuple[int, float]]]]] = {}
+    currencies: Dict[str, int] = {}
+    overall, risk, circles, details, ids, names = [], [], [], [], [], []
+
+    for row, supplier in enumerate(suppliers):
+        record = supplier if isinstance(supplier, CompactSupplier) else to_compact(supplier)
+        overall.append(record.refresh_overall_score() or 0.0)
+        risk.append(RISK_ORDER[record.assess_risk()])
+        for service in {s for cap in record.capabilities for s in cap.services}:
+            services.setdefault(service, []).append(row)
+        for country in {r.country for r in record.regions}:
+            countries.setdefault(country, []).append(row)
+        for key in {(r.country, r.state_province) for r in record.regions}:
+            regions.setdefault(key, []).append(row)
+        for region in record.regions:
+            area = region.service_area()
+            if area is not None:
+                circles.append((row, *area))
+        for cost in record.pricing:
+            currencies.setdefault(cost.currency, len(currencies))
+            quotes.setdefault(cost.item_name, []).append(
+                (row, cost.currency, cost.unit_cost, [(t.min_quantity, t.unit_cost) for t in cost.tiers]))
+        details.append(record.details_json())
+        ids.append(record.id.bytes)
+        names.append((record.name.casefold(), str(record.id)))
+
+    n = len(overall)
+    arrays: Dict[str, np.ndarray] = {"overall": np.array(overall, dtype=np.float64), "risk": np.array(risk, dtype=np.int8)}
+    service_keys = sorted(services)
+    country_keys = sorted(countries)
+    region_keys = sorted(regions, key=lambda k: (k[0], k[1] is not None, k[1] or ""))
+    arrays["service_offsets"], arrays["service_rows"] = _postings(service_keys, services)
+    arrays["country_offsets"], arrays["country_rows"] = _postings(country_keys, countries)
+    arrays["region_offsets"], arrays["region_rows"] = _postings(region_keys, regions)
+
+    # Quotes grouped by item, each group in (row, pricing order); quote numbers
+    # are global so one sorted packed-key array holds every quantity break
+    item_keys = sorted(quotes)
+    item_offsets = [0]
+    quote_rows, quote_currency, quote_cost, tier_keys, tier_costs = [], [], [], [], []
+    for item in item_keys:
+        for row, currency, unit_cost, tiers in quotes[item]:
+            q = len(quote_rows)
+            quote_rows.append(row)
+            quote_currency.append(currencies[currency])
+            quote_cost.append(unit_cost)
+            for min_quantity, tier_cost in sorted(tiers):
+                tier_keys.append((q << _QUANTITY_BITS) | min(min_quantity, _MAX_QUANTITY))
+                tier_costs.append(tier_cost)
+        item_offsets.append(len(quote_rows))
+    arrays["item_offsets"] = np.array(item_offsets, dtype=np.int64)
+    arrays["quote_rows"] = np.array(quote_rows, dtype=np.int64)
+    arrays["quote_currency"] = np.array(quote_currency, dtype=np.int32)
+    arrays["quote_cost"] = np.array(quote_cost, dtype=np.float64)
+    arrays["tier_keys"] = np.array(tier_keys, dtype=np.int64)
+    arrays["tier_costs"] = np.array(tier_costs, dtype=np.float64)
+
+    arrays["circle_rows"] = np.array([c[0] for c in circles], dtype=np.int64)
+    arrays["circle_lat"] = np.array([c[1] for c in circles], dtype=np.float64)
+    arrays["circle_lon"] = np.array([c[2] for c in circles], dtype=np.float64)
+    arrays["circle_radius"] = np.array([c[3] for c in circles], dtype=np.float64)
+
+    # Supplier JSON per row, only parsed for rows that are returned
+    arrays["detail_offsets"] = np.cumsum([0] + [len(d) for d in details], dtype=np.int64)
+    arrays["details"] = np.frombuffer(b"".join(details), dtype=np.uint8)
+    # Rows by id (byte order is the order of the id strings) and by name, as SupplierStore sorts
+    by_id = sorted(range(n), key=ids.__getitem__)
+    arrays["id_keys"] = np.array([ids[row] for row in by_id], dtype="S16")
+    arrays["id_rows"] = np.array(by_id, dtype=np.int64)
+    arrays["name_order"] = np.array(sorted(range(n), key=names.__getitem__), dtype=np.int64)
+
+    header = {
+        "suppliers": n,
+        "services": service_keys,
+        "countries": country_keys,
+        "regions": [list(k) for k in region_keys],
+        "items": item_keys,
+        "currencies": sorted(currencies, key=currencies.get),
+    }
+    return header, arrays
+
+
+def write_snapshot(suppliers: Iterable[Supplier], path: str) -> Dict[str, Any]:
+    # Writes next to path and renames over it, so readers see the old or the new file, never half of one
+    header, arrays = build_arrays(suppliers)
+    header["version"] = time.time_ns()
+    header["policy"] = get_performance_policy().model_dump(mode="json")
+    header["policy_month"] = policy_month()
+
+    directory = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        directory[name] = [offset, array.dtype.str, list(array.shape)]
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header["arrays"] = directory
+    encoded = json.dumps(header).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(encoded)) // _ALIGN) * _ALIGN
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + len(encoded).to_bytes(8, "little") + encoded)
+            for name, array in arrays.items():
+                f.seek(data_start + directory[name][0])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return header
+
+
+class _Records:
+    # Sequence view of a snapshot's suppliers, parsed from their JSON on access
+    __slots__ = ("_offsets", "_details")
+
+    def __init__(self, offsets: np.ndarray, details: np.ndarray):
+        self._offsets = offsets
+        self._details = details
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row: int) -> CompactSupplier:
+        start, end = self._offsets[row], self._offsets[row + 1]
+        data = self._details[start:end].tobytes()
+        record = to_compact(Supplier.model_validate_json(data))
+        # Written by details_json() at export, under the policy this process runs
+        record._details_json = data
+        record._details_version = performance_policy_version()
+        return record
+
+
+class SnapshotEngine:
+    """Read-only scoring engine over a memory-mapped catalog snapshot.
+
+    Scores like ``vector_scoring.ScoringEngine`` (use it with ``rank_catalog``),
+    but every column is a view into the mapped file, so processes opening the
+    same snapshot share one copy. Prices are converted with the live ``fx_rates``
+    at query time; overall scores are fixed at export, which is why the snapshot
+    must have been written under the current performance policy, and in the
+    current month under a rolling one (see ``current``).
+
+    Supplier details are served from the JSON stored per row, looked up by id
+    or paged in catalog or name order, so a worker needs no supplier store.
+    """
+
+    def __init__(self, path: str, fx_rates: Optional[FxRates] = None):
+        self.path = path
+        self.fx = fx_rates
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._map
+        if buf[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        length = int.from_bytes(buf[len(MAGIC):len(MAGIC) + 8], "little")
+        header = json.loads(buf[len(MAGIC) + 8:len(MAGIC) + 8 + length])
+        _check_policy(path, header)
+        self.policy_version = performance_policy_version()
+
+        data_start = -(-(len(MAGIC) + 8 + length) // _ALIGN) * _ALIGN
+        self.header = header
+        self.version: int = header["version"]
+        arrays = {}
+        for name, (offset, dtype, shape) in header["arrays"].items():
+            count = int(np.prod(shape))
+            arrays[name] = (np.frombuffer(buf, dtype=dtype, count=count, offset=data_start + offset).reshape(shape)
+                            if count else np.zeros(shape, dtype=dtype))
+        self._arrays = arrays
+
+        self.services = {key: i for i, key in enumerate(header["services"])}
+        self.countries = {key: i for i, key in enumerate(header["countries"])}
+        self.regions = {tuple(key): i for i, key in enumerate(header["regions"])}
+        self.items = {key: i for i, key in enumerate(header["items"])}
+        self.currencies: List[str] = header["currencies"]
+        self.suppliers = _Records(arrays["detail_offsets"], arrays["details"])
+        # Trigram indexes over the snapshot's service and item names, built on first use
+        self._terms: Optional[Tuple[TermIndex, TermIndex]] = None
+
+    def __reduce__(self):
+        # Process pools reopen the file instead of copying the columns
+        return SnapshotEngine, (self.path, self.fx)
+
+    def __len__(self) -> int:
+        return self.header["suppliers"]
+
+    @property
+    def size(self) -> int:
+        return self.header["suppliers"]
+
+    def current(self) -> bool:
+        # Whether the overall scores baked in at export still hold in this process
+        version = performance_policy_version()
+        if version != self.policy_version:
+            try:
+                _check_policy(self.path, self.header)
+            except StaleSnapshotError:
+                return False
+            self.policy_version = version
+        return True
+
+    def row_of(self, supplier_id: UUID) -> Optional[int]:
+        keys = self._arrays["id_keys"]
+        key = np.array(supplier_id.bytes, dtype="S16")
+        i = int(np.searchsorted(keys, key))
+        # S16 drops trailing zero bytes on the way out
+        found = i < len(keys) and keys[i].ljust(16, b"\0") == supplier_id.bytes
+        return int(self._arrays["id_rows"][i]) if found else None
+
+    def details(self, row: int) -> bytes:
+        # The supplier's JSON as exported, risk assessed
+        offsets = self._arrays["detail_offsets"]
+        return self._arrays["details"][offsets[row]:offsets[row + 1]].tobytes()
+
+    def page(self, offset: int = 0, limit: Optional[int] = None, sort: Optional[str] = None) -> List[CompactSupplier]:
+        # Like SupplierStore.page: catalog order, or "name" / "-name"
+        stop = None if limit is None else offset + limit
+        if sort is None:
+            rows = range(self.size)[offset:stop]
+        elif sort.startswith("-"):
+            rows = self._arrays["name_order"][::-1][offset:stop]
+        else:
+            rows = self._arrays["name_order"][offset:stop]
+        return [self.suppliers[int(row)] for row in rows]
+
+    def iter_json(self, after: Optional[UUID] = None, limit: Optional[int] = None) -> Iterator[Tuple[str, str]]:
+        # Like SupplierStore.iter_json: (id, JSON) in id order, resuming after `after`
+        keys = self._arrays["id_keys"]
+        start = 0 if after is None else int(np.searchsorted(keys, np.array(after.bytes, dtype="S16"), side="right"))
+        stop = len(keys) if limit is None else min(len(keys), start + limit)
+        for i in range(start, stop):
+            row = int(self._arrays["id_rows"][i])
+            yield str(UUID(bytes=keys[i].ljust(16, b"\0"))), self.details(row).decode()
+
+    def resolve_terms(self, criteria: EvaluationCriteria, threshold: float) -> EvaluationCriteria:
+        # SupplierIndex.resolve_terms against the names in this snapshot
+        if self._terms is None:
+            services, items = TermIndex(), TermIndex()
+            for name in self.header["services"]:
+                services.add(name)
+            for name in self.header["items"]:
+                items.add(name)
+            self._terms = (services, items)
+        return resolve_terms(criteria, *self._terms, threshold)
+
+    def _posting(self, table: str, index: Optional[int]) -> np.ndarray:
+        if index is None:
+            return self._arrays[f"{table}_rows"][:0]
+        offsets = self._arrays[f"{table}_offsets"]
+        return self._arrays[f"{table}_rows"][offsets[index]:offsets[index + 1]]
+
+    def _priced_at(self, quotes: np.ndarray, volume: Optional[int]) -> np.ndarray:
+        # Unit cost of each quote at volume: its highest break <= volume, else the list price
+        costs = self._arrays["quote_cost"][quotes]
+        keys = self._arrays["tier_keys"]
+        if volume is None or not len(keys) or not len(quotes):
+            return costs
+        probe = (quotes << _QUANTITY_BITS) | min(volume, _MAX_QUANTITY)
+        found = np.searchsorted(keys, probe, side="right") - 1
+        hit = (found >= 0) & ((keys[np.maximum(found, 0)] >> _QUANTITY_BITS) == quotes)
+        costs = costs.copy()
+        costs[hit] = self._arrays["tier_costs"][found[hit]]
+        return costs
+
+    def _first_quotes(self, item: int, eligible) -> np.ndarray:
+        # Global numbers of each row's first quote for item whose currency passes `eligible`
+        start, end = self._arrays["item_offsets"][item:item + 2]
+        quotes = np.arange(start, end, dtype=np.int64)[eligible(self._arrays["quote_currency"][start:end])]
+        _, first = np.unique(self._arrays["quote_rows"][quotes], return_index=True)
+        return quotes[first]
+
+    def _covering(self, latitude: float, longitude: float) -> np.ndarray:
+        lat, lon, radius = self._arrays["circle_lat"], self._arrays["circle_lon"], self._arrays["circle_radius"]
+        if not len(lat):
+            return self._arrays["circle_rows"]
+        # Vectorized haversine as a coarse filter; the few survivors get the exact
+        # geo.covers test so boundary cases agree with the other scoring paths
+        phi1, phi2 = np.radians(lat), np.radians(latitude)
+        a = (np.sin((phi2 - phi1) / 2) ** 2
+             + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(longitude - lon) / 2) ** 2)
+        distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+        near = np.flatnonzero(distance <= radius + 1e-6)
+        hits = [i for i in near if covers(lat[i], lon[i], radius[i], latitude, longitude)]
+        return self._arrays["circle_rows"][hits]
+
+    def score(self, criteria: EvaluationCriteria) -> CatalogScores:
+        n = self.size
+        rows = np.arange(n)
+
+        # 1. Capability Match
+        required_services = set(criteria.required_capabilities)
+        if not required_services:
+            capability = np.full(n, 100.0)
+        else:
+            hits = np.zeros(n, dtype=np.float64)
+            matched = np.zeros(n, dtype=bool)
+            for service in required_services:
+                matched[:] = False
+                for name in criteria.services_for(service):
+                    matched[self._posting("service", self.services.get(name))] = True
+                hits += matched
+            capability = (hits / len(required_services)) * 100.0
+
+        # 2. Cost Alignment
+        cost = np.zeros(n, dtype=np.float64)
+        alignment = np.full(n, _NONE, dtype=np.int8)
+        unit_costs = np.full(n, np.nan)
+        # Least preferred item name first, so preferred names overwrite
+        items = [self.items[name] for name in criteria.item_names()[::-1] if name in self.items]
+        target_currency = criteria.target_currency
+        quote_rows = self._arrays["quote_rows"]
+        if items and self.fx is not None and self.fx.has(target_currency):
+            # First quote per row whose currency has a rate, via the base currency
+            rates = np.array([self.fx.to_base(1.0, c) if self.fx.has(c) else np.nan for c in self.currencies])
+            for item in items:
+                quotes = self._first_quotes(item, lambda codes: ~np.isnan(rates[codes]))
+                base_costs = self._priced_at(quotes, criteria.volume) * rates[self._arrays["quote_currency"][quotes]]
+                unit_costs[quote_rows[quotes]] = self.fx.from_base(base_costs, target_currency)
+        # A quote in the target currency itself takes precedence over a converted one
+        if items and target_currency in self.currencies:
+            code = self.currencies.index(target_currency)
+            for item in items:
+                quotes = self._first_quotes(item, lambda codes: codes == code)
+                unit_costs[quote_rows[quotes]] = self._priced_at(quotes, criteria.volume)
+
+        priced_rows = np.flatnonzero(~np.isnan(unit_costs))
+        if len(priced_rows):
+            priced_costs = unit_costs[priced_rows]
+            high = priced_costs <= criteria.target_price
+            medium = ~high & (priced_costs <= criteria.tolerance_price())
+            cost[priced_rows] = np.where(high, 100.0, np.where(medium, 50.0, 0.0))
+            alignment[priced_rows] = np.where(high, _HIGH, np.where(medium, _MEDIUM, _LOW))
+
+        # 3. Region Match
+        region = np.zeros(n, dtype=np.float64)
+        target = criteria.target_region
+        if target.state_province:
+            region[self._posting("region", self.regions.get((target.country, target.state_province)))] = 100.0
+        else:
+            region[self._posting("country", self.countries.get(target.country))] = 100.0
+        point = criteria.delivery_location
+        if point is not None:
+            region[self._covering(point.latitude, point.longitude)] = 100.0
+
+        # 4. Performance Rating
+        performance = self._arrays["overall"] * 10.0
+
+        total = weighted_total(capability, cost, region, performance, criteria.weights)
+        return CatalogScores(rows, capability, cost, alignment, region, performance, total, unit_costs, self._arrays["risk"],
+                             self.suppliers)
+
+
+class SnapshotCatalog:
+    """The current snapshot at ``path``, swapped for a newer one as it appears.
+
+    ``engine()`` re-checks the file at most every ``check_interval`` seconds and,
+    when it has been replaced, maps the new one and switches with a single
+    reference assignment. Requests already scoring against the old mapping keep
+    it alive until they finish. A replacement that fails to open is skipped and
+    the previous snapshot stays in service (see ``error``).
+
+    Once the snapshot in service goes stale (a new month under a rolling
+    performance window), ``engine()`` looks for a replacement right away and
+    raises StaleSnapshotError until one is exported.
+    """
+
+    def __init__(self, path: str, fx_rates: Optional[FxRates] = None, check_interval: float = 1.0):
+        self.path = path
+        self.fx = fx_rates
+        self.check_interval = check_interval
+        self.swaps = 0
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._identity = self._stat()
+        self._engine = SnapshotEngine(path, fx_rates)
+        self._checked = time.monotonic()
+
+    def _stat(self) -> Tuple[int, int, int]:
+        st = os.stat(self.path)
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    @property
+    def version(self) -> int:
+        return self._engine.version
+
+    def __len__(self) -> int:
+        # Suppliers in the snapshot in service
+        return len(self._engine)
+
+    def engine(self) -> SnapshotEngine:
+        if time.monotonic() - self._checked >= self.check_interval or not self._engine.current():
+            self.reload()
+        engine = self._engine
+        if not engine.current():
+            raise StaleSnapshotError(self.error or f"{self.path} is stale; re-export it")
+        return engine
+
+    def reload(self) -> bool:
+        # True if a new snapshot was swapped in
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                identity = self._stat()
+                if identity == self._identity:
+                    return False
+                engine = SnapshotEngine(self.path, self.fx)
+            except (OSError, ValueError) as e:
+                self.error = str(e)
+                return False
+            self._identity = identity
+            self._engine = engine
+            self.error = None
+            self.swaps += 1
+            return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from store import SupplierStore
+
+    parser = argparse.ArgumentParser(description="Export the supplier catalog as a memory-mappable scoring snapshot")
+    parser.add_argument("output", help="Snapshot file; replaced atomically")
+    parser.add_argument("--db", default=os.environ.get("SUPPLIER_DB_PATH", "suppliers.db"), help="SQLite database to export")
+    parser.add_argument("--window-months", type=int, default=int(os.environ.get("PERFORMANCE_WINDOW_MONTHS") or 0) or None)
+    parser.add_argument("--half-life-months", type=float, default=float(os.environ.get("PERFORMANCE_HALF_LIFE_MONTHS") or 0) or None)
+    args = parser.parse_args(argv)
+
+    # Overall scores are baked in, so export under the policy the API runs with
+    set_performance_policy(PerformancePolicy(window_months=args.window_months, half_life_months=args.half_life_months))
+    store = SupplierStore(args.db)
+    header = write_snapshot(store.records(), args.output)
+    print(f"wrote {header['suppliers']} suppliers to {args.output} (version {header['version']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import sqlite3
+import threading
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from compact import CompactSupplier, from_compact, to_compact
+from models import Supplier
+
+# Called with (supplier_id, record) after every write; record is the store's
+# CompactSupplier, shared with listeners that keep one, or None on delete
+ChangeListener = Callable[[UUID, Optional[CompactSupplier]], None]
+
+# Orders page() can sort by; ties fall back to the supplier id
+SORT_KEYS: Dict[str, Callable[[CompactSupplier], tuple]] = {
+    "name": lambda s: (s.name.casefold(), str(s.id)),
+}
+
+
+class SupplierStore:
+    """SQLite-backed supplier repository with a warm in-memory copy.
+
+    The table is read and validated once when the store is opened. After that,
+    reads are served from memory and every write goes to SQLite and to the
+    in-memory map in the same call, so nothing is ever re-read per request.
+
+    Memory holds one compact record per supplier (see compact.py), the same
+    object listeners such as the scoring engine are given. ``get`` and ``all``
+    rebuild Pydantic models on demand; ``record``, ``records`` and ``page``
+    return the records themselves, which have the same attributes.
+
+    A write is committed only once every listener has taken it. If a listener
+    raises, the transaction is rolled back, the listeners are told the previous
+    state, and the exception propagates.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.version = 0
+        self._lock = threading.RLock()
+        self._suppliers: Dict[UUID, CompactSupplier] = {}
+        # Sorted orders served by page(sort=...), dropped on every write
+        self._orders: Dict[str, List[CompactSupplier]] = {}
+        self._listeners: List[ChangeListener] = []
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS suppliers (id TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        for supplier_id, data in self._conn.execute("SELECT id, data FROM suppliers"):
+            supplier = Supplier.model_validate_json(data)
+            self._suppliers[supplier.id] = to_compact(supplier)
+
+    def __len__(self) -> int:
+        return len(self._suppliers)
+
+    def __contains__(self, supplier_id: UUID) -> bool:
+        return supplier_id in self._suppliers
+
+    def add_listener(self, listener: ChangeListener):
+        # Replay the current catalog so the listener starts in sync
+        with self._lock:
+            self._listeners.append(listener)
+            for supplier_id, supplier in self._suppliers.items():
+                listener(supplier_id, supplier)
+
+    def _notify(self, supplier_id: UUID, supplier: Optional[CompactSupplier]):
+        self.version += 1
+        self._orders.clear()
+        for listener in self._listeners:
+            listener(supplier_id, supplier)
+
+    def all(self) -> List[Supplier]:
+        # Rebuilds a model per supplier; the ranking paths use records() instead
+        return [from_compact(record) for record in self.records()]
+
+    def records(self) -> List[CompactSupplier]:
+        return list(self._suppliers.values())
+
+    def page(self, offset: int = 0, limit: Optional[int] = None, sort: Optional[str] = None) -> List[CompactSupplier]:
+        # Insertion order, or one of SORT_KEYS ("-name" for descending)
+        # Under the lock, so a concurrent write can't resize the map mid-iteration
+        stop = None if limit is None else offset + limit
+        with self._lock:
+            if sort is None:
+                return list(islice(self._suppliers.values(), offset, stop))
+            ordered = self._sorted(sort.lstrip("-"))
+        if sort.startswith("-"):
+            return list(islice(reversed(ordered), offset, stop))
+        return ordered[offset:stop]
+
+    def _sorted(self, key: str) -> List[CompactSupplier]:
+        # Sorted once per catalog version, so paging through a sorted view stays cheap
+        with self._lock:
+            ordered = self._orders.get(key)
+            if ordered is None:
+                ordered = self._orders[key] = sorted(self._suppliers.values(), key=SORT_KEYS[key])
+            return ordered
+
+    def iter_json(self, after: Optional[UUID] = None, limit: Optional[int] = None,
+                  batch_size: int = 500) -> Iterator[Tuple[str, str]]:
+        # Yields (id, stored JSON) in id order, resuming after `after`. Keyset
+        # pagination over the primary key keeps the cursor stable across writes
+        # and only holds one batch in memory at a time.
+        last = str(after) if after is not None else ""
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, data FROM suppliers WHERE id > ? ORDER BY id LIMIT ?", (last, size)
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def get(self, supplier_id: UUID) -> Optional[Supplier]:
+        record = self._suppliers.get(supplier_id)
+        return None if record is None else from_compact(record)
+
+    def record(self, supplier_id: UUID) -> Optional[CompactSupplier]:
+        return self._suppliers.get(supplier_id)
+
+    def add(self, supplier: Supplier) -> Supplier:
+        with self._lock:
+            if supplier.id in self._suppliers:
+                raise KeyError(f"Supplier {supplier.id} already exists")
+            self._write([supplier])
+        return supplier
+
+    def add_many(self, suppliers: Iterable[Supplier]) -> int:
+        suppliers = list(suppliers)
+        with self._lock:
+            for supplier in suppliers:
+                if supplier.id in self._suppliers:
+                    raise KeyError(f"Supplier {supplier.id} already exists")
+            self._write(suppliers)
+        return len(suppliers)
+
+    def update(self, supplier: Supplier) -> Supplier:
+        with self._lock:
+            if supplier.id not in self._suppliers:
+                raise KeyError(f"Supplier {supplier.id} not found")
+            self._write([supplier])
+        return supplier
+
+    def upsert(self, supplier: Supplier) -> Supplier:
+        with self._lock:
+            self._write([supplier])
+        return supplier
+
+    def upsert_many(self, suppliers: Iterable[Supplier]) -> int:
+        # One transaction for the whole batch; used by bulk imports
+        suppliers = list(suppliers)
+        with self._lock:
+            self._write(suppliers)
+        return len(suppliers)
+
+    def delete(self, supplier_id: UUID) -> bool:
+        with self._lock:
+            if supplier_id not in self._suppliers:
+                return False
+            self._conn.execute("DELETE FROM suppliers WHERE id = ?", (str(supplier_id),))
+            self._apply([(supplier_id, None)])
+        return True
+
+    def _write(self, suppliers: List[Supplier]):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO suppliers (id, data) VALUES (?, ?)",
+            [(str(s.id), s.model_dump_json()) for s in suppliers],
+        )
+        self._apply([(s.id, to_compact(s)) for s in suppliers])
+
+    def _apply(self, changes: List[Tuple[UUID, Optional[CompactSupplier]]]):
+        # Runs in the open transaction: memory and listeners first, commit last
+        previous = []
+        try:
+            for supplier_id, supplier in changes:
+                previous.append((supplier_id, self._suppliers.get(supplier_id)))
+                self._set(supplier_id, supplier)
+                self._notify(supplier_id, supplier)
+            self._conn.commit()
+        except BaseException:
+            self._conn.rollback()
+            for supplier_id, supplier in reversed(previous):
+                self._set(supplier_id, supplier)
+                self._notify(supplier_id, supplier)
+            raise
+
+    def _set(self, supplier_id: UUID, supplier: Optional[CompactSupplier]):
+        if supplier is None:
+            self._suppliers.pop(supplier_id, None)
+        else:
+            self._suppliers[supplier_id] = supplier
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,329 @@
+import heapq
+import logging
+import threading
+import uuid
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fx import FxRates
+from models import Supplier, performance_policy_version
+from scoring import EvaluationCriteria, calculate_fit_score
+
+logger = logging.getLogger(__name__)
+
+# An event is a JSON-ready dict: {"type": "snapshot" | "delta" | "deleted", ...}
+EventListener = Callable[[Dict[str, Any]], None]
+
+# Sort key of a supplier in a saved query: (-fit_score, catalog position, id).
+# Ties keep catalog order, as in /rank.
+Key = Tuple[float, int, UUID]
+# A ranked supplier: its key, cost alignment, and the record its row is rendered from
+Entry = Tuple[Key, str, Any]
+
+
+class SavedQuery:
+    """One standing query and its whole catalog ranking.
+
+    ``window`` holds the ``limit`` smallest keys, sorted; every other key is in
+    the ``rest`` min-heap. A key leaving the heap is only forgotten in
+    ``entries`` and skipped when it surfaces (a heap entry counts only while it
+    is the very key object ``entries`` holds), and the heap is compacted once
+    such stale entries outnumber live ones.
+    """
+
+    def __init__(self, query_id: str, query: Any, criteria: EvaluationCriteria, limit: int):
+        self.id = query_id
+        self.query = query
+        self.criteria = criteria
+        self.limit = limit
+        self.sequence = 0
+        self.window: List[Key] = []
+        self.rest: List[Key] = []
+        self.stale = 0
+        self.entries: Dict[UUID, Entry] = {}
+        self.listeners: List[EventListener] = []
+
+    def ranked(self) -> List[Key]:
+        # Every key in rank order; for tests and debugging, O(n log n)
+        return sorted(entry[0] for entry in self.entries.values())
+
+    def discard(self, supplier_id: UUID) -> Optional[int]:
+        # Drops the supplier's key; returns its window position if it had one
+        entry = self.entries.pop(supplier_id, None)
+        if entry is None:
+            return None
+        position = bisect_left(self.window, entry[0])
+        if position < len(self.window) and self.window[position] is entry[0]:
+            del self.window[position]
+            return position
+        self.stale += 1
+        return None
+
+    def refill(self):
+        # Tops the window back up to `limit` from the heap, skipping stale keys
+        while len(self.window) < self.limit and self.rest:
+            key = heapq.heappop(self.rest)
+            entry = self.entries.get(key[2])
+            if entry is not None and entry[0] is key:
+                # Every heap key sorts after every window key
+                self.window.append(key)
+            else:
+                self.stale -= 1
+
+    def place(self, key: Key, cost_alignment: str, record: Any) -> Tuple[Optional[int], Optional[Key]]:
+        # Adds a key to a full (or whole-catalog) window or to the heap. Returns
+        # its window position, if any, and the key it pushed out of the window.
+        self.entries[key[2]] = (key, cost_alignment, record)
+        window = self.window
+        if len(window) < self.limit or key < window[-1]:
+            position = bisect_left(window, key)
+            window.insert(position, key)
+            evicted = window.pop() if len(window) > self.limit else None
+            if evicted is not None:
+                heapq.heappush(self.rest, evicted)
+            return position, evicted
+        heapq.heappush(self.rest, key)
+        if self.stale > len(self.rest) // 2:
+            self.rest = [k for k in self.rest if self.entries.get(k[2], (None,))[0] is k]
+            heapq.heapify(self.rest)
+            self.stale = 0
+        return None, None
+
+    def rank(self, entries: Dict[UUID, Entry]):
+        # Replaces the whole ranking: O(n) to heapify, O(limit log n) for the window
+        self.entries = entries
+        self.rest = [entry[0] for entry in entries.values()]
+        heapq.heapify(self.rest)
+        self.window = []
+        self.stale = 0
+        self.refill()
+
+
+class SavedQueries:
+    """Saved queries with materialized rankings, kept current by catalog writes.
+
+    Register it as a store listener after the supplier index and scoring engine.
+    A write re-scores only the changed supplier against each saved query and
+    moves it within that query's ranking: O(log n) amortized through a heap of
+    the catalog below the top ``limit`` rows, plus O(limit) when it enters or
+    leaves those rows. When the change touches them, the query's listeners get
+    a delta with just the rows whose rank or content changed.
+
+    ``to_criteria`` turns a saved query into scoring criteria, resolving names
+    against the current catalog vocabulary; if a write changes that resolution,
+    or exchange rates change, affected queries are re-ranked in full and
+    listeners get a fresh snapshot. ``vocabulary`` returns a token that changes
+    whenever a write adds or removes a name ``to_criteria`` resolves against
+    (``SupplierIndex.vocabulary_version``); other writes skip re-resolving.
+    Without it every write re-resolves every query.
+
+    A listener that raises is dropped, so a broken subscriber can't fail the
+    write that notified it.
+    """
+
+    def __init__(self, lookup: Callable[[UUID], Optional[Supplier]],
+                 to_criteria: Callable[[Any], EvaluationCriteria],
+                 engine=None, fx_rates: Optional[FxRates] = None,
+                 vocabulary: Optional[Callable[[], Any]] = None):
+        self.lookup = lookup
+        self.to_criteria = to_criteria
+        self.vocabulary = vocabulary
+        self._vocabulary_version = vocabulary() if vocabulary is not None else None
+        self.engine = engine
+        self.fx = fx_rates
+        if fx_rates is not None:
+            fx_rates.add_listener(self.refresh_currencies)
+        self._queries: Dict[str, SavedQuery] = {}
+        # Catalog position of every supplier, in store order like the engine's rows
+        self._positions: Dict[UUID, int] = {}
+        self._next_position = 0
+        # Policy version the saved rankings' performance terms were derived under
+        self._performance_version = performance_policy_version()
+        self._lock = threading.RLock()
+
+    def __call__(self, supplier_id: UUID, supplier: Optional[Supplier]):
+        with self._lock:
+            if supplier is None:
+                self._positions.pop(supplier_id, None)
+            elif supplier_id not in self._positions:
+                self._positions[supplier_id] = self._next_position
+                self._next_position += 1
+
+            if self._refresh_performance():
+                return
+            resolve = self._vocabulary_changed()
+            for saved in self._queries.values():
+                criteria = self.to_criteria(saved.query) if resolve else saved.criteria
+                if (criteria.service_matches, criteria.item_matches) != (saved.criteria.service_matches, saved.criteria.item_matches):
+                    # The write changed which catalog names the query's terms match
+                    saved.criteria = criteria
+                    self._rebuild(saved)
+                else:
+                    self._move(saved, supplier_id, supplier)
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def __contains__(self, query_id: str) -> bool:
+        return query_id in self._queries
+
+    def ids(self) -> List[str]:
+        return list(self._queries)
+
+    def add(self, query: Any, limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            saved = SavedQuery(uuid.uuid4().hex, query, self.to_criteria(query), limit)
+            self._rank_all(saved)
+            self._queries[saved.id] = saved
+            return self._snapshot(saved)
+
+    def remove(self, query_id: str) -> bool:
+        with self._lock:
+            saved = self._queries.pop(query_id, None)
+            if saved is None:
+                return False
+            saved.sequence += 1
+            self._emit(saved, {"type": "deleted", "query_id": saved.id, "sequence": saved.sequence})
+            return True
+
+    def snapshot(self, query_id: str) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh_performance()
+            return self._snapshot(self._queries[query_id])
+
+    def subscribe(self, query_id: str, listener: EventListener) -> Dict[str, Any]:
+        # The current snapshot; every later change reaches the listener, with
+        # nothing missed in between. Listeners run in the writing thread, under the lock.
+        with self._lock:
+            self._refresh_performance()
+            saved = self._queries[query_id]
+            saved.listeners.append(listener)
+            return self._snapshot(saved)
+
+    def unsubscribe(self, query_id: str, listener: EventListener):
+        with self._lock:
+            saved = self._queries.get(query_id)
+            if saved is not None and listener in saved.listeners:
+                saved.listeners.remove(listener)
+
+    def refresh_currencies(self, currencies):
+        # FX listener: converted prices moved, so every ranking is rebuilt
+        with self._lock:
+            for saved in self._queries.values():
+                self._rebuild(saved)
+
+    def _vocabulary_changed(self) -> bool:
+        if self.vocabulary is None:
+            return True
+        version = self.vocabulary()
+        if version == self._vocabulary_version:
+            return False
+        self._vocabulary_version = version
+        return True
+
+    def _refresh_performance(self) -> bool:
+        # After a policy change, or a rolling performance window moving on to a
+        # new month, every supplier's score may differ: re-rank everything
+        version = performance_policy_version()
+        if version == self._performance_version:
+            return False
+        self._performance_version = version
+        for saved in self._queries.values():
+            saved.criteria = self.to_criteria(saved.query)
+            self._rebuild(saved)
+        return True
+
+    def _rank_all(self, saved: SavedQuery):
+        # The engine and store may already hold a write this object hasn't been
+        # told about yet. Rows it doesn't know are left out and deletes it doesn't
+        # know are skipped: the pending notification then moves them as usual.
+        entries = {}
+        positions = self._positions
+        if self.engine is not None:
+            scores = self.engine.score(saved.criteria)
+            for row in scores.rows:
+                record = scores.suppliers[row]
+                position = positions.get(record.id)
+                if position is not None:
+                    key = (-float(scores.rounded[row]), position, record.id)
+                    entries[record.id] = (key, scores.result(row).cost_alignment, record)
+        else:
+            for supplier_id, position in positions.items():
+                supplier = self.lookup(supplier_id)
+                if supplier is not None:
+                    result = calculate_fit_score(supplier, saved.criteria, self.fx)
+                    entries[supplier_id] = ((-result.total_score, position, supplier_id), result.cost_alignment, supplier)
+        saved.rank(entries)
+
+    def _rebuild(self, saved: SavedQuery):
+        self._rank_all(saved)
+        saved.sequence += 1
+        self._emit(saved, self._snapshot(saved))
+
+    def _move(self, saved: SavedQuery, supplier_id: UUID, supplier: Optional[Supplier]):
+        old_position = saved.discard(supplier_id)
+        if old_position is not None:
+            saved.refill()
+        new_position = evicted = None
+        if supplier is not None:
+            result = calculate_fit_score(supplier, saved.criteria, self.fx)
+            key = (-result.total_score, self._positions[supplier_id], supplier_id)
+            new_position, evicted = saved.place(key, result.cost_alignment, supplier)
+
+        # Only changes inside the watched window are pushed: the rows from the
+        # higher of the two positions down to where ranks stop shifting
+        touched = [p for p in (old_position, new_position) if p is not None]
+        if not touched:
+            return
+        low = min(touched)
+        high = max(touched) if len(touched) == 2 else len(saved.window) - 1
+
+        removed = []
+        if new_position is None:
+            removed.append(str(supplier_id))
+        elif old_position is None and evicted is not None:
+            # Pushed out of the window by the supplier moving in
+            removed.append(str(evicted[2]))
+
+        saved.sequence += 1
+        self._emit(saved, {
+            "type": "delta",
+            "query_id": saved.id,
+            "sequence": saved.sequence,
+            "total": len(saved.entries),
+            "ranking": [self._row(saved, position) for position in range(low, high + 1)],
+            "removed": removed,
+        })
+
+    def _row(self, saved: SavedQuery, position: int) -> Dict[str, Any]:
+        key = saved.window[position]
+        _, cost_alignment, supplier = saved.entries[key[2]]
+        return {
+            "rank": position + 1,
+            "supplier_id": str(key[2]),
+            "supplier_name": supplier.name,
+            "fit_score": -key[0],
+            "risk_level": supplier.assess_risk(),
+            "cost_alignment": cost_alignment,
+        }
+
+    def _snapshot(self, saved: SavedQuery) -> Dict[str, Any]:
+        return {
+            "type": "snapshot",
+            "query_id": saved.id,
+            "sequence": saved.sequence,
+            "limit": saved.limit,
+            "total": len(saved.entries),
+            "ranking": [self._row(saved, position) for position in range(len(saved.window))],
+        }
+
+    def _emit(self, saved: SavedQuery, event: Dict[str, Any]):
+        # Runs in the writing thread, after the store committed: a failing
+        # listener is logged and dropped rather than failing the write
+        for listener in list(saved.listeners):
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Dropping saved query %s listener that raised", saved.id)
+                saved.listeners.remove(listener)
@@ -0,0 +1,136 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from fx import FxRates
+from geo import GeoGrid
+from models import Supplier
+from scoring import EvaluationCriteria
+from terms import TermIndex
+
+
+def resolve_terms(criteria: EvaluationCriteria, service_terms: TermIndex, item_terms: TermIndex,
+                  threshold: float) -> EvaluationCriteria:
+    # Criteria whose capabilities and item match every indexed name at least
+    # `threshold` similar (normalized, trigram Jaccard), for the scorers to match exactly
+    return criteria.model_copy(update={
+        "service_matches": {service: service_terms.resolve(service, threshold)
+                            for service in criteria.required_capabilities},
+        "item_matches": item_terms.resolve(criteria.required_item, threshold),
+    })
+
+
+class SupplierIndex:
+    """Inverted index from services, priced items and regions to supplier IDs.
+
+    Register it as a store listener (``store.add_listener(index)``) and it is
+    kept in step with every insert, update and delete.
+    """
+
+    def __init__(self):
+        self.by_service: Dict[str, Set[UUID]] = defaultdict(set)
+        self.by_item: Dict[Tuple[str, str], Set[UUID]] = defaultdict(set)
+        self.by_country: Dict[str, Set[UUID]] = defaultdict(set)
+        self.by_region: Dict[Tuple[str, Optional[str]], Set[UUID]] = defaultdict(set)
+        # Service circles of regions with coordinates and a radius
+        self.geo = GeoGrid()
+        # Trigram indexes over the service and item names in by_service / by_item
+        self.service_terms = TermIndex()
+        self.item_terms = TermIndex()
+        # Keys each supplier was filed under, so updates and deletes can unfile it
+        self._entries: Dict[UUID, List[Tuple[dict, object]]] = {}
+        # Bumped whenever a service or item name gains its first or loses its last supplier
+        self.vocabulary_version = 0
+
+    def __call__(self, supplier_id: UUID, supplier: Optional[Supplier]):
+        self.remove(supplier_id)
+        if supplier is not None:
+            self.add(supplier)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, supplier: Supplier):
+        if supplier.id in self._entries:
+            self.remove(supplier.id)
+
+        entries = []
+        for cap in supplier.capabilities:
+            for service in cap.services:
+                entries.append((self.by_service, service))
+        for cost in supplier.pricing:
+            entries.append((self.by_item, (cost.item_name, cost.currency)))
+        for region in supplier.regions:
+            entries.append((self.by_country, region.country))
+            entries.append((self.by_region, (region.country, region.state_province)))
+
+        for table, key in entries:
+            if key not in table:
+                self._name_filed(table, key, True)
+            table[key].add(supplier.id)
+        self._entries[supplier.id] = entries
+        for region in supplier.regions:
+            area = region.service_area()
+            if area is not None:
+                self.geo.add(supplier.id, *area)
+
+    def remove(self, supplier_id: UUID):
+        self.geo.remove(supplier_id)
+        for table, key in self._entries.pop(supplier_id, []):
+            ids = table.get(key)
+            if ids is None:
+                continue
+            ids.discard(supplier_id)
+            if not ids:
+                del table[key]
+                self._name_filed(table, key, False)
+
+    def _name_filed(self, table: dict, key, added: bool):
+        # Keeps the term indexes to the service and item names that have suppliers
+        if table is self.by_service:
+            terms, name = self.service_terms, key
+        elif table is self.by_item:
+            terms, name = self.item_terms, key[0]
+        else:
+            return
+        self.vocabulary_version += 1
+        if added:
+            terms.add(name)
+        else:
+            terms.discard(name)
+
+    def resolve_terms(self, criteria: EvaluationCriteria, threshold: float) -> EvaluationCriteria:
+        return resolve_terms(criteria, self.service_terms, self.item_terms, threshold)
+
+    def capability_matches(self, criteria: EvaluationCriteria) -> Set[UUID]:
+        matches = set()
+        for service in set(criteria.required_capabilities):
+            for name in criteria.services_for(service):
+                matches |= self.by_service.get(name, set())
+        return matches
+
+    def cost_matches(self, criteria: EvaluationCriteria, fx_rates: Optional[FxRates] = None) -> Set[UUID]:
+        matches = set()
+        for item in criteria.item_names():
+            matches |= self.by_item.get((item, criteria.target_currency), set())
+            # Quotes in other currencies price the item too once they can be converted
+            if fx_rates is not None and fx_rates.has(criteria.target_currency):
+                for currency in fx_rates.currencies():
+                    matches |= self.by_item.get((item, currency), set())
+        return matches
+
+    def region_matches(self, criteria: EvaluationCriteria) -> Set[UUID]:
+        target = criteria.target_region
+        if target.state_province:
+            matches = set(self.by_region.get((target.country, target.state_province), set()))
+        else:
+            matches = set(self.by_country.get(target.country, set()))
+        point = criteria.delivery_location
+        if point is not None:
+            matches |= self.geo.covering(point.latitude, point.longitude)
+        return matches
+
+    def candidates(self, criteria: EvaluationCriteria, fx_rates: Optional[FxRates] = None) -> Set[UUID]:
+        # Suppliers outside this set score zero for capability (unless none is
+        # required), cost and region, so only their performance term differs
+        return self.capability_matches(criteria) | self.cost_matches(criteria, fx_rates) | self.region_matches(criteria)
@@ -0,0 +1,182 @@
+import argparse
+import json
+import random
+import sys
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from models import GeoPoint, Supplier, Region
+from scoring import EvaluationCriteria
+
+# Seeded synthetic catalogs for benchmarks and load tests. Popularity of
+# services, countries and currencies is skewed the way real catalogs are: a few
+# common values and a long tail.
+
+_SERVICE_BASES = ["Widget", "Gadget", "CNC", "Injection Molding", "Welding", "Casting", "Stamping", "Forging",
+                  "PCB Assembly", "Sheet Metal", "3D Printing", "Anodizing", "Painting", "Packaging", "Machining"]
+SERVICES = _SERVICE_BASES + [f"{base} Type {i}" for base in _SERVICE_BASES for i in range(1, 9)]
+
+COUNTRIES = {
+    "USA": ["CA", "TX", "OH", "MI", "NY", "IL", "GA"],
+    "Mexico": ["NL", "JAL", "CHH"],
+    "China": ["GD", "JS", "ZJ"],
+    "Germany": ["BY", "BW", "NW"],
+    "India": ["MH", "TN", "KA"],
+    "Vietnam": [],
+    "Canada": ["ON", "QC", "BC"],
+    "Poland": [],
+    "Brazil": ["SP", "MG"],
+    "Japan": [],
+}
+# Rough (latitude, longitude) centers that service areas are scattered around
+CENTROIDS = {
+    "USA": (39.8, -98.6), "Mexico": (23.6, -102.6), "China": (35.9, 104.2), "Germany": (51.2, 10.4),
+    "India": (22.4, 78.9), "Vietnam": (14.1, 108.3), "Canada": (45.4, -75.7), "Poland": (51.9, 19.1),
+    "Brazil": (-14.2, -51.9), "Japan": (36.2, 138.3),
+}
+_COUNTRY_NAMES = list(COUNTRIES)
+_COUNTRY_WEIGHTS = [30, 12, 20, 8, 9, 5, 6, 3, 4, 3]
+
+CURRENCIES = ["USD", "EUR", "CNY", "MXN", "INR"]
+_CURRENCY_WEIGHTS = [70, 12, 8, 6, 4]
+
+
+def _zipf_choice(rng: random.Random, values: List[str], s: float = 1.1) -> str:
+    # Index drawn from a truncated power law: low indexes are far more common
+    n = len(values)
+    while True:
+        i = int(rng.paretovariate(s)) - 1
+        if i < n:
+            return values[i]
+
+
+def _point_near(rng: random.Random, country: str, spread: float = 6.0) -> Dict[str, float]:
+    lat, lon = CENTROIDS[country]
+    return {"latitude": round(lat + rng.uniform(-spread, spread), 4), "longitude": round(lon + rng.uniform(-spread, spread), 4)}
+
+
+def _service_area(rng: random.Random, country: str) -> Dict[str, Any]:
+    radius = rng.choice([None, 50.0, 250.0, 1000.0])
+    if radius is None:
+        return {"service_radius_km": None, "latitude": None, "longitude": None}
+    return {"service_radius_km": radius, **_point_near(rng, country)}
+
+
+def supplier_record(rng: random.Random, i: int) -> Dict[str, Any]:
+    # One supplier as a JSON-compatible dict (the NDJSON import format)
+    services = sorted({_zipf_choice(rng, SERVICES) for _ in range(rng.randint(1, 6))})
+
+    regions = []
+    # sorted() so the output doesn't depend on string hash randomisation
+    for country in sorted({rng.choices(_COUNTRY_NAMES, _COUNTRY_WEIGHTS)[0] for _ in range(rng.randint(1, 5))}):
+        states = COUNTRIES[country]
+        if states and rng.random() < 0.7:
+            for state in rng.sample(states, rng.randint(1, min(3, len(states)))):
+                regions.append({"country": country, "state_province": state, **_service_area(rng, country)})
+        else:
+            regions.append({"country": country, "state_province": None, "service_radius_km": None})
+
+    currency = rng.choices(CURRENCIES, _CURRENCY_WEIGHTS)[0]
+    pricing = []
+    for item in rng.sample(services, min(len(services), rng.randint(1, 8))):
+        unit_cost = round(rng.lognormvariate(2.3, 0.6), 2)
+        bulk = rng.random() < 0.4
+        # Suppliers offering bulk discounts get one to three quantity breaks
+        tiers = []
+        if bulk:
+            for min_quantity in sorted(rng.sample([100, 500, 1000, 5000, 10000], rng.randint(1, 3))):
+                unit_cost_at = round(unit_cost * (1 - 0.05 * (len(tiers) + 1)), 2)
+                tiers.append({"min_quantity": min_quantity, "unit_cost": unit_cost_at})
+        pricing.append({
+            "item_name": item,
+            "unit_cost": unit_cost,
+            "currency": currency,
+            "bulk_discount_available": bulk,
+            "tiers": tiers,
+        })
+
+    # Monthly rating history, most suppliers short, a few with years of data
+    ratings = []
+    months = min(int(rng.expovariate(1 / 6)), 120)
+    base = rng.uniform(4.0, 9.5)
+    for m in range(months):
+        year, month = 2024 - (m // 12), 12 - (m % 12)
+        ratings.append({
+            "period_start": date(year, month, 1).isoformat(),
+            "period_end": date(year, month, 28).isoformat(),
+            "quality_score": round(min(10.0, max(0.0, rng.gauss(base, 1.0))), 1),
+            "timeliness_score": round(min(10.0, max(0.0, rng.gauss(base, 1.2))), 1),
+            "communication_score": round(min(10.0, max(0.0, rng.gauss(base, 0.8))), 1),
+            "reviewer_comments": None,
+        })
+
+    return {
+        "id": str(UUID(int=rng.getrandbits(128), version=4)),
+        "name": f"Synthetic Supplier {i}",
+        "contact_info": {"email": f"sales{i}@supplier{i % 997}.example.com", "phone": None, "address": None},
+        "capabilities": [{"category": "Manufacturing", "services": services, "certifications": ["ISO 9001"] if rng.random() < 0.5 else []}],
+        "regions": regions,
+        "pricing": pricing,
+        "ratings": ratings,
+        "overall_score": None,
+        "risk_level": None,
+    }
+
+
+def generate_records(n: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for i in range(n):
+        yield supplier_record(rng, i)
+
+
+def generate_suppliers(n: int, seed: int = 0) -> Iterator[Supplier]:
+    for record in generate_records(n, seed):
+        yield Supplier.model_validate(record)
+
+
+def query_payload(rng: random.Random) -> Dict[str, Any]:
+    # A /rank request body drawn from the same distributions as the catalog
+    country = rng.choices(_COUNTRY_NAMES, _COUNTRY_WEIGHTS)[0]
+    states = COUNTRIES[country]
+    return {
+        "component_type": _zipf_choice(rng, SERVICES),
+        "volume": rng.choice([10, 100, 1000, 10000]),
+        "region_country": country,
+        "region_state": rng.choice(states) if states and rng.random() < 0.5 else None,
+        "target_cost": round(rng.lognormvariate(2.3, 0.5), 2),
+        "currency": rng.choices(CURRENCIES, _CURRENCY_WEIGHTS)[0],
+        **({f"delivery_{k}": v for k, v in _point_near(rng, country).items()} if rng.random() < 0.3 else {}),
+    }
+
+
+def generate_criteria(n: int, seed: int = 0) -> List[EvaluationCriteria]:
+    rng = random.Random(seed + 1)
+    criteria = []
+    for _ in range(n):
+        q = query_payload(rng)
+        criteria.append(EvaluationCriteria(
+            required_capabilities=[q["component_type"]],
+            target_region=Region(country=q["region_country"], state_province=q["region_state"]),
+            target_price=q["target_cost"],
+            target_currency=q["currency"],
+            required_item=q["component_type"],
+            volume=q["volume"],
+            delivery_location=GeoPoint(latitude=q["delivery_latitude"], longitude=q["delivery_longitude"]) if "delivery_latitude" in q else None
+        ))
+    return criteria
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic supplier catalog as NDJSON")
+    parser.add_argument("count", type=int, help="Number of suppliers")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for record in generate_records(args.count, args.seed):
+        sys.stdout.write(json.dumps(record) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
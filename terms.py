@@ -0,0 +1,143 @@
+import re
+import threading
+from collections import Counter
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+# Approximate matching of service and item names. Names are normalized
+# (case, punctuation, simple plurals) and compared by the Jaccard similarity of
+# their word trigrams, as in PostgreSQL's pg_trgm. Numbers must agree exactly,
+# so "Casting Type 1" never matches "Casting Type 2".
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def normalize_term(name: str) -> str:
+    # "CNC-Machining " and "cnc machinings" both become "cnc machining"
+    return " ".join(_singular(w) for w in _NON_ALNUM.sub(" ", name.casefold()).split())
+
+
+def trigrams(key: str) -> FrozenSet[str]:
+    # Each word padded with two leading blanks and one trailing, like pg_trgm
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def _numbers(key: str) -> FrozenSet[str]:
+    return frozenset(w for w in key.split() if w.isdigit())
+
+
+def similarity(a: str, b: str) -> float:
+    # What resolve() compares: 1.0 for equal normalized names, else trigram Jaccard
+    key_a, key_b = normalize_term(a), normalize_term(b)
+    if key_a == key_b:
+        return 1.0
+    if _numbers(key_a) != _numbers(key_b):
+        return 0.0
+    grams_a, grams_b = trigrams(key_a), trigrams(key_b)
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+class TermIndex:
+    """Trigram index over a changing vocabulary of names.
+
+    ``resolve(term, threshold)`` returns every indexed name whose normalized form
+    is at least ``threshold`` similar to the term, best first. Only names sharing
+    a trigram with the term are examined, so a lookup costs the length of a few
+    posting lists rather than a comparison with every name. Names are
+    reference-counted: add one per occurrence and discard it as often.
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        self._counts: Dict[str, int] = {}
+        self._names: Dict[str, Set[str]] = {}
+        self._grams: Dict[str, FrozenSet[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._cache: Dict[Tuple[str, float], List[str]] = {}
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._counts
+
+    def add(self, name: str):
+        with self._lock:
+            count = self._counts.get(name, 0)
+            self._counts[name] = count + 1
+            if count:
+                return
+            self._cache.clear()
+            key = normalize_term(name)
+            names = self._names.setdefault(key, set())
+            names.add(name)
+            if len(names) == 1:
+                grams = self._grams[key] = trigrams(key)
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(key)
+
+    def discard(self, name: str):
+        with self._lock:
+            count = self._counts.get(name)
+            if count is None:
+                return
+            if count > 1:
+                self._counts[name] = count - 1
+                return
+            del self._counts[name]
+            self._cache.clear()
+            key = normalize_term(name)
+            names = self._names[key]
+            names.discard(name)
+            if not names:
+                del self._names[key]
+                for gram in self._grams.pop(key):
+                    keys = self._postings[gram]
+                    keys.discard(key)
+                    if not keys:
+                        del self._postings[gram]
+
+    def resolve(self, term: str, threshold: float) -> List[str]:
+        # The term itself first when indexed, then by similarity, then by name
+        with self._lock:
+            cached = self._cache.get((term, threshold))
+            if cached is not None:
+                return cached
+
+            key = normalize_term(term)
+            grams = trigrams(key)
+            numbers = _numbers(key)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._postings.get(gram, ()))
+            if key in self._names:
+                shared[key] = max(shared[key], len(grams))
+
+            scored = []
+            for candidate, common in shared.items():
+                if candidate == key:
+                    score = 1.0
+                elif _numbers(candidate) != numbers:
+                    continue
+                else:
+                    score = common / (len(grams) + len(self._grams[candidate]) - common)
+                if score >= threshold:
+                    scored.extend((name != term, -score, name) for name in self._names[candidate])
+            resolved = [name for _, _, name in sorted(scored)]
+
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[(term, threshold)] = resolved
+            return resolved
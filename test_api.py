@@ -1,3 +1,5 @@
+import json
+import uuid
 from fastapi.testclient import TestClient
 from main import app
 
@@ -50,7 +52,400 @@ def test_rank_endpoint_low_cost():
     assert results[0]["supplier_name"] == "Global Manufacturing Ltd"
     assert results[0]["cost_alignment"] == "High"
 
+def test_rank_uses_volume_price_tiers():
+    # Global Manufacturing lists Widgets at $5.00, $4.50 from 1000 units
+    payload = {"component_type": "Widget", "volume": 100, "region_country": "China", "target_cost": 4.6, "currency": "USD"}
+    results = client.post("/rank", json=payload).json()
+    assert results[0]["supplier_name"] == "Global Manufacturing Ltd"
+    assert results[0]["cost_alignment"] == "Medium"
+
+    payload["volume"] = 1000
+    results = client.post("/rank", json=payload).json()
+    assert results[0]["cost_alignment"] == "High"
+
+def test_rank_matches_delivery_point_in_service_radius():
+    # Local Precision (Los Angeles, 250 km) covers Tijuana across the border
+    payload = {"component_type": "Widget", "volume": 100, "region_country": "Mexico", "target_cost": 8.0, "currency": "USD",
+               "delivery_latitude": 32.51, "delivery_longitude": -117.04}
+    results = client.post("/rank", json=payload).json()
+    assert results[0]["supplier_name"] == "Local Precision Inc"
+
+    # Monterrey is out of range, so the Mexican supplier leads again
+    payload.update(delivery_latitude=25.69, delivery_longitude=-100.32)
+    results = client.post("/rank", json=payload).json()
+    assert results[0]["supplier_name"] == "Budget Parts Co"
+
+    # Both coordinates or neither
+    del payload["delivery_longitude"]
+    assert client.post("/rank", json=payload).status_code == 422
+
+def test_rank_sensitivity_endpoint():
+    query = {"component_type": "Widget", "volume": 100, "region_country": "Mexico", "target_cost": 5.0, "currency": "USD"}
+    by_performance = {"capability": 0.1, "cost": 0.0, "region": 0.0, "performance": 0.9}
+    response = client.post("/rank/sensitivity", json={"query": query, "weights": [by_performance]}, params={"limit": 2})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["ranking"][0]["supplier_name"] == "Budget Parts Co"
+
+    # Ranking on performance alone moves Local Precision up from third
+    scenario = result["scenarios"][0]
+    assert scenario["weights"] == by_performance
+    assert len(scenario["ranking"]) == 2
+    top = scenario["ranking"][0]
+    assert top["supplier_name"] == "Local Precision Inc"
+    assert (top["rank"], top["previous_rank"], top["rank_change"]) == (1, 3, 2)
+
+    # The same weights on /rank give the same fit score
+    ranked = client.post("/rank", json={**query, "weights": by_performance}).json()
+    assert ranked[0]["fit_score"] == top["fit_score"]
+
+    bad = {"capability": 0.5, "cost": 0.5, "region": 0.5, "performance": 0.5}
+    assert client.post("/rank/sensitivity", json={"query": query, "weights": [bad]}).status_code == 422
+
+def test_rank_pareto_endpoint():
+    payload = {
+        "component_type": "Widget",
+        "volume": 100,
+        "region_country": "USA",
+        "target_cost": 10.00,
+        "currency": "USD"
+    }
+
+    # Cheapest, best rated and lowest risk each win on one measure
+    response = client.post("/rank/pareto?fields=supplier_name,risk_level", json=payload)
+    assert response.status_code == 200
+    frontier = response.json()
+    assert [(r["supplier_name"], r["unit_cost"], r["pareto_layer"]) for r in frontier] == [
+        ("Budget Parts Co", 4.5, 1), ("Global Manufacturing Ltd", 5.0, 1), ("Local Precision Inc", 8.0, 1)]
+    assert [r["risk_level"] for r in frontier] == ["High", "Low", "High"]
+    assert frontier[2]["overall_score"] == 9.33
+
+    # Dearer and worse rated than Local Precision, at the same risk: second layer only
+    dominated = {
+        "name": "Dominated Widgets",
+        "contact_info": {"email": "sales@dominated.example.com"},
+        "capabilities": [{"category": "Manufacturing", "services": ["Widget"]}],
+        "regions": [{"country": "Canada"}],
+        "pricing": [{"item_name": "Widget", "unit_cost": 9.0, "currency": "USD"}],
+        "overall_score": 6.0
+    }
+    supplier_id = client.post("/suppliers", json=dominated).json()["id"]
+    try:
+        assert supplier_id not in [r["supplier_id"] for r in client.post("/rank/pareto?fields=supplier_id", json=payload).json()]
+        layers = client.post("/rank/pareto?layers=2&fields=supplier_id", json=payload).json()
+        assert [r["pareto_layer"] for r in layers if r["supplier_id"] == supplier_id] == [2]
+    finally:
+        client.delete(f"/suppliers/{supplier_id}")
+
+    assert client.post("/rank/pareto?layers=0", json=payload).status_code == 422
+
+def test_saved_queries_endpoints():
+    import asyncio
+    import httpx
+
+    payload = {
+        "component_type": "Widget",
+        "volume": 100,
+        "region_country": "USA",
+        "target_cost": 10.00,
+        "currency": "USD"
+    }
+    response = client.post("/queries", json={"query": payload, "limit": 2})
+    assert response.status_code == 201
+    snapshot = response.json()
+    query_id = snapshot["query_id"]
+    assert query_id in client.get("/queries").json()
+    assert client.get(f"/queries/{query_id}").json() == snapshot
+    assert [r["supplier_id"] for r in snapshot["ranking"]] == [
+        r["supplier_id"] for r in client.post("/rank?limit=2&fields=supplier_id", json=payload).json()]
+
+    cheapest = {
+        "name": "Cheapest Widgets",
+        "contact_info": {"email": "sales@cheapest.example.com"},
+        "capabilities": [{"category": "Manufacturing", "services": ["Widget"]}],
+        "regions": [{"country": "USA"}],
+        "pricing": [{"item_name": "Widget", "unit_cost": 1.0, "currency": "USD"}],
+        "overall_score": 10.0
+    }
+
+    async def watch():
+        # The stream runs until the query is deleted, so read it in a task meanwhile
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            stream = asyncio.create_task(http.get(f"/queries/{query_id}/events"))
+            await asyncio.sleep(0.1)
+            supplier_id = (await http.post("/suppliers", json=cheapest)).json()["id"]
+            await http.delete(f"/suppliers/{supplier_id}")
+            assert (await http.delete(f"/queries/{query_id}")).status_code == 204
+            return supplier_id, await asyncio.wait_for(stream, 5)
+
+    supplier_id, response = asyncio.run(watch())
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [e["type"] for e in events] == ["snapshot", "delta", "delta", "deleted"]
+    assert [e["sequence"] for e in events] == list(range(snapshot["sequence"], snapshot["sequence"] + 4))
+    assert events[1]["ranking"][0]["supplier_id"] == supplier_id
+    assert events[2]["removed"] == [supplier_id]
+
+    assert client.get(f"/queries/{query_id}").status_code == 404
+    assert client.get(f"/queries/{query_id}/events").status_code == 404
+    assert client.delete(f"/queries/{query_id}").status_code == 404
+    assert client.post("/queries", json={"query": payload, "limit": 0}).status_code == 422
+
+def test_rank_matches_component_names_approximately():
+    payload = {"component_type": "widgets", "volume": 100, "region_country": "China", "target_cost": 5.0, "currency": "USD"}
+    # By default names must match exactly: neither the service nor the price is found
+    top = client.post("/rank", json=payload).json()[0]
+    assert top["cost_alignment"] == "None"
+    assert top["fit_score"] == 28.0
+
+    # Opting in to approximate matching finds both
+    payload["match_threshold"] = 0.6
+    top = client.post("/rank", json=payload).json()[0]
+    assert top["supplier_name"] == "Global Manufacturing Ltd"
+    assert top["cost_alignment"] == "High"
+    assert top["fit_score"] == 98.0
+
+def test_rank_pagination_and_projection():
+    payload = {
+        "component_type": "Widget",
+        "volume": 100,
+        "region_country": "USA",
+        "region_state": "CA",
+        "target_cost": 10.00,
+        "currency": "USD"
+    }
+
+    full = client.post("/rank", json=payload).json()
+    response = client.post("/rank?limit=1&offset=1&fields=supplier_id,supplier_name,fit_score", json=payload)
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "3"
+    page = response.json()
+    assert page == [{k: full[1][k] for k in ("supplier_id", "supplier_name", "fit_score")}]
+
+    # Full details are a separate lookup
+    details = client.get(f"/suppliers/{page[0]['supplier_id']}").json()
+    assert details["name"] == page[0]["supplier_name"]
+
+    response = client.get("/suppliers?limit=2&fields=supplier_name")
+    assert response.json() == [{"supplier_name": r["supplier_name"]} for r in client.get("/suppliers").json()[:2]]
+    assert client.get("/suppliers?fields=bogus").status_code == 422
+
+def test_rank_and_supplier_sort_orders():
+    payload = {
+        "component_type": "Widget",
+        "volume": 100,
+        "region_country": "USA",
+        "region_state": "CA",
+        "target_cost": 10.00,
+        "currency": "USD"
+    }
+
+    # Worst-first pages are the best-first ranking reversed, paged from its end
+    full = client.post("/rank?fields=supplier_id", json=payload).json()
+    worst_first = full[::-1]
+    assert client.post("/rank?sort=fit_score&fields=supplier_id", json=payload).json() == worst_first
+    for limit, offset in [(1, 0), (2, 1), (2, 2), (5, 0), (1, 3)]:
+        response = client.post(f"/rank?sort=fit_score&limit={limit}&offset={offset}&fields=supplier_id", json=payload)
+        assert response.json() == worst_first[offset:offset + limit]
+        assert response.headers["X-Total-Count"] == "3"
+    assert client.post("/rank?sort=name", json=payload).status_code == 422
+
+    names = [r["supplier_name"] for r in client.get("/suppliers?fields=supplier_name").json()]
+    by_name = [r["supplier_name"] for r in client.get("/suppliers?sort=name&fields=supplier_name").json()]
+    assert by_name == sorted(names, key=str.casefold)
+    response = client.get("/suppliers?sort=-name&limit=2&offset=1&fields=supplier_name")
+    assert [r["supplier_name"] for r in response.json()] == by_name[::-1][1:3]
+    assert client.get("/suppliers?sort=fit_score").status_code == 422
+
+def test_ranking_totals_follow_the_snapshot():
+    import os
+    import tempfile
+    import main
+    from snapshot import SnapshotCatalog, write_snapshot
+
+    payload = {"component_type": "Widget", "volume": 100, "region_country": "USA", "target_cost": 10.00, "currency": "USD"}
+    extra = {"name": "Snapshot Only Co", "contact_info": {"email": "sales@snapshot.example.com"},
+             "capabilities": [{"category": "Manufacturing", "services": ["Widget"]}], "regions": [{"country": "USA"}]}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.snap")
+        snapshot_only = main.Supplier(**extra)
+        write_snapshot(main.store.records() + [snapshot_only], path)
+        main.snapshot = SnapshotCatalog(path, main.fx_rates)
+        try:
+            # Every ranking endpoint counts the snapshot it ranked, not the live store
+            responses = [
+                client.post("/rank", json=payload),
+                client.post("/rank/batch", json={"queries": [payload]}),
+                client.post("/rank/sensitivity", json={"query": payload, "weights": [{"capability": 1.0, "cost": 0, "region": 0, "performance": 0}]}),
+                client.post("/rank/pareto", json=payload),
+            ]
+            assert [r.headers["X-Total-Count"] for r in responses] == [str(len(main.store) + 1)] * 4
+
+            # Supplier reads come from the snapshot too; writes go to a worker with the live store
+            detail = client.get(f"/suppliers/{snapshot_only.id}")
+            assert detail.status_code == 200 and detail.json()["name"] == "Snapshot Only Co"
+            assert client.get(f"/suppliers/{uuid.uuid4()}").status_code == 404
+            listing = client.get("/suppliers?sort=name&fields=supplier_name")
+            assert listing.headers["X-Total-Count"] == str(len(main.store) + 1)
+            assert "Snapshot Only Co" in [r["supplier_name"] for r in listing.json()]
+            assert client.post("/suppliers", json=extra).status_code == 503
+            assert client.post("/queries", json={"query": payload}).status_code == 503
+        finally:
+            main.snapshot = None
+
+def test_rank_batch_endpoint():
+    queries = [
+        {"component_type": "Widget", "volume": 100, "region_country": "USA", "region_state": "CA", "target_cost": 10.00, "currency": "USD"},
+        {"component_type": "Widget", "volume": 1000, "region_country": "China", "region_state": None, "target_cost": 5.00, "currency": "USD"},
+        {"component_type": "Gadget", "volume": 10, "region_country": "India", "target_cost": 1.00, "currency": "USD"},
+    ]
+    response = client.post("/rank/batch?limit=2", json={"queries": queries})
+    assert response.status_code == 200
+    results = response.json()
+    assert len(results) == 3
+    for query, ranked in zip(queries, results):
+        assert ranked == client.post("/rank?limit=2", json=query).json()
+    assert results[0][0]["supplier_name"] == "Local Precision Inc"
+    assert results[1][0]["supplier_name"] == "Global Manufacturing Ltd"
+
+    assert client.post("/rank/batch", json={"queries": []}).status_code == 422
+
+def test_rank_cache_invalidated_by_writes():
+    payload = {
+        "component_type": "Gizmo",
+        "volume": 10,
+        "region_country": "Chile",
+        "region_state": None,
+        "target_cost": 3.00,
+        "currency": "USD"
+    }
+    before = client.get("/rank/cache").json()
+    first = client.post("/rank", json=payload).json()
+    assert client.post("/rank", json=payload).json() == first
+    after = client.get("/rank/cache").json()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"] + 1
+
+    supplier = {
+        "name": "Gizmo Chile SA",
+        "contact_info": {"email": "gizmo@example.cl"},
+        "capabilities": [{"category": "Manufacturing", "services": ["Gizmo"]}],
+        "regions": [{"country": "Chile"}],
+        "pricing": [{"item_name": "Gizmo", "unit_cost": 2.5, "currency": "USD"}]
+    }
+    supplier_id = client.post("/suppliers", json=supplier).json()["id"]
+    ranked = client.post("/rank", json=payload).json()
+    assert ranked[0]["supplier_name"] == "Gizmo Chile SA"
+    assert ranked[0]["fit_score"] == 90.0
+    client.delete(f"/suppliers/{supplier_id}")
+    assert client.post("/rank", json=payload).json() == first
+
+def test_bulk_import_endpoint():
+    rows = [
+        {"name": "Import One", "contact_info": {"email": "one@example.com"}, "regions": [{"country": "Peru"}]},
+        {"name": "", "contact_info": {"email": "two@example.com"}},
+        {"name": "Import Three", "contact_info": {"email": "three@example.com"}},
+    ]
+    body = "\n".join(json.dumps(r) for r in rows)
+    # trusted is CLI-only: the endpoint ignores it and validates every row
+    response = client.post("/suppliers/import?format=ndjson&trusted=true", content=body)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 2
+    assert report["failed"] == 1
+    assert report["errors"][0]["line"] == 2
+
+    for s in client.get("/suppliers?fields=supplier_id,supplier_name").json():
+        if s["supplier_name"].startswith("Import "):
+            client.delete(f"/suppliers/{s['supplier_id']}")
+    assert client.post("/suppliers/import?format=xml", content="").status_code == 422
+
+def test_stream_suppliers_ndjson():
+    response = client.get("/suppliers/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == 3
+    assert [r["id"] for r in records] == sorted(r["id"] for r in records)
+
+    # Resume from the first record's id
+    resumed = client.get(f"/suppliers/stream?after={records[0]['id']}&limit=1").text.splitlines()
+    assert [json.loads(line)["id"] for line in resumed] == [records[1]["id"]]
+
+def test_metrics_endpoint():
+    payload = {"component_type": "Widget", "volume": 5, "region_country": "India", "target_cost": 6.0, "currency": "USD"}
+    client.post("/rank?limit=1", json=payload)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    for stage in ("cache_lookup", "scoring", "selection", "risk", "serialization", "encoding"):
+        assert f'ranking_stage_seconds_count{{stage="{stage}"}}' in text
+    assert 'ranking_request_seconds_count{endpoint="/rank"}' in text
+    assert 'ranking_response_bytes_count{endpoint="/rank"}' in text
+    assert "ranking_suppliers_scanned_total" in text
+    assert "ranking_suppliers_returned_total" in text
+    assert "rank_cache_hits_total" in text
+    assert client.get("/metrics/slow").json() == []
+
+def test_supplier_crud_endpoints():
+    payload = {
+        "name": "Crud Test Corp",
+        "contact_info": {"email": "crud@example.com"},
+        "capabilities": [{"category": "Manufacturing", "services": ["Widget"]}],
+        "regions": [{"country": "Canada"}],
+        "pricing": [{"item_name": "Widget", "unit_cost": 6.0, "currency": "USD"}]
+    }
+
+    response = client.post("/suppliers", json=payload)
+    assert response.status_code == 201
+    supplier_id = response.json()["id"]
+
+    response = client.get(f"/suppliers/{supplier_id}")
+    assert response.status_code == 200
+    assert response.json()["name"] == "Crud Test Corp"
+
+    payload["name"] = "Crud Test Corp Renamed"
+    response = client.put(f"/suppliers/{supplier_id}", json=payload)
+    assert response.status_code == 200
+    assert response.json()["id"] == supplier_id
+    assert response.json()["name"] == "Crud Test Corp Renamed"
+
+    response = client.delete(f"/suppliers/{supplier_id}")
+    assert response.status_code == 204
+    assert client.get(f"/suppliers/{supplier_id}").status_code == 404
+    assert client.delete(f"/suppliers/{supplier_id}").status_code == 404
+
+def test_fx_rates_endpoints():
+    response = client.get("/fx/rates")
+    assert response.status_code == 200
+    rates = response.json()
+    assert rates["base"] == "USD"
+    assert rates["rates"]["EUR"] > 0
+
+    # Invalid updates are rejected without touching the table
+    response = client.put("/fx/rates", json={"rates": {"EUR": -1.0}})
+    assert response.status_code == 422
+    assert client.get("/fx/rates").json() == rates
+
 if __name__ == "__main__":
     test_rank_endpoint()
     test_rank_endpoint_low_cost()
+    test_rank_uses_volume_price_tiers()
+    test_rank_matches_delivery_point_in_service_radius()
+    test_rank_sensitivity_endpoint()
+    test_rank_pareto_endpoint()
+    test_saved_queries_endpoints()
+    test_rank_matches_component_names_approximately()
+    test_rank_pagination_and_projection()
+    test_rank_and_supplier_sort_orders()
+    test_ranking_totals_follow_the_snapshot()
+    test_rank_batch_endpoint()
+    test_rank_cache_invalidated_by_writes()
+    test_bulk_import_endpoint()
+    test_stream_suppliers_ndjson()
+    test_metrics_endpoint()
+    test_supplier_crud_endpoints()
+    test_fx_rates_endpoints()
     print("API Tests Passed!")
@@ -0,0 +1,34 @@
+from benchmark import STAGES, StageResult, find_regressions, run_benchmarks
+from synthetic import generate_records, generate_suppliers
+
+def test_synthetic_catalog_is_reproducible():
+    first = list(generate_records(25, seed=9))
+    assert first == list(generate_records(25, seed=9))
+    assert first != list(generate_records(25, seed=10))
+    # Every generated record is a valid Supplier
+    assert len(list(generate_suppliers(25, seed=9))) == 25
+
+def test_benchmark_runs_every_stage():
+    results = run_benchmarks(40, queries=3, scoring_queries=1, measure_memory=True)
+    assert [r.stage for r in results] == [stage[0] for stage in STAGES]
+    for r in results:
+        assert r.ops > 0
+        assert r.ops_per_second > 0
+        assert r.p50_ms <= r.p95_ms <= r.p99_ms
+        assert r.peak_memory_mb is not None
+
+def test_regressions_are_flagged():
+    result = StageResult(stage="scoring", size=1000, ops=1000, seconds=1.0, ops_per_second=1000.0, p50_ms=1.0, p95_ms=2.0, p99_ms=3.0)
+    baseline = {"scoring@1000": {"ops_per_second": 1100.0, "p95_ms": 1.9}}
+    assert find_regressions([result], baseline, threshold=0.2) == []
+
+    baseline = {"scoring@1000": {"ops_per_second": 2000.0, "p95_ms": 1.0}}
+    regressions = find_regressions([result], baseline, threshold=0.2)
+    assert len(regressions) == 2
+    assert all(r.startswith("scoring@1000") for r in regressions)
+
+if __name__ == "__main__":
+    test_synthetic_catalog_is_reproducible()
+    test_benchmark_runs_every_stage()
+    test_regressions_are_flagged()
+    print("Benchmark tests passed!")
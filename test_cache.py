@@ -0,0 +1,47 @@
+from cache import QueryCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_hits_and_version_invalidation():
+    cache = QueryCache(max_bytes=1000, ttl_seconds=60)
+    assert cache.get("q1", version=1) is None
+    cache.put("q1", 1, b"[1]")
+    assert cache.get("q1", version=1) == b"[1]"
+
+    # A catalog write bumps the version and the stale entry is dropped
+    assert cache.get("q1", version=2) is None
+    assert len(cache) == 0
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 2, 1)
+
+def test_cache_ttl_and_byte_budget():
+    clock = FakeClock()
+    cache = QueryCache(max_bytes=10, ttl_seconds=5, clock=clock)
+
+    cache.put("a", 0, b"aaaa")
+    cache.put("b", 0, b"bbbb")
+    assert cache.get("a", 0) == b"aaaa"  # a is now most recently used
+
+    cache.put("c", 0, b"cccc")  # 12 bytes > 10: evicts least recently used (b)
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == b"aaaa"
+    assert cache.current_bytes == 8
+    assert cache.stats()["evictions"] == 1
+
+    clock.now = 6.0
+    assert cache.get("c", 0) is None
+    assert cache.stats()["expirations"] == 1
+
+    # Payloads larger than the whole budget are never stored
+    cache.put("huge", 0, b"x" * 11)
+    assert cache.get("huge", 0) is None
+
+if __name__ == "__main__":
+    test_cache_hits_and_version_invalidation()
+    test_cache_ttl_and_byte_budget()
+    print("Cache tests passed!")
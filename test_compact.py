@@ -0,0 +1,84 @@
+import json
+import random
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from compact import CompactSupplier, to_compact, from_compact, memory_report
+from models import PerformancePolicy, get_performance_policy, set_performance_policy
+from ranking import rank_catalog, rank_suppliers, encode_rows
+from vector_scoring import ScoringEngine
+from scoring import calculate_fit_score
+from supplier_index import SupplierIndex
+from synthetic import generate_suppliers
+from test_vector_scoring import create_random_supplier, random_criteria
+
+def test_round_trip():
+    for supplier in generate_suppliers(50, seed=3):
+        record = to_compact(supplier)
+        assert isinstance(record, CompactSupplier)
+        assert from_compact(record).model_dump() == supplier.model_dump()
+        assert record.model_dump() == supplier.model_dump()
+
+def test_compact_scores_like_model():
+    rng = random.Random(9)
+    suppliers = [create_random_supplier(rng, i) for i in range(100)]
+    records = [to_compact(s) for s in suppliers]
+    for _ in range(20):
+        criteria = random_criteria(rng)
+        for supplier, record in zip(suppliers, records):
+            assert calculate_fit_score(record, criteria) == calculate_fit_score(supplier, criteria)
+    for supplier, record in zip(suppliers, records):
+        assert record.assess_risk() == supplier.assess_risk()
+        assert record.overall_score == supplier.overall_score
+
+    # Interned: equal strings from different suppliers are the same object
+    services = [s for r in records for c in r.capabilities for s in c.services]
+    assert all(s is next(t for t in services if t == s) for s in services)
+
+    index = SupplierIndex()
+    for record in records:
+        index.add(record)
+    assert len(index) == len(records)
+
+def test_memory_report():
+    report = memory_report(list(generate_suppliers(200, seed=1)))
+    assert report["suppliers"] == 200
+    assert report["compact_bytes_per_supplier"] < report["model_bytes_per_supplier"]
+    print("Memory report:", report)
+
+def test_cached_details_json():
+    rng = random.Random(12)
+    suppliers = [create_random_supplier(rng, i) for i in range(80)]
+    engine = ScoringEngine()
+    for s in suppliers:
+        engine.upsert(s)
+
+    for _ in range(10):
+        criteria = random_criteria(rng)
+        expected = JSONResponse(content=jsonable_encoder(rank_suppliers(suppliers, criteria))).body
+        assert encode_rows(rank_catalog(engine, criteria, raw_details=True)) == expected
+        assert encode_rows(rank_suppliers(suppliers, criteria, raw_details=True)) == expected
+        projected = rank_catalog(engine, criteria, limit=3, fields=["details"], raw_details=True)
+        assert json.loads(encode_rows(projected)) == jsonable_encoder(rank_catalog(engine, criteria, limit=3, fields=["details"]))
+
+    # Serialized once per record; an update brings a new record and new bytes
+    record = engine.suppliers[0]
+    assert record.details_json() is record.details_json()
+    renamed = suppliers[0].model_copy(update={"name": "Renamed"})
+    engine.upsert(renamed)
+    assert json.loads(engine.suppliers[0].details_json())["name"] == "Renamed"
+
+    # A policy change re-derives overall_score, so the bytes are rebuilt
+    previous = get_performance_policy()
+    before = engine.suppliers[1].details_json()
+    set_performance_policy(PerformancePolicy(window_months=6))
+    try:
+        assert engine.suppliers[1].details_json() is not before
+    finally:
+        set_performance_policy(previous)
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_compact_scores_like_model()
+    test_memory_report()
+    test_cached_details_json()
+    print("Compact record tests passed!")
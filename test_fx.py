@@ -0,0 +1,80 @@
+import os
+import random
+import tempfile
+from fx import FxRates
+from models import Region, CostModel
+from scoring import EvaluationCriteria, calculate_fit_score
+from ranking import rank_suppliers, rank_catalog
+from supplier_index import SupplierIndex
+from vector_scoring import ScoringEngine
+from test_vector_scoring import create_random_supplier, random_criteria
+
+def make_rates():
+    return FxRates({"EUR": 1.1, "MXN": 0.05}, base="USD")
+
+def test_engine_matches_calculate_fit_score_with_fx():
+    rng = random.Random(7)
+    fx = make_rates()
+    suppliers = [create_random_supplier(rng, i) for i in range(150)]
+    engine = ScoringEngine(fx)
+    index = SupplierIndex()
+    for s in suppliers:
+        engine.upsert(s)
+        index.add(s)
+
+    for _ in range(30):
+        criteria = random_criteria(rng)
+        scores = engine.score(criteria)
+        for s in suppliers:
+            assert scores.result(engine.rows[s.id]) == calculate_fit_score(s, criteria, fx)
+        expected = rank_suppliers(suppliers, criteria, fx_rates=fx)
+        assert rank_catalog(engine, criteria) == expected
+        assert rank_suppliers(suppliers, criteria, index=index, fx_rates=fx) == expected
+
+def test_rate_update_refreshes_affected_prices():
+    fx = make_rates()
+    rng = random.Random(1)
+    supplier = create_random_supplier(rng, 0).model_copy(update={
+        "pricing": [CostModel(item_name="Widget", unit_cost=100.0, currency="EUR")]
+    })
+    engine = ScoringEngine(fx)
+    engine.upsert(supplier)
+    criteria = EvaluationCriteria(
+        required_capabilities=["Widget"], target_region=Region(country="USA"),
+        target_price=100.0, target_currency="USD", required_item="Widget"
+    )
+    row = engine.rows[supplier.id]
+    # 100 EUR at 1.1 is 110 USD: within 10% of target
+    assert engine.score(criteria).result(row).cost_alignment == "Medium"
+
+    assert fx.update({"EUR": 0.9, "MXN": 0.05}) == {"EUR"}
+    assert fx.version == 1
+    result = engine.score(criteria).result(row)
+    assert result == calculate_fit_score(supplier, criteria, fx)
+    assert result.cost_alignment == "High"
+
+    # Without a rate the quote can't be compared at all
+    fx.update({"EUR": None})
+    assert engine.score(criteria).result(row).cost_alignment == "None"
+
+def test_rates_validate_and_persist():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fx_rates.json")
+        fx = FxRates({"EUR": 1.1}, path=path)
+        for bad in ({"EURO": 1.0}, {"EUR": 1.2, "MXN": -1.0}, {"USD": 2.0}):
+            try:
+                fx.update(bad)
+                assert False, f"{bad} should be rejected"
+            except ValueError:
+                pass
+        assert fx.as_dict() == {"base": "USD", "rates": {"EUR": 1.1}}
+
+        fx.update({"CNY": 0.14})
+        assert FxRates.load(path).as_dict() == {"base": "USD", "rates": {"CNY": 0.14, "EUR": 1.1}}
+        assert abs(fx.convert(14.0, "CNY", "EUR") - 14.0 * 0.14 / 1.1) < 1e-12
+
+if __name__ == "__main__":
+    test_engine_matches_calculate_fit_score_with_fx()
+    test_rate_update_refreshes_affected_prices()
+    test_rates_validate_and_persist()
+    print("FX tests passed!")
@@ -0,0 +1,48 @@
+import random
+from geo import GeoGrid, covers, haversine_km
+
+def test_haversine_known_distances():
+    # London to Paris, and one degree of latitude
+    assert abs(haversine_km(51.5074, -0.1278, 48.8566, 2.3522) - 343.5) < 1.0
+    assert abs(haversine_km(0, 0, 1, 0) - 111.2) < 0.1
+    assert haversine_km(10, 179.9, 10, -179.9) < 25
+
+def test_grid_matches_brute_force():
+    rng = random.Random(11)
+    grid = GeoGrid()
+    circles = {}
+    for key in range(400):
+        # Bias some centers toward the poles and the antimeridian
+        lat = rng.choice([rng.uniform(-90, 90), rng.uniform(80, 90), rng.uniform(-90, -80)])
+        lon = rng.choice([rng.uniform(-180, 180), rng.uniform(175, 180), rng.uniform(-180, -175)])
+        radius = rng.choice([5.0, 50.0, 400.0, 2500.0])
+        circles[key] = (lat, lon, radius)
+        grid.add(key, lat, lon, radius)
+
+    for key in range(0, 400, 3):
+        grid.remove(key)
+        del circles[key]
+    assert len(grid) == len(circles)
+
+    for _ in range(2000):
+        lat, lon, _ = rng.choice(list(circles.values()))
+        lat = max(-90.0, min(90.0, lat + rng.uniform(-20, 20)))
+        lon = (lon + rng.uniform(-20, 20) + 180) % 360 - 180
+        expected = {key for key, circle in circles.items() if covers(*circle, lat, lon)}
+        assert grid.covering(lat, lon) == expected
+
+def test_grid_keeps_every_circle_of_a_key():
+    grid = GeoGrid()
+    grid.add("a", 34.05, -118.24, 100.0)
+    grid.add("a", 40.71, -74.0, 100.0)
+    assert grid.covering(40.8, -74.0) == {"a"}
+    assert grid.covering(34.0, -118.3) == {"a"}
+    grid.remove("a")
+    assert grid.covering(40.8, -74.0) == set()
+    assert "a" not in grid
+
+if __name__ == "__main__":
+    test_haversine_known_distances()
+    test_grid_matches_brute_force()
+    test_grid_keeps_every_circle_of_a_key()
+    print("Geo Tests Passed!")
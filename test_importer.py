@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+from store import SupplierStore
+from importer import CSV_COLUMNS, import_file, import_records, read_ndjson
+from test_store import make_supplier
+
+def test_ndjson_import_reports_bad_rows(tmp_path):
+    suppliers = [make_supplier(f"Import Corp {i}", 10.0 + i) for i in range(5)]
+    lines = [s.model_dump_json() for s in suppliers]
+    lines.insert(2, '{"name": "Broken", "contact_info": {"email": "not-an-email"}}')
+    lines.insert(4, "{not json")
+    path = tmp_path / "suppliers.ndjson"
+    path.write_text("\n".join(lines) + "\n")
+
+    store = SupplierStore()
+    report = import_file(str(path), "ndjson", store, chunk_size=2)
+    assert report.imported == 5
+    assert report.failed == 2
+    assert [e.line for e in report.errors] == [3, 5]
+    assert store.get(suppliers[4].id) == suppliers[4]
+
+def test_trusted_import_matches_validated(tmp_path):
+    suppliers = [make_supplier(f"Import Corp {i}", 10.0 + i) for i in range(3)]
+    lines = "\n".join(s.model_dump_json() for s in suppliers)
+
+    validated, trusted = SupplierStore(), SupplierStore()
+    import_records(read_ndjson(io.StringIO(lines)), validated)
+    report = import_records(read_ndjson(io.StringIO(lines)), trusted, trusted=True)
+    assert report.imported == 3
+    for s in suppliers:
+        assert trusted.get(s.id).model_dump() == validated.get(s.id).model_dump()
+        assert trusted.get(s.id).assess_risk() == s.assess_risk()
+
+def test_trusted_import_rejects_mistyped_fields():
+    good, bad = make_supplier("Typed Corp"), make_supplier("Mistyped Corp")
+    data = bad.model_dump(mode="json")
+    data["ratings"][0]["quality_score"] = "9"
+    lines = "\n".join([good.model_dump_json(), json.dumps(data)])
+
+    store = SupplierStore()
+    report = import_records(read_ndjson(io.StringIO(lines)), store, trusted=True)
+    assert report.imported == 1
+    assert [e.line for e in report.errors] == [2]
+    assert "quality_score" in report.errors[0].error
+    assert bad.id not in store
+
+def test_csv_import_with_worker_processes(tmp_path):
+    suppliers = [make_supplier(f"Import Corp {i}", 10.0 + i) for i in range(6)]
+    path = tmp_path / "suppliers.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for s in suppliers:
+            data = s.model_dump(mode="json")
+            writer.writerow({
+                "id": data["id"], "name": data["name"], "email": data["contact_info"]["email"],
+                "phone": data["contact_info"]["phone"], "address": "",
+                "capabilities": json.dumps(data["capabilities"]), "regions": json.dumps(data["regions"]),
+                "pricing": json.dumps(data["pricing"]), "ratings": json.dumps(data["ratings"]),
+                "overall_score": "", "risk_level": ""
+            })
+        writer.writerow({"name": "No Email Ltd"})
+
+    store = SupplierStore()
+    report = import_file(str(path), "csv", store, workers=2, chunk_size=2)
+    assert report.imported == 6
+    assert report.failed == 1
+    assert report.errors[0].line == 8
+    assert [store.get(s.id) for s in suppliers] == suppliers
+
+if __name__ == "__main__":
+    import pathlib, tempfile
+    for test in (test_ndjson_import_reports_bad_rows, test_trusted_import_matches_validated, test_csv_import_with_worker_processes):
+        with tempfile.TemporaryDirectory() as d:
+            test(pathlib.Path(d))
+    test_trusted_import_rejects_mistyped_fields()
+    print("Importer tests passed!")
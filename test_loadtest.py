@@ -0,0 +1,78 @@
+import asyncio
+import os
+import tempfile
+from uuid import UUID
+from loadtest import (PROFILES, ProfileResult, check_slos, in_process_client, parse_mix, parse_slo, plan_requests, run_load,
+                      write_catalog_db)
+from store import SupplierStore
+from synthetic import generate_records
+
+def test_in_process_run_reports_every_profile():
+    import main
+
+    async def run():
+        async with in_process_client() as client:
+            return await run_load(client, [0, 30], parse_mix("rank=3,rank_page=1,suppliers=1,supplier=1,index=1"),
+                                  requests=60, concurrency=4, warmup=5, seed=3)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        # The synthetic catalog went into the app's store; leave it as the other tests expect
+        for record in generate_records(30, seed=3):
+            main.store.delete(UUID(record["id"]))
+
+    assert {r.catalog_size for r in results} == {0, 30}
+    for size in (0, 30):
+        total = next(r for r in results if r.profile == "all" and r.catalog_size == size)
+        assert total.requests == 60
+        assert sum(r.requests for r in results if r.profile != "all" and r.catalog_size == size) == 60
+    for r in results:
+        assert r.errors == 0
+        assert r.requests_per_second > 0
+        assert r.p50_ms <= r.p95_ms <= r.p99_ms
+
+def test_request_plans_are_reproducible():
+    ids = ["a", "b"]
+    plan = plan_requests(parse_mix("rank,suppliers,supplier"), ids, 50, seed=1)
+    assert plan == plan_requests(parse_mix("rank,suppliers,supplier"), ids, 50, seed=1)
+    assert {name for name, _ in plan} == {"rank", "suppliers", "supplier"}
+    # No supplier ids to fetch from an empty catalog
+    assert "supplier" not in {name for name, _ in plan_requests(parse_mix("rank,supplier"), [], 50, seed=1)}
+    assert set(PROFILES) >= set(parse_mix("rank=1,index=2"))
+
+def test_served_catalog_is_written_before_workers_start():
+    # With --serve every worker opens the same pre-written catalog
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.db")
+        records = list(generate_records(25, seed=5))
+        write_catalog_db(records, path)
+        store = SupplierStore(path)
+        try:
+            assert sorted(str(s.id) for s in store.all()) == sorted(r["id"] for r in records)
+        finally:
+            store.close()
+
+def test_slo_violations_are_flagged():
+    result = ProfileResult(profile="rank", catalog_size=1000, requests=100, errors=1, error_rate=0.01,
+                           requests_per_second=150.0, p50_ms=5.0, p95_ms=20.0, p99_ms=40.0)
+    assert check_slos([result], [parse_slo("rank.p95_ms=25"), parse_slo("suppliers.p95_ms=1")]) == []
+
+    slos = [parse_slo(s) for s in ("rank.p95_ms=10", "rank.error_rate=0.001", "rank.requests_per_second=200")]
+    violations = check_slos([result], slos)
+    assert len(violations) == 3
+    assert all(v.startswith("rank@1000") for v in violations)
+
+    for bad in ("rank.p90_ms=1", "nope.p95_ms=1"):
+        try:
+            parse_slo(bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+if __name__ == "__main__":
+    test_in_process_run_reports_every_profile()
+    test_request_plans_are_reproducible()
+    test_served_catalog_is_written_before_workers_start()
+    test_slo_violations_are_flagged()
+    print("Load test harness tests passed!")
@@ -0,0 +1,47 @@
+import time
+from metrics import Registry, SlowRequestProfiler
+
+def test_histogram_and_counter_rendering():
+    registry = Registry()
+    latency = registry.histogram("stage_seconds", "Stage latency", ["stage"], buckets=(0.1, 1.0))
+    scanned = registry.counter("scanned_total", "Suppliers scanned")
+    registry.callback("cache_hits_total", "Cache hits", "counter", lambda: 7)
+
+    latency.observe(0.05, ("scoring",))
+    latency.observe(0.5, ("scoring",))
+    latency.observe(5.0, ("scoring",))
+    scanned.inc(3)
+    scanned.inc(2)
+
+    text = registry.render()
+    assert '# TYPE stage_seconds histogram' in text
+    assert 'stage_seconds_bucket{stage="scoring",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="scoring",le="1.0"} 2' in text
+    assert 'stage_seconds_bucket{stage="scoring",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="scoring"} 3' in text
+    assert 'stage_seconds_sum{stage="scoring"} 5.55' in text
+    assert 'scanned_total 5.0' in text
+    assert 'cache_hits_total 7' in text
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def test_profiler_samples_only_slow_requests():
+    profiler = SlowRequestProfiler(threshold=0.05, interval=0.005)
+    with profiler.track("fast"):
+        pass
+    with profiler.track("slow"):
+        busy_wait(0.2)
+
+    assert [p["name"] for p in profiler.profiles] == ["slow"]
+    profile = profiler.profiles[0]
+    assert profile["duration_seconds"] >= 0.2
+    assert profile["samples"] > 0
+    assert "busy_wait" in profile["stacks"][0]["stack"]
+
+if __name__ == "__main__":
+    test_histogram_and_counter_rendering()
+    test_profiler_samples_only_slow_requests()
+    print("Metrics tests passed!")
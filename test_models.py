@@ -0,0 +1,201 @@
+from datetime import date
+from pydantic import ValidationError
+import random
+import models
+from models import (Supplier, Region, CostModel, PriceTier, PerformanceRating, ContactInfo, PerformancePolicy, RatingHistory,
+                    get_performance_policy, set_performance_policy, month_index)
+
+def rating(score, year=2023):
+    return PerformanceRating(period_start=date(year,1,1), period_end=date(year,12,31), quality_score=score, timeliness_score=score, communication_score=score)
+
+def reference_overall(ratings):
+    return round(sum((r.quality_score + r.timeliness_score + r.communication_score) / 3 for r in ratings) / len(ratings), 2)
+
+def test_incremental_ratings():
+    supplier = Supplier(name="Rated Corp", contact_info=ContactInfo(email="rated@example.com"),
+                        regions=[Region(country="USA"), Region(country="Mexico"), Region(country="Canada")],
+                        ratings=[rating(9.0)])
+    assert supplier.assess_risk() == "Low"
+    assert supplier.overall_score == 9.0
+
+    supplier.add_rating(rating(3.0, 2022))
+    assert supplier.overall_score == 6.0
+    assert supplier.risk_level == "Medium"
+
+    low = rating(1.0, 2021)
+    supplier.add_rating(low)
+    assert supplier.overall_score == reference_overall(supplier.ratings)
+    assert supplier.risk_level == "High"
+
+    supplier.remove_rating(low)
+    assert supplier.overall_score == 6.0
+    assert supplier.risk_level == "Medium"
+
+    # Replacing or editing the list directly is still picked up
+    supplier.ratings = [rating(8.5)]
+    assert supplier.assess_risk() == "Low"
+    assert supplier.overall_score == 8.5
+    supplier.ratings.append(rating(2.5))
+    assert supplier.assess_risk() == "Medium"
+    assert supplier.overall_score == 5.5
+    # Same-length edits in place too
+    supplier.ratings[1] = rating(9.5)
+    assert supplier.assess_risk() == "Low"
+    assert supplier.overall_score == 9.0
+    supplier.ratings.sort(key=lambda r: r.quality_score)
+    supplier.ratings[:] = [rating(4.0), rating(5.0)]
+    assert supplier.assess_risk() == "High"
+    assert supplier.overall_score == 4.5
+
+def test_equality_ignores_caches():
+    supplier = Supplier(name="Equal Corp", contact_info=ContactInfo(email="equal@example.com"),
+                        regions=[Region(country="USA")], ratings=[rating(7.0), rating(9.0, 2022)],
+                        pricing=[CostModel(item_name="Widget", unit_cost=5.0, currency="USD",
+                                           tiers=[PriceTier(min_quantity=10, unit_cost=4.0)])])
+    supplier.assess_risk()
+    assert supplier.pricing[0].unit_cost_at(50) == 4.0
+    copy = Supplier.model_validate_json(supplier.model_dump_json())
+    assert copy == supplier and supplier == copy
+    copy.add_rating(rating(2.0, 2021))
+    assert copy != supplier
+
+def test_incremental_regions():
+    supplier = Supplier(name="Region Corp", contact_info=ContactInfo(email="region@example.com"),
+                        regions=[Region(country="USA", state_province="CA")], overall_score=9.0)
+    assert supplier.assess_risk() == "High"
+
+    texas = Region(country="USA", state_province="TX")
+    supplier.add_region(texas)
+    assert supplier.country_count() == 1
+    assert supplier.risk_level == "High"
+
+    supplier.add_region(Region(country="Mexico"))
+    assert supplier.risk_level == "Medium"
+    supplier.add_region(Region(country="Canada"))
+    assert supplier.risk_level == "Low"
+
+    supplier.remove_region(Region(country="Mexico"))
+    assert supplier.risk_level == "Medium"
+    supplier.remove_region(texas)
+    assert supplier.country_count() == 2
+
+    # Same-length edits in place are picked up
+    supplier.regions[0] = Region(country="Canada")
+    assert supplier.country_count() == 1
+    assert supplier.assess_risk() == "High"
+    supplier.regions[1] = Region(country="Peru")
+    del supplier.regions[0]
+    supplier.regions += [Region(country="Chile"), Region(country="Peru", state_province="Lima")]
+    assert supplier.country_count() == 2
+    assert supplier.assess_risk() == "Medium"
+
+    # A copy with new regions does not reuse the original's counts
+    copy = supplier.model_copy(update={"regions": [Region(country="Argentina")]})
+    assert copy.assess_risk() == "High"
+    assert supplier.assess_risk() == "Medium"
+
+def test_price_tiers():
+    cost = CostModel(item_name="Widget", unit_cost=10.0, currency="USD", tiers=[
+        PriceTier(min_quantity=1000, unit_cost=8.0), PriceTier(min_quantity=100, unit_cost=9.0)
+    ])
+    assert [t.min_quantity for t in cost.tiers] == [100, 1000]
+    assert cost.unit_cost_at(None) == 10.0
+    assert cost.unit_cost_at(99) == 10.0
+    assert cost.unit_cost_at(100) == 9.0
+    assert cost.unit_cost_at(999) == 9.0
+    assert cost.unit_cost_at(1_000_000) == 8.0
+
+    try:
+        CostModel(item_name="Widget", unit_cost=10.0, currency="USD", tiers=[
+            PriceTier(min_quantity=100, unit_cost=9.0), PriceTier(min_quantity=100, unit_cost=8.0)
+        ])
+        assert False, "duplicate tiers should be rejected"
+    except ValidationError:
+        pass
+
+def reference_windowed(ratings, policy):
+    # Direct weighted average over the window, for checking RatingHistory
+    as_of = month_index(policy.as_of)
+    total = weight_total = 0.0
+    for r in ratings:
+        age = as_of - month_index(r.period_end)
+        if age < 0 or (policy.window_months is not None and age >= policy.window_months):
+            continue
+        weight = 1.0 if policy.half_life_months is None else 0.5 ** (age / policy.half_life_months)
+        total += weight * (r.quality_score + r.timeliness_score + r.communication_score) / 3
+        weight_total += weight
+    return round(total / weight_total, 2) if weight_total else None
+
+def test_rating_history_matches_direct_computation():
+    rng = random.Random(4)
+    history = RatingHistory()
+    ratings = []
+    for step in range(120):
+        if ratings and rng.random() < 0.2:
+            history.remove(ratings.pop(rng.randrange(len(ratings))))
+        else:
+            year, month = rng.randint(2015, 2024), rng.randint(1, 12)
+            score = round(rng.uniform(0, 10), 1)
+            r = PerformanceRating(period_start=date(year, month, 1), period_end=date(year, month, 28),
+                                  quality_score=score, timeliness_score=score, communication_score=score)
+            ratings.append(r)
+            history.add(r)
+        for window, half_life in [(None, None), (24, None), (None, 12.0), (36, 6.0), (1, 0.5)]:
+            policy = PerformancePolicy(window_months=window, half_life_months=half_life, as_of=date(2024, 6, 30))
+            expected = reference_windowed(ratings, policy)
+            actual = history.score(policy)
+            assert (actual is None and expected is None) or abs(actual - expected) <= 0.01, (step, window, half_life)
+
+def test_performance_policy_feeds_risk():
+    supplier = Supplier(name="Recent Corp", contact_info=ContactInfo(email="recent@example.com"),
+                        regions=[Region(country="USA"), Region(country="Mexico"), Region(country="Canada")],
+                        ratings=[rating(9.0, 2019), rating(9.0, 2020), rating(3.0, 2024)])
+    assert supplier.assess_risk() == "Medium"
+    assert supplier.overall_score == 7.0
+
+    previous = get_performance_policy()
+    try:
+        # Only 2023-2024 counts: the recent poor rating dominates
+        set_performance_policy(PerformancePolicy(window_months=24, as_of=date(2024, 12, 31)))
+        assert supplier.assess_risk() == "High"
+        assert supplier.overall_score == 3.0
+
+        supplier.add_rating(rating(9.0, 2024))
+        assert supplier.overall_score == 6.0
+    finally:
+        set_performance_policy(previous)
+    assert supplier.assess_risk() == "Medium"
+    assert supplier.overall_score == 7.5
+
+def test_rolling_window_follows_the_calendar():
+    def monthly(score, year, month):
+        return PerformanceRating(period_start=date(year, month, 1), period_end=date(year, month, 28),
+                                 quality_score=score, timeliness_score=score, communication_score=score)
+
+    supplier = Supplier(name="Rolling Corp", contact_info=ContactInfo(email="rolling@example.com"),
+                        regions=[Region(country="USA"), Region(country="Mexico"), Region(country="Canada")],
+                        ratings=[monthly(3.0, 2024, 1), monthly(9.0, 2024, 6)])
+    previous, today = get_performance_policy(), models.today
+    try:
+        models.today = lambda: date(2024, 12, 15)
+        set_performance_policy(PerformancePolicy(window_months=12))
+        assert supplier.assess_risk() == "Medium"
+        assert supplier.overall_score == 6.0
+
+        # A month later January 2024 has left the window, with no rating or policy change
+        models.today = lambda: date(2025, 1, 10)
+        assert supplier.assess_risk() == "Low"
+        assert supplier.overall_score == 9.0
+    finally:
+        models.today = today
+        set_performance_policy(previous)
+
+if __name__ == "__main__":
+    test_incremental_ratings()
+    test_equality_ignores_caches()
+    test_incremental_regions()
+    test_price_tiers()
+    test_rating_history_matches_direct_computation()
+    test_performance_policy_feeds_risk()
+    test_rolling_window_follows_the_calendar()
+    print("Model tests passed!")
@@ -1,6 +1,6 @@
 from datetime import date
 from models import Supplier, Capability, Region, CostModel, PerformanceRating, ContactInfo
-from scoring import EvaluationCriteria, calculate_fit_score
+from scoring import EvaluationCriteria, ScoringWeights, calculate_fit_score
 
 def test_scoring():
     # Setup Supplier
@@ -97,5 +97,36 @@ def test_scoring():
     
     print("All tests passed!")
 
+def test_custom_weights_and_tolerance():
+    supplier = Supplier(
+        name="Test Supplier",
+        contact_info=ContactInfo(email="test@example.com"),
+        capabilities=[Capability(category="Manufacturing", services=["CNC"])],
+        regions=[Region(country="USA")],
+        pricing=[CostModel(item_name="Widget", unit_cost=100.0, currency="USD")],
+        overall_score=9.0
+    )
+    # Cost 100 is 25% over target 80: Low by default, Medium with a 30% tolerance
+    criteria = EvaluationCriteria(
+        required_capabilities=["CNC"], target_region=Region(country="Canada"),
+        target_price=80.0, target_currency="USD", required_item="Widget"
+    )
+    assert calculate_fit_score(supplier, criteria).cost_alignment == "Low"
+    criteria.cost_tolerance = 0.30
+    result = calculate_fit_score(supplier, criteria)
+    assert result.cost_alignment == "Medium"
+    assert result.total_score == 40 + 15 + 0 + 9
+
+    # Cap 100, Cost 50, Region 0, Perf 90 weighted 10/50/20/20
+    criteria.weights = ScoringWeights(capability=0.1, cost=0.5, region=0.2, performance=0.2)
+    assert calculate_fit_score(supplier, criteria).total_score == 10 + 25 + 0 + 18
+
+    try:
+        ScoringWeights(capability=0.5, cost=0.5, region=0.5, performance=0.0)
+        assert False, "weights over 100% should be rejected"
+    except ValueError:
+        pass
+
 if __name__ == "__main__":
     test_scoring()
+    test_custom_weights_and_tolerance()
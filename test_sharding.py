@@ -0,0 +1,77 @@
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from fx import FxRates
+from models import CostModel
+from ranking import rank_catalog
+from sharding import ShardedRanker
+from vector_scoring import ScoringEngine
+from test_vector_scoring import create_random_supplier, random_criteria
+
+def test_sharded_ranking_matches_single_engine():
+    rng = random.Random(21)
+    fx = FxRates({"EUR": 1.1}, base="USD")
+    suppliers = [create_random_supplier(rng, i) for i in range(200)]
+    engine = ScoringEngine(fx)
+    ranker = ShardedRanker(3, fx, flush_size=50)
+    try:
+        for s in suppliers:
+            engine(s.id, s)
+            ranker(s.id, s)
+
+        # Writes after the initial load: an update keeps its tie-break position, a delete drops out
+        changed = suppliers[7].model_copy(update={"pricing": [CostModel(item_name="Widget", unit_cost=1.0, currency="EUR")]})
+        for listener in (engine, ranker):
+            listener(changed.id, changed)
+            listener(suppliers[0].id, None)
+        fx.update({"EUR": 0.95})
+
+        for _ in range(15):
+            criteria = random_criteria(rng)
+            for limit, offset in [(None, 0), (10, 0), (10, 35), (500, 0)]:
+                expected = rank_catalog(engine, criteria, limit=limit, offset=offset)
+                assert ranker.rank_sync(criteria, limit=limit, offset=offset) == expected
+                assert asyncio.run(ranker.rank(criteria, limit=limit, offset=offset)) == expected
+    finally:
+        ranker.close()
+
+def test_sharded_ranking_cancelled_on_disconnect():
+    rng = random.Random(2)
+    ranker = ShardedRanker(2)
+    try:
+        for i in range(20):
+            s = create_random_supplier(rng, i)
+            ranker(s.id, s)
+
+        async def disconnected():
+            return True
+
+        assert asyncio.run(ranker.rank(random_criteria(rng), limit=5, is_disconnected=disconnected)) is None
+        # The ranker is still usable afterwards
+        assert len(ranker.rank_sync(random_criteria(rng), limit=5)) == 5
+    finally:
+        ranker.close()
+
+def test_concurrent_queries_get_their_own_results():
+    rng = random.Random(23)
+    suppliers = [create_random_supplier(rng, i) for i in range(150)]
+    engine = ScoringEngine()
+    ranker = ShardedRanker(2, flush_size=10)
+    try:
+        for s in suppliers:
+            engine(s.id, s)
+            ranker(s.id, s)
+        queries = [random_criteria(rng) for _ in range(24)]
+        expected = [rank_catalog(engine, c, limit=15) for c in queries]
+        # Queries share the pipes; each reply must reach the query that asked
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert list(pool.map(lambda c: ranker.rank_sync(c, limit=15), queries)) == expected
+        assert len(ranker) == 150
+    finally:
+        ranker.close()
+
+if __name__ == "__main__":
+    test_sharded_ranking_matches_single_engine()
+    test_sharded_ranking_cancelled_on_disconnect()
+    test_concurrent_queries_get_their_own_results()
+    print("Sharded ranking tests passed!")
@@ -0,0 +1,130 @@
+import os
+import pickle
+import random
+import tempfile
+import uuid
+from datetime import date
+import models
+from fx import FxRates
+from models import PerformancePolicy, Supplier, get_performance_policy, set_performance_policy
+from ranking import rank_catalog, rank_pareto
+from snapshot import SnapshotCatalog, SnapshotEngine, StaleSnapshotError, write_snapshot
+from vector_scoring import ScoringEngine
+from test_vector_scoring import create_random_supplier, random_criteria
+
+def test_snapshot_matches_engine():
+    rng = random.Random(13)
+    fx = FxRates({"EUR": 1.1}, base="USD")
+    suppliers = [create_random_supplier(rng, i) for i in range(200)]
+    engine = ScoringEngine(fx)
+    for s in suppliers:
+        engine.upsert(s)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.snap")
+        write_snapshot(suppliers, path)
+        mapped = SnapshotEngine(path, fx)
+        assert len(mapped) == len(engine)
+
+        for _ in range(40):
+            criteria = random_criteria(rng)
+            scores, expected = mapped.score(criteria), engine.score(criteria)
+            for row in range(len(suppliers)):
+                assert scores.result(row) == expected.result(row)
+            assert rank_catalog(mapped, criteria, limit=10) == rank_catalog(engine, criteria, limit=10)
+            assert rank_pareto(mapped, criteria, layers=2) == rank_pareto(engine, criteria, layers=2)
+
+        # Rates are read at query time, not baked into the file
+        fx.update({"EUR": 0.9})
+        criteria = random_criteria(rng)
+        assert rank_catalog(mapped, criteria) == rank_catalog(engine, criteria)
+
+        # Details by id, in name order and as an id-ordered export, without a store
+        for row, s in enumerate(suppliers):
+            assert mapped.row_of(s.id) == row
+            assert Supplier.model_validate_json(mapped.details(row)).model_dump(exclude={"overall_score", "risk_level"}) == \
+                   s.model_dump(exclude={"overall_score", "risk_level"})
+        assert mapped.row_of(uuid.uuid4()) is None
+        by_name = sorted(suppliers, key=lambda s: (s.name.casefold(), str(s.id)))
+        assert [r.id for r in mapped.page(5, 10, sort="name")] == [s.id for s in by_name[5:15]]
+        assert [r.id for r in mapped.page(0, 3, sort="-name")] == [s.id for s in by_name[::-1][:3]]
+        assert [r.id for r in mapped.page(190)] == [s.id for s in suppliers[190:]]
+        ids = sorted(str(s.id) for s in suppliers)
+        assert [i for i, _ in mapped.iter_json()] == ids
+        assert [i for i, _ in mapped.iter_json(after=uuid.UUID(ids[9]), limit=5)] == ids[10:15]
+
+        # Pool workers reopen the mapping rather than receiving a copy
+        clone = pickle.loads(pickle.dumps(mapped))
+        assert clone.version == mapped.version
+        assert rank_catalog(clone, criteria) == rank_catalog(mapped, criteria)
+
+def test_catalog_swaps_to_new_snapshot():
+    rng = random.Random(4)
+    suppliers = [create_random_supplier(rng, i) for i in range(30)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.snap")
+        write_snapshot(suppliers[:10], path)
+        catalog = SnapshotCatalog(path, check_interval=0)
+        old = catalog.engine()
+        assert len(old) == 10
+        assert not catalog.reload()
+
+        write_snapshot(suppliers, path)
+        current = catalog.engine()
+        assert len(current) == 30 and catalog.swaps == 1
+        assert current.version > old.version
+        # A request still holding the old mapping can finish with it
+        criteria = random_criteria(rng)
+        assert len(rank_catalog(old, criteria)) == 10
+
+        # A bad replacement leaves the current snapshot in service
+        with open(path, "wb") as f:
+            f.write(b"not a snapshot")
+        assert catalog.engine() is current
+        assert catalog.error
+
+def test_snapshot_rejects_other_policy():
+    previous = get_performance_policy()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.snap")
+        write_snapshot([create_random_supplier(random.Random(1), 0)], path)
+        set_performance_policy(PerformancePolicy(window_months=12))
+        try:
+            SnapshotEngine(path)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+        finally:
+            set_performance_policy(previous)
+
+def test_stale_once_the_rolling_window_moves():
+    previous, today = get_performance_policy(), models.today
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.snap")
+        try:
+            set_performance_policy(PerformancePolicy(window_months=12))
+            models.today = lambda: date(2024, 5, 31)
+            write_snapshot([create_random_supplier(random.Random(1), 0)], path)
+            catalog = SnapshotCatalog(path, check_interval=60)
+            catalog.engine()
+
+            # A new month moves the window: the baked-in scores are refused...
+            models.today = lambda: date(2024, 6, 1)
+            try:
+                catalog.engine()
+                assert False, "expected StaleSnapshotError"
+            except StaleSnapshotError:
+                pass
+            # ...until a re-export, picked up without waiting for the check interval
+            write_snapshot([create_random_supplier(random.Random(1), 0)], path)
+            assert len(catalog.engine()) == 1 and catalog.swaps == 1
+        finally:
+            models.today = today
+            set_performance_policy(previous)
+
+if __name__ == "__main__":
+    test_snapshot_matches_engine()
+    test_catalog_swaps_to_new_snapshot()
+    test_snapshot_rejects_other_policy()
+    test_stale_once_the_rolling_window_moves()
+    print("Snapshot tests passed!")
@@ -0,0 +1,156 @@
+import threading
+from datetime import date
+from models import Supplier, Capability, Region, CostModel, PerformanceRating, ContactInfo
+from store import SupplierStore
+
+def make_supplier(name, cost=10.0):
+    return Supplier(
+        name=name,
+        contact_info=ContactInfo(email=f"sales@{name.replace(' ', '').lower()}.com"),
+        capabilities=[Capability(category="Manufacturing", services=["Widget"])],
+        regions=[Region(country="USA", state_province="CA")],
+        pricing=[CostModel(item_name="Widget", unit_cost=cost, currency="USD")],
+        ratings=[PerformanceRating(period_start=date(2023,1,1), period_end=date(2023,12,31), quality_score=8.0, timeliness_score=8.0, communication_score=8.0)]
+    )
+
+def test_store_crud():
+    store = SupplierStore()
+    events = []
+    store.add_listener(lambda supplier_id, supplier: events.append((supplier_id, supplier)))
+
+    s1 = make_supplier("Alpha Corp")
+    s2 = make_supplier("Beta Corp")
+    store.add_many([s1, s2])
+    assert len(store) == 2
+    assert store.version == 2
+    # Models are rebuilt from the store's compact record, which listeners share
+    assert store.get(s1.id) == s1 and store.get(s1.id) is not s1
+    assert events[0][1] is store.record(s1.id)
+
+    # Duplicate inserts are rejected
+    try:
+        store.add(s1)
+        assert False, "expected KeyError"
+    except KeyError:
+        pass
+
+    updated = s1.model_copy(update={"name": "Alpha Corp Intl"})
+    store.update(updated)
+    assert store.get(s1.id).name == "Alpha Corp Intl"
+
+    assert store.delete(s2.id) is True
+    assert store.delete(s2.id) is False
+    assert s2.id not in store
+    assert store.version == 4
+
+    # Listener saw every write, with None for the delete
+    assert [e[0] for e in events] == [s1.id, s2.id, s1.id, s2.id]
+    assert events[-1][1] is None
+
+def test_write_rolled_back_when_a_listener_raises(tmp_path):
+    path = str(tmp_path / "suppliers.db")
+    store = SupplierStore(path)
+    kept = make_supplier("Kept Corp")
+    store.add(kept)
+    seen = {}
+    store.add_listener(lambda supplier_id, supplier: seen.__setitem__(supplier_id, supplier))
+
+    def refuse(supplier_id, supplier):
+        if supplier is not None and supplier.name.startswith("Refused"):
+            raise ValueError("listener refused")
+    store.add_listener(refuse)
+
+    refused = make_supplier("Refused Corp")
+    renamed = kept.model_copy(update={"name": "Refused Rename"})
+    for write in (lambda: store.add_many([make_supplier("Other Corp"), refused]), lambda: store.update(renamed)):
+        try:
+            write()
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+        # Memory, listeners and SQLite are all back where they were
+        assert len(store) == 1 and store.get(kept.id) == kept
+        assert {k: v for k, v in seen.items() if v is not None} == {kept.id: store.record(kept.id)}
+    store.close()
+    reopened = SupplierStore(path)
+    assert [s.name for s in reopened.all()] == ["Kept Corp"]
+    reopened.close()
+
+def test_store_persists_between_opens(tmp_path):
+    path = str(tmp_path / "suppliers.db")
+    store = SupplierStore(path)
+    supplier = make_supplier("Gamma Corp", cost=12.5)
+    store.add(supplier)
+    store.close()
+
+    reopened = SupplierStore(path)
+    loaded = reopened.get(supplier.id)
+    assert loaded is not None
+    assert loaded.name == "Gamma Corp"
+    assert loaded.pricing[0].unit_cost == 12.5
+    assert loaded.ratings[0].period_end == date(2023, 12, 31)
+    reopened.close()
+
+def test_iter_json_cursor_is_stable():
+    store = SupplierStore()
+    suppliers = [make_supplier(f"Stream Corp {i}") for i in range(7)]
+    store.add_many(suppliers)
+
+    ids = [supplier_id for supplier_id, _ in store.iter_json(batch_size=3)]
+    assert ids == sorted(str(s.id) for s in suppliers)
+
+    first = list(store.iter_json(limit=3, batch_size=2))
+    assert len(first) == 3
+    cursor = first[-1][0]
+
+    # Writes behind the cursor don't shift the rest of the export
+    ahead = [s for s in suppliers if str(s.id) > cursor]
+    behind = [s for s in suppliers if str(s.id) <= cursor]
+    store.delete(behind[0].id)
+    rest = [supplier_id for supplier_id, _ in store.iter_json(after=cursor)]
+    assert rest == sorted(str(s.id) for s in ahead)
+
+def test_sorted_pages_follow_writes():
+    store = SupplierStore()
+    store.add_many([make_supplier(n) for n in ("bravo", "Alpha", "charlie")])
+    assert [s.name for s in store.page(sort="name")] == ["Alpha", "bravo", "charlie"]
+    assert [s.name for s in store.page(1, 1, sort="-name")] == ["bravo"]
+
+    # The cached order is dropped on every write
+    store.add(make_supplier("Aardvark"))
+    assert [s.name for s in store.page(0, 2, sort="name")] == ["Aardvark", "Alpha"]
+    store.delete(store.page(0, 1, sort="name")[0].id)
+    assert [s.name for s in store.page(sort="-name")] == ["charlie", "bravo", "Alpha"]
+
+def test_pages_while_writing():
+    store = SupplierStore()
+    store.add_many([make_supplier(f"Seed {i}") for i in range(50)])
+    errors = []
+
+    def write():
+        try:
+            for i in range(300):
+                store.upsert_many([make_supplier(f"New {i}.{j}") for j in range(3)])
+                store.delete(store.page(0, 1)[0].id)
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while writer.is_alive():
+        # Never fewer than 50 suppliers, so every page is full
+        assert len(store.page(10, 40)) == 40
+        assert len(store.page(0, 20, sort="-name")) == 20
+    writer.join()
+    assert errors == []
+    assert len(store) == 50 + 300 * 2
+
+if __name__ == "__main__":
+    test_store_crud()
+    import pathlib, tempfile
+    with tempfile.TemporaryDirectory() as d:
+        test_write_rolled_back_when_a_listener_raises(pathlib.Path(d))
+    test_iter_json_cursor_is_stable()
+    test_sorted_pages_follow_writes()
+    test_pages_while_writing()
+    print("Store tests passed!")
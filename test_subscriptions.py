@@ -0,0 +1,207 @@
+import random
+import threading
+from fx import FxRates
+from models import Capability, CostModel, Region
+from scoring import EvaluationCriteria
+from ranking import rank_catalog
+from store import SupplierStore
+from subscriptions import SavedQueries
+from supplier_index import SupplierIndex
+from vector_scoring import ScoringEngine
+from test_vector_scoring import create_random_supplier, random_criteria
+
+def apply_event(window, event):
+    # Client side: the top rows by supplier id, rebuilt from a snapshot and patched by deltas
+    if event["type"] == "snapshot":
+        window.clear()
+    for supplier_id in event.get("removed", []):
+        window.pop(supplier_id, None)
+    for row in event.get("ranking", []):
+        window[row["supplier_id"]] = row
+
+def check(saved_queries, engine, query_id, criteria, window):
+    saved = saved_queries._queries[query_id]
+    expected = rank_catalog(engine, criteria, fields=["supplier_id", "fit_score"])
+    ranked = saved.ranked()
+    assert [(str(key[2]), -key[0]) for key in ranked] == [(r["supplier_id"], r["fit_score"]) for r in expected]
+    assert saved.window == ranked[:saved.limit]
+    # The heap holds every other key, besides the ones not yet dropped
+    assert sorted(k for k in saved.rest if saved.entries.get(k[2], (None,))[0] is k) == ranked[saved.limit:]
+    snapshot = saved_queries.snapshot(query_id)
+    assert sorted(window.values(), key=lambda r: r["rank"]) == snapshot["ranking"]
+    assert [r["supplier_id"] for r in snapshot["ranking"]] == [r["supplier_id"] for r in expected[:saved.limit]]
+
+def random_write(rng, store, i):
+    suppliers = store.records()
+    action = rng.random()
+    if action < 0.3 or not suppliers:
+        store.add(create_random_supplier(rng, i))
+    elif action < 0.45:
+        store.delete(rng.choice(suppliers).id)
+    else:
+        # New pricing, ratings and regions for an existing supplier
+        store.update(create_random_supplier(rng, i).model_copy(update={"id": rng.choice(suppliers).id}))
+
+def test_saved_queries_follow_writes():
+    rng = random.Random(31)
+    fx = FxRates({"EUR": 1.1}, base="USD")
+    for rate, with_engine in ((0.8, True), (1.3, False)):
+        store = SupplierStore()
+        store.add_many(create_random_supplier(rng, i) for i in range(150))
+        engine = ScoringEngine(fx)
+        store.add_listener(engine)
+        saved_queries = SavedQueries(store.get, lambda c: c, engine=engine if with_engine else None, fx_rates=fx)
+        store.add_listener(saved_queries)
+
+        watched = []
+        for limit in (1, 5, 20):
+            criteria = random_criteria(rng)
+            window, events = {}, []
+            query_id = saved_queries.add(criteria, limit)["query_id"]
+            apply_event(window, saved_queries.subscribe(query_id, events.append))
+            watched.append((query_id, criteria, window, events))
+
+        for i in range(150, 400):
+            random_write(rng, store, i)
+            for query_id, criteria, window, events in watched:
+                for event in events:
+                    apply_event(window, event)
+                del events[:]
+                check(saved_queries, engine, query_id, criteria, window)
+
+        # An exchange-rate change re-ranks everything and sends a fresh snapshot
+        fx.update({"EUR": rate})
+        for query_id, criteria, window, events in watched:
+            assert [e["type"] for e in events] == ["snapshot"]
+            apply_event(window, events.pop())
+            check(saved_queries, engine, query_id, criteria, window)
+
+def test_deltas_only_for_the_watched_window():
+    rng = random.Random(37)
+    store = SupplierStore()
+    store.add_many(create_random_supplier(rng, i) for i in range(100))
+    engine = ScoringEngine()
+    store.add_listener(engine)
+    saved_queries = SavedQueries(store.get, lambda c: c, engine=engine)
+    store.add_listener(saved_queries)
+
+    criteria = random_criteria(rng)
+    events = []
+    snapshot = saved_queries.add(criteria, 3)
+    saved_queries.subscribe(snapshot["query_id"], events.append)
+    # Deleting the last-ranked supplier moves nothing in the top 3
+    last = saved_queries._queries[snapshot["query_id"]].ranked()[-1][2]
+    store.delete(last)
+    assert events == []
+
+    top = snapshot["ranking"][0]["supplier_id"]
+    store.delete(next(s.id for s in store.records() if str(s.id) == top))
+    assert len(events) == 1
+    delta = events[0]
+    assert delta["type"] == "delta" and delta["sequence"] == snapshot["sequence"] + 1
+    assert delta["removed"] == [top]
+    assert [r["rank"] for r in delta["ranking"]] == [1, 2, 3]
+
+    assert saved_queries.remove(snapshot["query_id"])
+    assert events[-1]["type"] == "deleted"
+    assert not saved_queries.remove(snapshot["query_id"])
+
+def test_saved_query_rebuilt_when_names_resolve_differently():
+    rng = random.Random(41)
+    store = SupplierStore()
+    store.add_many(create_random_supplier(rng, i) for i in range(60))
+    index = SupplierIndex()
+    store.add_listener(index)
+    engine = ScoringEngine()
+    store.add_listener(engine)
+    resolved_count = []
+    def to_criteria(c):
+        resolved_count.append(c)
+        return index.resolve_terms(c, 0.6)
+    saved_queries = SavedQueries(store.get, to_criteria, engine=engine, vocabulary=lambda: index.vocabulary_version)
+    store.add_listener(saved_queries)
+
+    criteria = EvaluationCriteria(required_capabilities=["Welding"], required_item="Welding", target_price=100.0, target_currency="USD",
+                                  target_region=Region(country="USA"))
+    events = []
+    query_id = saved_queries.add(criteria, 10)["query_id"]
+    saved_queries.subscribe(query_id, events.append)
+
+    # Writes that bring no new service or item name don't re-resolve the query
+    del resolved_count[:]
+    store.update(store.all()[0].model_copy(update={"name": "Renamed Corp"}))
+    assert resolved_count == []
+
+    # A supplier listing a plural of the required service brings a new name the query now matches
+    supplier = create_random_supplier(rng, 60).model_copy(update={
+        "capabilities": [Capability(category="Manufacturing", services=["Weldings"])],
+        "pricing": [CostModel(item_name="Weldings", unit_cost=90.0, currency="USD")],
+    })
+    store.add(supplier)
+    assert events[-1]["type"] == "snapshot"
+    resolved = index.resolve_terms(criteria, 0.6)
+    assert "Weldings" in resolved.services_for("Welding") and "Weldings" in resolved.item_names()
+    window = {}
+    apply_event(window, events[-1])
+    check(saved_queries, engine, query_id, resolved, window)
+
+def test_saved_query_added_while_writing():
+    rng = random.Random(43)
+    store = SupplierStore()
+    store.add_many(create_random_supplier(rng, i) for i in range(100))
+    engine = ScoringEngine()
+    store.add_listener(engine)
+    saved_queries = SavedQueries(store.get, lambda c: c, engine=engine)
+    store.add_listener(saved_queries)
+    criteria = [random_criteria(rng) for _ in range(3)]
+    errors = []
+
+    def write():
+        try:
+            for i in range(100, 400):
+                random_write(rng, store, i)
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    added = []
+    while writer.is_alive():
+        # Ranks a catalog the engine may already hold writes for that the saved queries haven't seen
+        c = rng.choice(criteria)
+        added.append((saved_queries.add(c, 5)["query_id"], c))
+    writer.join()
+    assert errors == []
+    for query_id, c in added[-5:]:
+        window = {}
+        apply_event(window, saved_queries.snapshot(query_id))
+        check(saved_queries, engine, query_id, c, window)
+
+def test_raising_listener_is_dropped():
+    rng = random.Random(47)
+    store = SupplierStore()
+    store.add_many(create_random_supplier(rng, i) for i in range(20))
+    engine = ScoringEngine()
+    store.add_listener(engine)
+    saved_queries = SavedQueries(store.get, lambda c: c, engine=engine)
+    store.add_listener(saved_queries)
+
+    def broken(event):
+        raise RuntimeError("subscriber gone")
+    events = []
+    query_id = saved_queries.add(random_criteria(rng), 100)["query_id"]
+    saved_queries.subscribe(query_id, broken)
+    saved_queries.subscribe(query_id, events.append)
+    supplier = create_random_supplier(rng, 20)
+    store.add(supplier)
+    assert supplier.id in store
+    assert len(events) == 1
+    assert saved_queries._queries[query_id].listeners == [events.append]
+
+if __name__ == "__main__":
+    test_saved_queries_follow_writes()
+    test_deltas_only_for_the_watched_window()
+    test_saved_query_rebuilt_when_names_resolve_differently()
+    test_saved_query_added_while_writing()
+    test_raising_listener_is_dropped()
+    print("Saved query tests passed!")
@@ -0,0 +1,59 @@
+import random
+from models import Supplier, Capability, Region, CostModel, ContactInfo
+from scoring import EvaluationCriteria
+from ranking import rank_suppliers
+from store import SupplierStore
+from supplier_index import SupplierIndex
+from test_vector_scoring import create_random_supplier
+
+def test_indexed_ranking_matches_full_scan():
+    rng = random.Random(7)
+    suppliers = [create_random_supplier(rng, i) for i in range(60)]
+    index = SupplierIndex()
+    for s in suppliers:
+        index.add(s)
+
+    for required, country, state in [(["CNC"], "USA", "CA"), (["Welding", "Widget"], "Mexico", None), ([], "China", None), (["Nothing"], "Nowhere", None)]:
+        criteria = EvaluationCriteria(
+            required_capabilities=required,
+            target_region=Region(country=country, state_province=state),
+            target_price=10.0,
+            target_currency="USD",
+            required_item="Widget"
+        )
+        assert rank_suppliers(suppliers, criteria, index=index) == rank_suppliers(suppliers, criteria)
+
+def test_index_follows_store_writes():
+    store = SupplierStore()
+    index = SupplierIndex()
+    store.add_listener(index)
+
+    supplier = Supplier(
+        name="Moving Corp",
+        contact_info=ContactInfo(email="move@example.com"),
+        capabilities=[Capability(category="Manufacturing", services=["CNC"])],
+        regions=[Region(country="USA", state_province="CA")],
+        pricing=[CostModel(item_name="Widget", unit_cost=10.0, currency="USD")]
+    )
+    store.add(supplier)
+    assert index.by_service["CNC"] == {supplier.id}
+    assert index.by_region[("USA", "CA")] == {supplier.id}
+
+    moved = supplier.model_copy(update={
+        "regions": [Region(country="Mexico")],
+        "capabilities": [Capability(category="Manufacturing", services=["Welding"])]
+    })
+    store.update(moved)
+    assert "CNC" not in index.by_service
+    assert "USA" not in index.by_country
+    assert index.by_country["Mexico"] == {supplier.id}
+    assert index.by_item[("Widget", "USD")] == {supplier.id}
+
+    store.delete(supplier.id)
+    assert len(index) == 0
+    assert not index.by_item
+
+if __name__ == "__main__":
+    test_indexed_ranking_matches_full_scan()
+    test_index_follows_store_writes()
+    print("Index tests passed!")
@@ -0,0 +1,67 @@
+import random
+from models import Supplier, Capability, Region, CostModel, ContactInfo
+from scoring import EvaluationCriteria
+from supplier_index import SupplierIndex
+from terms import TermIndex, normalize_term, similarity
+
+def test_normalize_term():
+    assert normalize_term("CNC-Machining ") == normalize_term("cnc machinings") == "cnc machining"
+    assert normalize_term("Widgets") == "widget"
+    assert normalize_term("Assemblies") == "assembly"
+    assert normalize_term("Glass") == "glass"
+
+def test_resolve_matches_brute_force():
+    rng = random.Random(9)
+    words = ["cnc", "machining", "machine", "injection", "molding", "moulding", "sheet", "metal", "casting",
+             "die", "welding", "widget", "gadget", "assembly", "pcb", "type", "1", "2"]
+    vocabulary = {" ".join(rng.sample(words, rng.randint(1, 3))).title() for _ in range(300)}
+    index = TermIndex()
+    for name in vocabulary:
+        index.add(name)
+
+    for _ in range(200):
+        term = rng.choice([rng.choice(sorted(vocabulary)).lower(), " ".join(rng.sample(words, rng.randint(1, 3)))])
+        for threshold in (0.3, 0.6, 1.0):
+            expected = {name for name in vocabulary if similarity(term, name) >= threshold}
+            resolved = index.resolve(term, threshold)
+            assert set(resolved) == expected
+            assert len(resolved) == len(expected)
+
+def test_names_are_reference_counted():
+    index = TermIndex()
+    index.add("Widget")
+    index.add("Widget")
+    assert index.resolve("widgets", 0.6) == ["Widget"]
+    index.discard("Widget")
+    assert index.resolve("widgets", 0.6) == ["Widget"]
+    index.discard("Widget")
+    assert index.resolve("widgets", 0.6) == []
+    assert len(index) == 0
+
+def test_index_resolves_query_terms():
+    index = SupplierIndex()
+    supplier = Supplier(
+        name="Precision", contact_info=ContactInfo(email="p@example.com"),
+        capabilities=[Capability(category="Manufacturing", services=["CNC Machining", "Injection Moulding"])],
+        regions=[Region(country="USA")],
+        pricing=[CostModel(item_name="CNC Machining", unit_cost=10.0, currency="USD")]
+    )
+    index.add(supplier)
+    criteria = EvaluationCriteria(required_capabilities=["cnc machining", "injection molding", "Casting Type 2"],
+                                  target_region=Region(country="USA"), target_price=10.0, target_currency="USD",
+                                  required_item="cnc machining")
+    resolved = index.resolve_terms(criteria, 0.6)
+    assert resolved.service_matches == {"cnc machining": ["CNC Machining"], "injection molding": ["Injection Moulding"],
+                                        "Casting Type 2": []}
+    assert resolved.item_matches == ["CNC Machining"]
+
+    # Deleting the supplier drops its names from the vocabulary
+    index.remove(supplier.id)
+    assert index.resolve_terms(criteria, 0.6).item_matches == []
+
+if __name__ == "__main__":
+    test_normalize_term()
+    test_resolve_matches_brute_force()
+    test_names_are_reference_counted()
+    test_index_resolves_query_terms()
+    print("Term matching tests passed!")
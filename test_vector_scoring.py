@@ -0,0 +1,290 @@
+import random
+import threading
+from datetime import date
+import models
+from models import (Supplier, Capability, Region, CostModel, PriceTier, PerformanceRating, ContactInfo, PerformancePolicy, GeoPoint,
+                    get_performance_policy, set_performance_policy, RISK_ORDER)
+from scoring import EvaluationCriteria, ScoringWeights, DEFAULT_WEIGHTS, calculate_fit_score, find_unit_cost
+from ranking import rank_suppliers, rank_catalog, rank_batch, rank_sensitivity, rank_pareto
+from vector_scoring import ScoringEngine, pareto_layers
+from store import SupplierStore
+import numpy as np
+
+SERVICES = ["CNC", "Widget", "Welding", "Casting", "Gadget"]
+REGIONS = [("USA", "CA"), ("USA", "TX"), ("USA", None), ("Mexico", None), ("China", None), ("Canada", "ON")]
+# Service centers cluster around a few points, some near the antimeridian
+CENTERS = [(34.0, -118.2), (31.0, -106.0), (43.7, -79.4), (31.2, 121.5), (64.8, 179.5), (-17.7, -179.0)]
+
+WEIGHTS = [DEFAULT_WEIGHTS, ScoringWeights(capability=0.25, cost=0.25, region=0.25, performance=0.25),
+           ScoringWeights(capability=0.1, cost=0.6, region=0.0, performance=0.3)]
+
+def random_region(rng, country, state):
+    if rng.random() < 0.5:
+        return Region(country=country, state_province=state)
+    lat, lon = rng.choice(CENTERS)
+    return Region(country=country, state_province=state, latitude=lat + rng.uniform(-3, 3),
+                  longitude=(lon + rng.uniform(-3, 3) + 180) % 360 - 180, service_radius_km=rng.choice([50.0, 250.0, 1000.0]))
+
+def random_point(rng):
+    lat, lon = rng.choice(CENTERS)
+    return GeoPoint(latitude=lat + rng.uniform(-5, 5), longitude=(lon + rng.uniform(-5, 5) + 180) % 360 - 180)
+
+def create_random_supplier(rng, i):
+    ratings = [
+        PerformanceRating(period_start=date(2023,1,1), period_end=date(2023,12,31),
+                          quality_score=rng.uniform(0, 10), timeliness_score=rng.uniform(0, 10), communication_score=rng.uniform(0, 10))
+        for _ in range(rng.randint(0, 3))
+    ]
+    return Supplier(
+        name=f"Supplier {i}",
+        contact_info=ContactInfo(email=f"s{i}@example.com"),
+        capabilities=[Capability(category="Manufacturing", services=rng.sample(SERVICES, rng.randint(0, 3))) for _ in range(rng.randint(1, 2))],
+        regions=[random_region(rng, c, s) for c, s in rng.sample(REGIONS, rng.randint(0, 3))],
+        pricing=[CostModel(item_name=rng.choice(SERVICES), unit_cost=round(rng.uniform(80, 130), rng.choice([0, 2])), currency=rng.choice(["USD", "EUR"]),
+                           tiers=[PriceTier(min_quantity=q, unit_cost=round(rng.uniform(80, 120), 2)) for q in rng.sample([10, 100, 1000], rng.randint(0, 2))])
+                 for _ in range(rng.randint(0, 3))],
+        ratings=ratings,
+        overall_score=rng.choice([None, round(rng.uniform(0, 10), 2)])
+    )
+
+def random_criteria(rng):
+    country, state = rng.choice(REGIONS)
+    required = rng.sample(SERVICES, rng.randint(0, 3))
+    resolved = rng.random() < 0.3
+    return EvaluationCriteria(
+        required_capabilities=required,
+        # As if resolved by SupplierIndex.resolve_terms: each term may stand for several names
+        service_matches={s: rng.sample(SERVICES, rng.randint(0, 2)) for s in required} if resolved else None,
+        item_matches=rng.sample(SERVICES, rng.randint(0, 3)) if resolved else None,
+        target_region=Region(country=country, state_province=state),
+        target_price=rng.choice([90.0, 100.0, 110.0, 92.5]),
+        target_currency=rng.choice(["USD", "EUR"]),
+        required_item=rng.choice(SERVICES),
+        volume=rng.choice([None, 1, 10, 50, 100, 1000, 5000]),
+        delivery_location=random_point(rng) if rng.random() < 0.5 else None,
+        weights=rng.choice(WEIGHTS),
+        cost_tolerance=rng.choice([0.10, 0.0, 0.25])
+    )
+
+def test_engine_matches_calculate_fit_score():
+    rng = random.Random(42)
+    suppliers = [create_random_supplier(rng, i) for i in range(200)]
+    engine = ScoringEngine()
+    for s in suppliers:
+        engine.upsert(s)
+
+    for _ in range(50):
+        criteria = random_criteria(rng)
+        scores = engine.score(criteria)
+        for s in suppliers:
+            assert scores.result(engine.rows[s.id]) == calculate_fit_score(s, criteria)
+        assert rank_catalog(engine, criteria) == rank_suppliers(suppliers, criteria)
+
+def test_engine_tracks_updates_and_deletes():
+    rng = random.Random(3)
+    suppliers = [create_random_supplier(rng, i) for i in range(20)]
+    engine = ScoringEngine()
+    for s in suppliers:
+        engine(s.id, s)
+
+    changed = suppliers[5].model_copy(update={"pricing": [CostModel(item_name="Widget", unit_cost=1.0, currency="USD")]})
+    suppliers[5] = changed
+    engine(changed.id, changed)
+    removed = suppliers.pop(0)
+    engine(removed.id, None)
+    assert len(engine) == 19
+
+    criteria = EvaluationCriteria(
+        required_capabilities=["Widget"], target_region=Region(country="USA"),
+        target_price=100.0, target_currency="USD", required_item="Widget"
+    )
+    assert rank_catalog(engine, criteria) == rank_suppliers(suppliers, criteria)
+    assert engine.score(criteria).result(engine.rows[changed.id]).cost_alignment == "High"
+
+def test_top_k_matches_full_sort():
+    rng = random.Random(11)
+    # Few distinct scores so ties straddle the page boundaries
+    suppliers = [create_random_supplier(rng, i) for i in range(150)]
+    engine = ScoringEngine()
+    for s in suppliers:
+        engine.upsert(s)
+
+    for _ in range(10):
+        criteria = random_criteria(rng)
+        full = rank_suppliers(suppliers, criteria)
+        for limit, offset in [(1, 0), (10, 0), (10, 25), (40, 140), (500, 0)]:
+            expected = full[offset:offset + limit]
+            assert rank_suppliers(suppliers, criteria, limit=limit, offset=offset) == expected
+            assert rank_catalog(engine, criteria, limit=limit, offset=offset) == expected
+
+        projected = rank_catalog(engine, criteria, limit=5, fields=["supplier_id", "fit_score"])
+        assert projected == [{"supplier_id": r["supplier_id"], "fit_score": r["fit_score"]} for r in full[:5]]
+
+def test_rank_batch_matches_individual_queries():
+    rng = random.Random(5)
+    suppliers = [create_random_supplier(rng, i) for i in range(80)]
+    engine = ScoringEngine()
+    for s in suppliers:
+        engine.upsert(s)
+
+    criteria_list = [random_criteria(rng) for _ in range(6)]
+    expected = [rank_catalog(engine, c, limit=5, fields=["supplier_id", "fit_score"]) for c in criteria_list]
+    assert rank_batch(engine, criteria_list, limit=5, fields=["supplier_id", "fit_score"]) == expected
+
+def test_engine_follows_performance_policy():
+    rng = random.Random(8)
+    suppliers = [create_random_supplier(rng, i) for i in range(60)]
+    for s in suppliers:
+        s.ratings.append(PerformanceRating(period_start=date(2020,1,1), period_end=date(2020,12,31),
+                                           quality_score=2.0, timeliness_score=2.0, communication_score=2.0))
+        s.overall_score = None
+    engine = ScoringEngine()
+    for s in suppliers:
+        engine.upsert(s)
+
+    previous, today = get_performance_policy(), models.today
+    try:
+        # The engine re-derives its performance columns on the next query
+        set_performance_policy(PerformancePolicy(window_months=24, half_life_months=6.0, as_of=date(2024, 6, 30)))
+        for _ in range(5):
+            criteria = random_criteria(rng)
+            assert rank_catalog(engine, criteria) == rank_suppliers(suppliers, criteria)
+
+        # A rolling window follows the calendar: only the 2020 ratings count in mid
+        # 2022, only the 2023 ones two years later
+        models.today = lambda: date(2022, 6, 15)
+        set_performance_policy(PerformancePolicy(window_months=24))
+        criteria = random_criteria(rng)
+        assert rank_catalog(engine, criteria) == rank_suppliers(suppliers, criteria)
+        assert suppliers[0].overall_score == 2.0
+        models.today = lambda: date(2024, 6, 15)
+        assert rank_catalog(engine, criteria) == rank_suppliers(suppliers, criteria)
+        assert suppliers[0].overall_score != 2.0
+    finally:
+        models.today = today
+        set_performance_policy(previous)
+
+def test_sensitivity_matches_reranking_each_weight_vector():
+    rng = random.Random(17)
+    suppliers = [create_random_supplier(rng, i) for i in range(300)]
+    engine = ScoringEngine()
+    for s in suppliers:
+        engine.upsert(s)
+
+    for _ in range(20):
+        criteria = random_criteria(rng)
+        result = rank_sensitivity(engine, criteria, WEIGHTS, limit=15)
+        full = rank_catalog(engine, criteria, fields=["supplier_id"])
+        previous = {row["supplier_id"]: rank for rank, row in enumerate(full, 1)}
+        assert [r["supplier_id"] for r in result["ranking"]] == [r["supplier_id"] for r in full[:15]]
+
+        for weights, scenario in zip(WEIGHTS, result["scenarios"]):
+            expected = rank_catalog(engine, criteria.model_copy(update={"weights": weights}), limit=15,
+                                    fields=["supplier_id", "fit_score"])
+            assert [(r["supplier_id"], r["fit_score"]) for r in scenario["ranking"]] == \
+                   [(r["supplier_id"], r["fit_score"]) for r in expected]
+            for rank, row in enumerate(scenario["ranking"], 1):
+                assert row["previous_rank"] == previous[row["supplier_id"]]
+                assert row["rank_change"] == row["previous_rank"] - rank
+
+    # Small blocks hold a few vectors each and add up to the one-block product
+    scores = engine.score(criteria)
+    weight_sets = WEIGHTS * 5
+    whole = list(scores.reweighted(weight_sets))
+    blocks = list(scores.reweighted(weight_sets, block_bytes=8 * 300 * 4))
+    assert len(whole) == 1 and [(start, len(block)) for start, block in blocks] == [(0, 4), (4, 4), (8, 4), (12, 3)]
+    assert np.array_equal(np.vstack([block for _, block in blocks]), whole[0][1])
+
+def brute_force_layers(points, layers):
+    # Peel the skyline with pairwise comparisons; points are (cost, value, risk)
+    def dominates(a, b):
+        return a != b and a[0] <= b[0] and a[1] >= b[1] and a[2] <= b[2]
+
+    layer = [0] * len(points)
+    remaining = list(range(len(points)))
+    for k in range(1, layers + 1):
+        front = [i for i in remaining if not any(dominates(points[j], points[i]) for j in remaining)]
+        for i in front:
+            layer[i] = k
+        remaining = [i for i in remaining if layer[i] == 0]
+    return layer
+
+def test_pareto_layers_match_brute_force():
+    rng = random.Random(23)
+    for _ in range(50):
+        n = rng.randint(0, 60)
+        # Few distinct values, so ties and exact duplicates are common
+        points = [(rng.choice([1.0, 2.0, 2.5, 3.0]), rng.choice([0.0, 50.0, 72.5, 90.0]), rng.randint(1, 3)) for _ in range(n)]
+        cost, value, risk = (np.array([p[i] for p in points], dtype=float) for i in range(3))
+        for layers in (1, 2, 5):
+            assert pareto_layers(cost, value, risk.astype(np.int8), layers).tolist() == brute_force_layers(points, layers)
+
+def test_rank_pareto_matches_brute_force():
+    rng = random.Random(29)
+    suppliers = [create_random_supplier(rng, i) for i in range(300)]
+    engine = ScoringEngine()
+    for s in suppliers:
+        engine.upsert(s)
+
+    for _ in range(20):
+        criteria = random_criteria(rng)
+        priced = [(s, find_unit_cost(s, criteria)) for s in suppliers]
+        priced = [(s, c) for s, c in priced if c is not None]
+        risks = [RISK_ORDER[s.assess_risk()] for s, _ in priced]
+        points = [(c, (s.overall_score or 0.0) * 10.0, risk) for (s, c), risk in zip(priced, risks)]
+        expected = brute_force_layers(points, 3)
+
+        result = rank_pareto(engine, criteria, layers=3)
+        assert {(r["supplier_id"], r["pareto_layer"]) for r in result} == \
+               {(str(s.id), layer) for (s, _), layer in zip(priced, expected) if layer}
+        # Frontier first, then cheapest first
+        assert [(r["pareto_layer"], r["unit_cost"]) for r in result] == sorted((r["pareto_layer"], r["unit_cost"]) for r in result)
+        fit = {r["supplier_id"]: r for r in rank_catalog(engine, criteria)}
+        for r in result:
+            assert r["fit_score"] == fit[r["supplier_id"]]["fit_score"]
+            assert r["risk_level"] == fit[r["supplier_id"]]["risk_level"]
+
+def test_engine_scores_while_store_writes():
+    rng = random.Random(11)
+    store = SupplierStore()
+    engine = ScoringEngine()
+    store.add_listener(engine)
+    store.add_many([create_random_supplier(rng, i) for i in range(1200)])
+    criteria = [random_criteria(rng) for _ in range(5)]
+    errors = []
+
+    def write():
+        try:
+            # Grows the arrays, then deletes enough to compact them
+            for i in range(1200, 2400):
+                store.add(create_random_supplier(rng, i))
+            for supplier in store.page(0, 2000):
+                store.delete(supplier.id)
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while writer.is_alive():
+        for c in criteria:
+            scores = engine.score(c)
+            for row in scores.order(10):
+                assert scores.suppliers[row] is not None
+            rank_catalog(engine, c, limit=10)
+    writer.join()
+    assert errors == []
+    assert len(engine) == 400
+    for c in criteria:
+        assert rank_catalog(engine, c) == rank_suppliers(store.page(), c)
+
+if __name__ == "__main__":
+    test_engine_matches_calculate_fit_score()
+    test_engine_tracks_updates_and_deletes()
+    test_top_k_matches_full_sort()
+    test_rank_batch_matches_individual_queries()
+    test_engine_follows_performance_policy()
+    test_sensitivity_matches_reranking_each_weight_vector()
+    test_pareto_layers_match_brute_force()
+    test_rank_pareto_matches_brute_force()
+    test_engine_scores_while_store_writes()
+    print("Vector scoring tests passed!")
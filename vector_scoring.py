@@ -0,0 +1,539 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from fx import FxRates
+from geo import GeoGrid
+from compact import CompactCostModel, CompactSupplier, to_compact
+from models import RISK_ORDER, Supplier, performance_policy_version
+from scoring import EvaluationCriteria, ScoringResult, ScoringWeights, weighted_total
+
+# cost_alignment is held as a small int code per row
+ALIGNMENT_LABELS = ["None", "Low", "Medium", "High"]
+_NONE, _LOW, _MEDIUM, _HIGH = range(4)
+
+
+class _ReadWriteLock:
+    # Any number of readers, or one writer. A waiting writer holds off new
+    # readers, so a stream of queries can't starve catalog writes.
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def reading(self):
+        with self._cond:
+            while self._writing or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class _Column:
+    # Sparse column: row -> value, materialised into numpy arrays on demand.
+    # The arrays are cached as one tuple so concurrent readers never see half of them.
+    __slots__ = ("values", "_arrays")
+
+    def __init__(self):
+        self.values: Dict[int, float] = {}
+        self._arrays = None
+
+    def set(self, row: int, value: float = 1.0):
+        self.values[row] = value
+        self._arrays = None
+
+    def discard(self, row: int):
+        self.values.pop(row, None)
+        self._arrays = None
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._arrays
+        if cached is None:
+            n = len(self.values)
+            cached = self._arrays = (np.fromiter(self.values.keys(), dtype=np.intp, count=n),
+                                     np.fromiter(self.values.values(), dtype=np.float64, count=n))
+        return cached
+
+
+# Row and min_quantity share one int64 search key: row in the high bits
+_QUANTITY_BITS = 32
+_MAX_QUANTITY = (1 << _QUANTITY_BITS) - 1
+
+
+class _PriceColumn(_Column):
+    # Price column whose rows may carry quantity breaks (min_quantity, unit_cost).
+    # All breaks live in one sorted array of packed (row, min_quantity) keys, so
+    # pricing the column at a volume is a single batched binary search.
+    __slots__ = ("tiers", "_tier_arrays_cache")
+
+    def __init__(self):
+        super().__init__()
+        self.tiers: Dict[int, List[Tuple[int, float]]] = {}
+        self._tier_arrays_cache = None
+
+    def set(self, row: int, value: float = 1.0, tiers: List[Tuple[int, float]] = ()):
+        super().set(row, value)
+        if tiers:
+            self.tiers[row] = list(tiers)
+        else:
+            self.tiers.pop(row, None)
+        self._tier_arrays_cache = None
+
+    def discard(self, row: int):
+        super().discard(row)
+        self.tiers.pop(row, None)
+        self._tier_arrays_cache = None
+
+    def _tier_arrays(self):
+        cached = self._tier_arrays_cache
+        if cached is None:
+            # Position of each row in arrays(), which follows dict order
+            position = {row: i for i, row in enumerate(self.values)}
+            rows = sorted(self.tiers)
+            keys, costs = [], []
+            for row in rows:
+                for min_quantity, unit_cost in self.tiers[row]:
+                    keys.append((row << _QUANTITY_BITS) | min(min_quantity, _MAX_QUANTITY))
+                    costs.append(unit_cost)
+            cached = self._tier_arrays_cache = (
+                np.array(keys, dtype=np.int64),
+                np.array(costs, dtype=np.float64),
+                np.array(rows, dtype=np.int64),
+                np.array([position[row] for row in rows], dtype=np.intp),
+            )
+        return cached
+
+    def priced_at(self, volume: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        # Like arrays(), with each tiered row priced at its highest break <= volume
+        rows, costs = self.arrays()
+        if volume is None or not self.tiers:
+            return rows, costs
+        keys, tier_costs, tier_rows, positions = self._tier_arrays()
+        probe = (tier_rows << _QUANTITY_BITS) | min(volume, _MAX_QUANTITY)
+        found = np.searchsorted(keys, probe, side="right") - 1
+        # A row with no break at or below volume lands on an earlier row's key
+        hit = (found >= 0) & ((keys[np.maximum(found, 0)] >> _QUANTITY_BITS) == tier_rows)
+        costs = costs.copy()
+        costs[positions[hit]] = tier_costs[found[hit]]
+        return rows, costs
+
+
+def round_scores(values: np.ndarray) -> np.ndarray:
+    # np.round can disagree with Python's round() on values sitting on a .xx5
+    # boundary, so those few entries are re-rounded with round() itself
+    rounded = np.round(values, 2)
+    scaled = values * 100.0
+    near_half = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in near_half:
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+def order_rows(rows: np.ndarray, totals: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+    # rows by their (rounded) totals descending; ties keep catalog order like list.sort()
+    if limit is not None and limit < len(totals):
+        if limit <= 0:
+            return rows[:0]
+        # Partial selection: keep everything scoring at least the limit-th best
+        # value (all ties included, still in catalog order) before sorting
+        threshold = -np.partition(-totals, limit - 1)[limit - 1]
+        picked = np.flatnonzero(totals >= threshold)
+        return rows[picked[np.argsort(-totals[picked], kind="stable")][:limit]]
+    return rows[np.argsort(-totals, kind="stable")]
+
+
+def pareto_layers(cost: np.ndarray, value: np.ndarray, risk: np.ndarray, layers: int = 1) -> np.ndarray:
+    # Skyline layer of each point, minimizing cost and risk and maximizing value:
+    # 1 for points no other point dominates, 2 once those are removed, and so on;
+    # 0 past `layers`. Each layer is a sort and a sweep: sorted by (cost, -value,
+    # risk), a point's dominators all come before it, so it is dominated if a
+    # running maximum of value over the points of no greater risk reaches it.
+    # Risk is an ordinal with a handful of levels, so one running maximum per level.
+    layer = np.zeros(len(cost), dtype=np.int64)
+    remaining = np.arange(len(cost))
+    levels = np.unique(risk)
+    for k in range(1, layers + 1):
+        if not len(remaining):
+            break
+        order = np.lexsort((risk[remaining], -value[remaining], cost[remaining]))
+        c, v, r = cost[remaining][order], value[remaining][order], risk[remaining][order]
+
+        # Identical points don't dominate each other: compare each with the points before its group
+        positions = np.arange(len(order))
+        new_group = np.ones(len(order), dtype=bool)
+        new_group[1:] = (c[1:] != c[:-1]) | (v[1:] != v[:-1]) | (r[1:] != r[:-1])
+        group_start = np.maximum.accumulate(np.where(new_group, positions, 0))
+
+        best_before = np.empty(len(order))
+        for level in levels:
+            at_level = r == level
+            if not at_level.any():
+                continue
+            running = np.maximum.accumulate(np.where(r <= level, v, -np.inf))
+            before = np.concatenate(([-np.inf], running))[group_start]
+            best_before[at_level] = before[at_level]
+        dominated = best_before >= v
+
+        layer[remaining[order[~dominated]]] = k
+        remaining = remaining[order[dominated]]
+    return layer
+
+
+# Upper bound on one block of reweighted totals (see CatalogScores.reweighted)
+REWEIGHT_BLOCK_BYTES = 64 << 20
+
+
+class CatalogScores:
+    # Component scores for every live row of a ScoringEngine for one criteria set;
+    # unit_costs (NaN where unpriced) and risk (RISK_ORDER codes) are per row too.
+    # suppliers is the engine's row -> record list as scored, so rows stay
+    # readable whatever the engine does next.
+
+    def __init__(self, rows, capability, cost, alignment, region, performance, total, unit_costs=None, risk=None,
+                 suppliers=None):
+        self.rows = rows
+        self.suppliers = suppliers
+        self.capability = capability
+        self.cost = cost
+        self.alignment = alignment
+        self.region = region
+        self.performance = performance
+        self.total = total
+        self.rounded = round_scores(total)
+        self.unit_costs = unit_costs
+        self.risk = risk
+
+    def order(self, limit: Optional[int] = None, totals: Optional[np.ndarray] = None) -> np.ndarray:
+        # Rows by fit score descending, or by other totals for the live rows (see reweighted)
+        return order_rows(self.rows, self.rounded[self.rows] if totals is None else totals, limit)
+
+    def ranks(self) -> np.ndarray:
+        # 1-based position of every row in order(), indexed by row
+        ranks = np.zeros(len(self.total), dtype=np.int64)
+        ranks[self.order()] = np.arange(1, len(self.rows) + 1)
+        return ranks
+
+    def reweighted(self, weight_sets: Sequence[ScoringWeights], block_bytes: int = REWEIGHT_BLOCK_BYTES):
+        # Rounded fit scores of the live rows under each weight vector: yields
+        # (first vector index, k x rows totals) blocks, each one (k x 4) @ (4 x rows)
+        # product. The components are scored once; k is bounded so a block stays
+        # within block_bytes however many vectors and rows there are.
+        components = np.vstack([self.capability[self.rows], self.cost[self.rows],
+                                self.region[self.rows], self.performance[self.rows]])
+        weights = np.array([w.as_tuple() for w in weight_sets], dtype=np.float64).reshape(-1, 4)
+        step = max(1, block_bytes // (8 * max(1, len(self.rows))))
+        for start in range(0, len(weights), step):
+            totals = weights[start:start + step] @ components
+            for j in range(len(totals)):
+                totals[j] = round_scores(totals[j])
+            yield start, totals
+
+    def pareto(self, layers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        # (rows, layer) for the priced rows on the first `layers` skyline layers of
+        # unit cost, performance and risk, by layer, then cost, performance, risk and row
+        candidates = self.rows[~np.isnan(self.unit_costs[self.rows])]
+        cost, performance, risk = self.unit_costs[candidates], self.performance[candidates], self.risk[candidates]
+        layer = pareto_layers(cost, performance, risk, layers)
+        picked = np.flatnonzero(layer)
+        order = picked[np.lexsort((candidates[picked], risk[picked], -performance[picked], cost[picked], layer[picked]))]
+        return candidates[order], layer[order]
+
+    def result(self, row: int) -> ScoringResult:
+        return ScoringResult(
+            total_score=round(float(self.total[row]), 2),
+            cost_alignment=ALIGNMENT_LABELS[self.alignment[row]],
+            capability_score=float(self.capability[row]),
+            cost_score=float(self.cost[row]),
+            region_score=float(self.region[row]),
+            performance_score=float(self.performance[row])
+        )
+
+
+class ScoringEngine:
+    """Columnar copy of the catalog that scores every supplier with array operations.
+
+    Applies the same rules and weights as ``scoring.calculate_fit_score``. Rows are
+    append-only so catalog order is preserved; register the engine as a store
+    listener to keep it current.
+
+    Queries run concurrently with each other; writes wait for running queries
+    and hold off new ones. A removed row keeps its record until compaction, which
+    builds new lists and arrays, so the rows a query returned stay valid after it.
+    """
+
+    def __init__(self, fx_rates: Optional[FxRates] = None):
+        self.fx = fx_rates
+        self._lock = _ReadWriteLock()
+        if fx_rates is not None:
+            fx_rates.add_listener(self.refresh_currencies)
+        self._reset()
+
+    def _reset(self):
+        self.suppliers: List[CompactSupplier] = []
+        self.rows: Dict[UUID, int] = {}
+        self._overall = np.zeros(0, dtype=np.float64)
+        self._risk = np.zeros(0, dtype=np.int8)
+        self._active = np.zeros(0, dtype=bool)
+        # Policy version the overall score and risk columns were derived under
+        self._performance_version = performance_policy_version()
+
+        self.services: Dict[str, _Column] = {}
+        self.prices: Dict[Tuple[str, str], _PriceColumn] = {}
+        self.countries: Dict[str, _Column] = {}
+        self.regions: Dict[Tuple[str, Optional[str]], _Column] = {}
+        self._entries: Dict[int, List[Tuple[dict, object]]] = {}
+        # Service circles by row, for delivery-point region matching
+        self.geo = GeoGrid()
+
+        # Currency-normalized price index: item -> row -> price in the FX base
+        # currency, taken from the first quote whose currency has a rate.
+        # _quotes keeps each row's quotes per item and _by_currency which
+        # (row, item) pairs quote a currency, so a rate change only refreshes those.
+        self.base_prices: Dict[str, _PriceColumn] = {}
+        self._quotes: Dict[int, Dict[str, List[CompactCostModel]]] = {}
+        self._by_currency: Dict[str, Set[Tuple[int, str]]] = {}
+
+    def __call__(self, supplier_id: UUID, supplier: Optional[Supplier]):
+        if supplier is None:
+            self.remove(supplier_id)
+        else:
+            self.upsert(supplier)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def size(self) -> int:
+        return len(self.suppliers)
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self._overall))
+        overall = np.zeros(capacity, dtype=np.float64)
+        risk = np.zeros(capacity, dtype=np.int8)
+        active = np.zeros(capacity, dtype=bool)
+        overall[:len(self._overall)] = self._overall
+        risk[:len(self._risk)] = self._risk
+        active[:len(self._active)] = self._active
+        self._overall, self._risk, self._active = overall, risk, active
+
+    def upsert(self, supplier: Supplier):
+        # Rows hold compact records; the Pydantic model stays with the store
+        if not isinstance(supplier, CompactSupplier):
+            supplier = to_compact(supplier)
+        with self._lock.writing():
+            self._upsert(supplier)
+
+    def _upsert(self, supplier: CompactSupplier):
+        row = self.rows.get(supplier.id)
+        if row is None:
+            row = len(self.suppliers)
+            if row >= len(self._overall):
+                self._grow()
+            self.suppliers.append(supplier)
+            self.rows[supplier.id] = row
+        else:
+            self._clear_row(row)
+            self.suppliers[row] = supplier
+
+        self._overall[row] = supplier.refresh_overall_score() or 0.0
+        self._risk[row] = RISK_ORDER[supplier.assess_risk()]
+        self._active[row] = True
+
+        entries = []
+        for cap in supplier.capabilities:
+            for service in cap.services:
+                entries.append((self.services, service))
+        for region in supplier.regions:
+            entries.append((self.countries, region.country))
+            entries.append((self.regions, (region.country, region.state_province)))
+        for table, key in entries:
+            table.setdefault(key, _Column()).set(row)
+        for region in supplier.regions:
+            area = region.service_area()
+            if area is not None:
+                self.geo.add(row, *area)
+
+        # Only the first CostModel for an item/currency counts, as in calculate_fit_score
+        quotes: Dict[str, List[CompactCostModel]] = {}
+        for cost in supplier.pricing:
+            key = (cost.item_name, cost.currency)
+            column = self.prices.setdefault(key, _PriceColumn())
+            if row not in column.values:
+                column.set(row, cost.unit_cost, [(t.min_quantity, t.unit_cost) for t in cost.tiers])
+                entries.append((self.prices, key))
+            quotes.setdefault(cost.item_name, []).append(cost)
+            self._by_currency.setdefault(cost.currency, set()).add((row, cost.item_name))
+
+        self._quotes[row] = quotes
+        for item in quotes:
+            entries.append((self.base_prices, item))
+            self._normalize(row, item)
+
+        self._entries[row] = entries
+
+    def _normalize(self, row: int, item: str):
+        column = self.base_prices.setdefault(item, _PriceColumn())
+        if self.fx is not None:
+            for cost in self._quotes[row][item]:
+                if self.fx.has(cost.currency):
+                    to_base = self.fx.to_base
+                    tiers = [(t.min_quantity, to_base(t.unit_cost, cost.currency)) for t in cost.tiers]
+                    column.set(row, to_base(cost.unit_cost, cost.currency), tiers)
+                    return
+        column.discard(row)
+
+    def refresh_currencies(self, currencies: Set[str]):
+        # FX listener: re-derive base prices only for quotes in the changed currencies
+        with self._lock.writing():
+            for currency in currencies:
+                for row, item in self._by_currency.get(currency, ()):
+                    self._normalize(row, item)
+
+    def refresh_performance(self):
+        # Re-derive every row's performance term. score() calls this when the
+        # policy changed or a rolling window moved on to a new month.
+        with self._lock.writing():
+            self._performance_version = performance_policy_version()
+            for row in self.rows.values():
+                supplier = self.suppliers[row]
+                self._overall[row] = supplier.refresh_overall_score() or 0.0
+                self._risk[row] = RISK_ORDER[supplier.assess_risk()]
+
+    def remove(self, supplier_id: UUID):
+        with self._lock.writing():
+            row = self.rows.pop(supplier_id, None)
+            if row is None:
+                return
+            self._clear_row(row)
+            self._active[row] = False
+            self._overall[row] = 0.0
+            self._risk[row] = 0
+            if self.size > 1024 and len(self.rows) < self.size // 2:
+                self._compact()
+
+    def _clear_row(self, row: int):
+        self.geo.remove(row)
+        for item, quotes in self._quotes.pop(row, {}).items():
+            for cost in quotes:
+                pairs = self._by_currency.get(cost.currency)
+                if pairs is not None:
+                    pairs.discard((row, item))
+                    if not pairs:
+                        del self._by_currency[cost.currency]
+        for table, key in self._entries.pop(row, []):
+            column = table.get(key)
+            if column is None:
+                continue
+            column.discard(row)
+            if not column.values:
+                del table[key]
+
+    def _compact(self):
+        suppliers = [self.suppliers[row] for row in sorted(self.rows.values())]
+        self._reset()
+        for supplier in suppliers:
+            self._upsert(supplier)
+
+    def score(self, criteria: EvaluationCriteria) -> CatalogScores:
+        if self._performance_version != performance_policy_version():
+            self.refresh_performance()
+        with self._lock.reading():
+            return self._score(criteria)
+
+    def _score(self, criteria: EvaluationCriteria) -> CatalogScores:
+        n = self.size
+        rows = np.flatnonzero(self._active[:n])
+
+        # 1. Capability Match
+        required_services = set(criteria.required_capabilities)
+        if not required_services:
+            capability = np.full(n, 100.0)
+        else:
+            hits = np.zeros(n, dtype=np.float64)
+            matched = np.zeros(n, dtype=bool)
+            for service in required_services:
+                # A row counts once per capability however many of its names it lists
+                matched[:] = False
+                for name in criteria.services_for(service):
+                    column = self.services.get(name)
+                    if column is not None:
+                        matched[column.arrays()[0]] = True
+                hits += matched
+            capability = (hits / len(required_services)) * 100.0
+
+        # 2. Cost Alignment
+        cost = np.zeros(n, dtype=np.float64)
+        alignment = np.full(n, _NONE, dtype=np.int8)
+        unit_costs = np.full(n, np.nan)
+        target_currency = criteria.target_currency
+        # Least preferred item name first, so preferred names overwrite
+        item_names = criteria.item_names()[::-1]
+        if self.fx is not None and self.fx.has(target_currency):
+            for item in item_names:
+                column = self.base_prices.get(item)
+                if column is not None:
+                    normalized_rows, base_costs = column.priced_at(criteria.volume)
+                    unit_costs[normalized_rows] = self.fx.from_base(base_costs, target_currency)
+        # A quote in the target currency itself takes precedence over a converted one
+        for item in item_names:
+            column = self.prices.get((item, target_currency))
+            if column is not None:
+                quoted_rows, quoted_costs = column.priced_at(criteria.volume)
+                unit_costs[quoted_rows] = quoted_costs
+
+        priced_rows = np.flatnonzero(~np.isnan(unit_costs))
+        if len(priced_rows):
+            priced_costs = unit_costs[priced_rows]
+            high = priced_costs <= criteria.target_price
+            medium = ~high & (priced_costs <= criteria.tolerance_price())
+            cost[priced_rows] = np.where(high, 100.0, np.where(medium, 50.0, 0.0))
+            alignment[priced_rows] = np.where(high, _HIGH, np.where(medium, _MEDIUM, _LOW))
+
+        # 3. Region Match
+        region = np.zeros(n, dtype=np.float64)
+        target = criteria.target_region
+        if target.state_province:
+            column = self.regions.get((target.country, target.state_province))
+        else:
+            column = self.countries.get(target.country)
+        if column is not None:
+            region[column.arrays()[0]] = 100.0
+        point = criteria.delivery_location
+        if point is not None:
+            covered = self.geo.covering(point.latitude, point.longitude)
+            if covered:
+                region[np.fromiter(covered, dtype=np.intp, count=len(covered))] = 100.0
+
+        # 4. Performance Rating
+        performance = self._overall[:n] * 10.0
+
+        total = weighted_total(capability, cost, region, performance, criteria.weights)
+        return CatalogScores(rows, capability, cost, alignment, region, performance, total, unit_costs, self._risk[:n].copy(),
+                             self.suppliers)